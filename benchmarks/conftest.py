@@ -0,0 +1,100 @@
+"""
+Shared fixtures for benchmarks.
+
+The benchmarks run against synthetic lockfiles in an isolated hatch project,
+the resolver subprocesses are never run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pathlib
+from typing import Callable
+
+import pytest
+
+from hatch_pip_compile.lock import LockFileContents
+from hatch_pip_compile.plugin import PipCompileEnvironment
+from tests.conftest import PipCompileFixture, isolation, pip_compile, platform  # noqa: F401
+
+PIN_COUNTS = [10, 1_000, 10_000]
+CONSTRAINT_DEPTHS = [1, 2, 3, 4, 5]
+
+
+def get_lockfile_body(pins: int, hashes: bool, via: str) -> list[str]:
+    """
+    Get the body of a synthetic lockfile, as written by the resolver
+    """
+    lines = []
+    for index in range(pins):
+        name = f"package-{index}"
+        if hashes:
+            lines.append(f"{name}==1.0.{index} \\")
+            hash_lines = [
+                f"    --hash=sha256:{hashlib.sha256(f'{name}-{wheel}'.encode()).hexdigest()}"
+                for wheel in range(3)
+            ]
+            lines.append(" \\\n".join(hash_lines))
+        else:
+            lines.append(f"{name}==1.0.{index}")
+        lines.append(f"    # via {via}")
+    return lines
+
+
+def write_lockfile(
+    environment: PipCompileEnvironment,
+    pins: int,
+    hashes: bool,
+    constraints_file: pathlib.Path | None = None,
+) -> None:
+    """
+    Write a synthetic lockfile with a hatch-pip-compile header for an environment
+    """
+    lines = ["#", "# This file is autogenerated by hatch-pip-compile with Python 3.11", "#"]
+    if constraints_file is not None:
+        constraint_sha = LockFileContents.from_path(constraints_file).content_hash
+        constraints_path = constraints_file.relative_to(environment.root).as_posix()
+        lines.extend([f"# [constraints] {constraints_path} (SHA256: {constraint_sha})", "#"])
+    lines.extend([f"# - {dependency}" for dependency in environment.dependencies])
+    lines.extend(["#", ""])
+    lines.extend(get_lockfile_body(pins=pins, hashes=hashes, via=f"hatch.envs.{environment.name}"))
+    environment.piptools_lock_file.parent.mkdir(parents=True, exist_ok=True)
+    environment.piptools_lock_file.write_text("\n".join([*lines, ""]))
+
+
+@pytest.fixture
+def synthetic_environment(
+    pip_compile: PipCompileFixture,  # noqa: F811
+) -> Callable[..., PipCompileEnvironment]:
+    """
+    Build a chain of environments with synthetic lockfiles
+
+    Each environment is constrained by the previous one, the last
+    environment of the chain is returned.
+    """
+
+    def make_environment(pins: int, hashes: bool = False, depth: int = 0) -> PipCompileEnvironment:
+        environment_names = [f"bench{level}" for level in range(depth + 1)]
+        environment_configs = pip_compile.toml_doc["tool"]["hatch"]["envs"]
+        for level, environment_name in enumerate(environment_names):
+            environment_configs[environment_name] = {
+                "type": "pip-compile",
+                "detached": True,
+                "dependencies": [f"package-{level}"],
+                "pip-compile-hashes": hashes,
+                "pip-compile-constraint": environment_names[max(level - 1, 0)],
+            }
+        pip_compile.update_pyproject()
+        constraints_file = None
+        for environment_name in environment_names:
+            environment = pip_compile.reload_environment(environment_name)
+            write_lockfile(
+                environment=environment,
+                pins=pins,
+                hashes=hashes,
+                constraints_file=constraints_file,
+            )
+            constraints_file = environment.piptools_lock_file
+        return pip_compile.reload_environment(environment_names[-1])
+
+    return make_environment
@@ -0,0 +1,131 @@
+"""
+Benchmarks for the `lock` module
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from packaging.requirements import Requirement
+from packaging.version import Version
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.conftest import PIN_COUNTS, get_lockfile_body
+from hatch_pip_compile.lock import PipCompileLock
+from hatch_pip_compile.plugin import PipCompileEnvironment
+
+hashes_param = pytest.mark.parametrize("hashes", [False, True], ids=["plain", "hashes"])
+pins_param = pytest.mark.parametrize("pins", PIN_COUNTS)
+
+
+@hashes_param
+@pins_param
+def test_read_header_requirements(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    pins: int,
+    hashes: bool,
+) -> None:
+    """
+    Parse the lockfile header without the per-instance cache
+    """
+    lock = synthetic_environment(pins=pins, hashes=hashes).piptools_lock
+
+    def read_header_requirements() -> list[Requirement]:
+        lock._lock_file_cache = None
+        return lock.read_header_requirements()
+
+    assert benchmark(read_header_requirements) == [Requirement("package-0")]
+
+
+@hashes_param
+@pins_param
+def test_compare_requirements(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    pins: int,
+    hashes: bool,
+) -> None:
+    """
+    Compare the environment's dependencies with a freshly parsed lockfile
+    """
+    environment = synthetic_environment(pins=pins, hashes=hashes)
+    lock = environment.piptools_lock
+
+    def compare_requirements() -> bool:
+        lock._lock_file_cache = None
+        return lock.compare_requirements(requirements=environment.dependencies_complex)
+
+    assert benchmark(compare_requirements) is True
+
+
+@hashes_param
+@pins_param
+def test_get_file_content_hash(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    pins: int,
+    hashes: bool,
+) -> None:
+    """
+    Hash a freshly read lockfile
+    """
+    lock = synthetic_environment(pins=pins, hashes=hashes).piptools_lock
+
+    def get_file_content_hash() -> str:
+        lock._lock_file_cache = None
+        return lock.get_file_content_hash()
+
+    benchmark(get_file_content_hash)
+
+
+@hashes_param
+@pins_param
+def test_read_lock_requirements(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    pins: int,
+    hashes: bool,
+) -> None:
+    """
+    Parse every pinned requirement of the lockfile
+    """
+    lock = synthetic_environment(pins=pins, hashes=hashes).piptools_lock
+    assert len(benchmark(lock.read_lock_requirements)) == pins
+
+
+@hashes_param
+@pins_param
+def test_process_lock(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    pins: int,
+    hashes: bool,
+) -> None:
+    """
+    Post-process the raw resolver output of a constrained environment
+    """
+    environment = synthetic_environment(pins=pins, hashes=hashes, depth=1)
+    output_file = environment.root / "lock.txt"
+    raw_output = "\n".join(
+        [
+            *get_lockfile_body(pins=pins, hashes=hashes, via="-r /tmp/tmpabc/bench1.in"),
+            "",
+        ]
+    )
+
+    def write_output() -> None:
+        output_file.write_text(raw_output)
+
+    with patch.object(
+        PipCompileLock, "current_python_version", new_callable=PropertyMock
+    ) as mock_python_version:
+        mock_python_version.return_value = Version("3.11")
+        benchmark.pedantic(
+            environment.piptools_lock.process_lock,
+            kwargs={"lockfile": output_file},
+            setup=write_output,
+            rounds=20,
+        )
@@ -0,0 +1,83 @@
+"""
+Benchmarks for the `plugin` module
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.conftest import CONSTRAINT_DEPTHS, PIN_COUNTS
+from hatch_pip_compile.plugin import PipCompileEnvironment
+
+
+@pytest.mark.parametrize("manifest", [True, False], ids=["manifest", "no-manifest"])
+@pytest.mark.parametrize("pins", PIN_COUNTS)
+def test_lockfile_up_to_date(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    pins: int,
+    manifest: bool,
+) -> None:
+    """
+    Check an unconstrained lockfile, with and without the lock state manifest
+
+    Recording the lock state after a check without the manifest writes the
+    manifest, which is left out of the timings.
+    """
+    environment = synthetic_environment(pins=pins)
+
+    def lockfile_up_to_date() -> bool:
+        environment._lockfile_up_to_date = None
+        environment.piptools_lock._lock_file_cache = None
+        return environment.lockfile_up_to_date
+
+    with patch.object(
+        PipCompileEnvironment,
+        "lock_state_matches_manifest",
+        autospec=True,
+        side_effect=lambda _environment: manifest,
+    ), patch.object(PipCompileEnvironment, "record_lock_state") as mock_record:
+        assert benchmark(lockfile_up_to_date) is True
+    assert mock_record.called is not manifest
+
+
+@pytest.mark.parametrize("depth", CONSTRAINT_DEPTHS)
+def test_lockfile_up_to_date_constraints(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    depth: int,
+) -> None:
+    """
+    Check the lockfile at the end of a constraint chain
+    """
+    environment = synthetic_environment(pins=1_000, depth=depth)
+
+    def lockfile_up_to_date() -> bool:
+        environment._lockfile_up_to_date = None
+        return environment.lockfile_up_to_date
+
+    assert benchmark(lockfile_up_to_date) is True
+
+
+@pytest.mark.parametrize("fast_path", [True, False], ids=["fast", "full"])
+@pytest.mark.parametrize("pins", PIN_COUNTS)
+def test_dependency_hash(
+    benchmark: BenchmarkFixture,
+    synthetic_environment: Callable[..., PipCompileEnvironment],
+    pins: int,
+    fast_path: bool,
+) -> None:
+    """
+    Compute the dependency hash, `run_pip_compile` is stubbed on the full path
+    """
+    environment = synthetic_environment(pins=pins)
+    with patch.object(PipCompileEnvironment, "run_pip_compile"), patch.object(
+        PipCompileEnvironment, "force_upgrade", new_callable=PropertyMock
+    ) as mock_force_upgrade:
+        mock_force_upgrade.return_value = not fast_path
+        environment.dependency_hash()
+        benchmark(environment.dependency_hash)
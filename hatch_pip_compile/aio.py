@@ -0,0 +1,625 @@
+"""
+hatch-pip-compile asyncio API
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import dataclasses
+import functools
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, ClassVar, Iterable, TypeVar
+
+from hatch.project.core import Project
+
+from hatch_pip_compile.api import get_environment, load_application
+from hatch_pip_compile.exceptions import HatchPipCompileError
+from hatch_pip_compile.plugin import PipCompileEnvironment
+
+_T = TypeVar("_T")
+
+
+@dataclasses.dataclass(frozen=True)
+class EnvironmentResult:
+    """
+    The outcome of locking or syncing a single environment
+
+    `status` is one of `succeeded`, `failed`, `timed out`, `cancelled`
+    or `skipped` (when a constraint environment didn't succeed).
+    `cache_hit` is set when the resolver output came from the resolution
+    cache and `lock_changed` when the content of the lock file changed.
+    """
+
+    environment: str
+    status: str
+    duration: float = 0.0
+    cache_hit: bool = False
+    lock_changed: bool = False
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        Whether the environment was locked (or synced) successfully
+        """
+        return self.status == AsyncEnvironmentRunner.SUCCEEDED
+
+
+@dataclasses.dataclass
+class _LockOutcome:
+    """
+    What happened while locking an environment
+    """
+
+    cache_hit: bool = False
+    lock_changed: bool = False
+
+
+@dataclasses.dataclass
+class _PendingLock:
+    """
+    A lock that was prepared on the worker thread
+    """
+
+    lock_hash: str | None
+    command: list[str] | None = None
+    env: dict[str, str] | None = None
+    cache_hit: bool = False
+
+
+class AsyncEnvironmentRunner:
+    """
+    Lock or sync many environments concurrently with asyncio
+
+    The resolver and installer commands are the same the serial path
+    runs, built with `BaseResolver.get_pip_compile_args` and the installers,
+    and their output is post-processed with `PipCompileLock.process_lock`.
+    Only the commands run concurrently as asyncio subprocesses: everything
+    else (creating virtualenvs, bootstrapping tools, reading lock files)
+    activates the environment by modifying `os.environ`, so it runs one
+    step at a time on a single worker thread.
+
+    Environments wait for their constraint environment and for the
+    environment owning a shared lock file when both are part of the run.
+    Each environment can be cancelled with `cancel` and gets its own timeout.
+    """
+
+    SUCCEEDED: ClassVar[str] = "succeeded"
+    FAILED: ClassVar[str] = "failed"
+    TIMED_OUT: ClassVar[str] = "timed out"
+    CANCELLED: ClassVar[str] = "cancelled"
+    SKIPPED: ClassVar[str] = "skipped"
+
+    def __init__(
+        self,
+        environments: Iterable[PipCompileEnvironment],
+        concurrency: int = 4,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Initialize the runner
+
+        Parameters
+        ----------
+        environments : Iterable[PipCompileEnvironment]
+            The environments to run
+        concurrency : int
+            The maximum number of environments running at once, defaults to 4
+        timeout : Optional[float]
+            The timeout of each environment in seconds, defaults to None
+        """
+        if concurrency < 1:
+            msg = f"[hatch-pip-compile] concurrency must be at least 1, got {concurrency}"
+            raise HatchPipCompileError(msg)
+        self.environments = {environment.name: environment for environment in environments}
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.tasks: dict[str, asyncio.Task[EnvironmentResult]] = {}
+        self._cancelled: set[str] = set()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def get_dependency_graph(self) -> dict[str, set[str]]:
+        """
+        Get the environments each environment has to wait for
+
+        An environment depends on its `pip-compile-constraint` environment,
+        and on the first environment (by name) writing the same lock file.
+        Edges that would close a cycle are dropped.
+        """
+        candidates: dict[str, set[str]] = {name: set() for name in self.environments}
+        lock_owners: dict[pathlib.Path, str] = {}
+        for name in sorted(self.environments):
+            environment = self.environments[name]
+            constraint = environment.config.get("pip-compile-constraint")
+            if constraint in self.environments and constraint != name:
+                candidates[name].add(constraint)
+            lock_owner = lock_owners.setdefault(environment.piptools_lock_file.resolve(), name)
+            if lock_owner != name:
+                candidates[name].add(lock_owner)
+        graph: dict[str, set[str]] = {name: set() for name in self.environments}
+        for name in sorted(candidates):
+            for dependency in sorted(candidates[name]):
+                if not self._depends_on(graph, dependency, name):
+                    graph[name].add(dependency)
+        return graph
+
+    @staticmethod
+    def _depends_on(graph: dict[str, set[str]], name: str, dependency: str) -> bool:
+        """
+        Whether an environment depends on another, directly or transitively
+        """
+        pending = [name]
+        seen: set[str] = set()
+        while pending:
+            current = pending.pop()
+            if current == dependency:
+                return True
+            elif current in seen:
+                continue
+            seen.add(current)
+            pending.extend(graph.get(current, ()))
+        return False
+
+    def cancel(self, environment: str) -> bool:
+        """
+        Cancel a single environment, its result is reported as cancelled
+
+        Returns
+        -------
+        bool
+            Whether the environment was still running
+        """
+        task = self.tasks.get(environment)
+        if task is None or task.done():
+            return False
+        self._cancelled.add(environment)
+        return task.cancel()
+
+    async def run_blocking(self, function: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        """
+        Run a blocking step on the worker thread, one step at a time
+
+        A cancelled step still runs to completion on the worker thread,
+        so the next step never overlaps with it.
+        """
+        if self._executor is None:
+            msg = "[hatch-pip-compile] The runner isn't running"
+            raise HatchPipCompileError(msg)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(function, *args, **kwargs)
+        )
+
+    @staticmethod
+    def get_command_environment(environment: PipCompileEnvironment) -> dict[str, str]:
+        """
+        Get the process environment the environment's commands run with
+        """
+        with environment.safe_activation():
+            return dict(os.environ)
+
+    async def run_command(
+        self, environment: PipCompileEnvironment, command: list[str], env: dict[str, str]
+    ) -> None:
+        """
+        Run a command as an asyncio subprocess
+
+        The command is traced as a `check_command` phase, the same as
+        `PipCompileEnvironment.plugin_check_command`, and killed when the
+        environment is cancelled or times out.
+        """
+        with environment.tracer.phase("check_command", argv=command) as record:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+                cwd=str(environment.root),
+            )
+            try:
+                _, stderr = await process.communicate()
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+            record["exit_code"] = process.returncode
+        if process.returncode:
+            msg = (
+                f"[hatch-pip-compile] Command failed with exit code {process.returncode} "
+                f"in the {environment.name} environment: {' '.join(command)}\n"
+                f"{stderr.decode('utf-8', errors='replace').strip()}"
+            )
+            raise HatchPipCompileError(msg)
+
+    @staticmethod
+    def _get_lock_hash(environment: PipCompileEnvironment) -> str | None:
+        """
+        Get the content hash of the lock file, None when there isn't one
+        """
+        if not environment.piptools_lock_file.exists():
+            return None
+        return environment.current_lock_hash()
+
+    def _prepare_lock(
+        self, environment: PipCompileEnvironment, tmp_path: pathlib.Path
+    ) -> _PendingLock:
+        """
+        Bootstrap the resolver and write its input, the same as `run_pip_compile`
+
+        The pending lock has no command when the lock file is up-to-date
+        or was written without running the resolver.
+        """
+        pending = _PendingLock(lock_hash=self._get_lock_hash(environment))
+        if not environment.virtualenv_exists() and not environment.resolver.venv_free:
+            environment.create()
+        if environment.lockfile_up_to_date:
+            return pending
+        with environment.safe_activation():
+            environment.resolver.install_pypi_dependencies()
+            if environment.piptools_lock_file.exists():
+                _ = environment.piptools_lock.compare_python_versions(
+                    verbose=environment.config.get("pip-compile-verbose", None)
+                )
+            if not environment.dependencies:
+                environment.pip_compile_cli()
+                return pending
+            pending.command = environment.prepare_pip_compile(tmp_path=tmp_path)
+            if pending.command is None:
+                pending.cache_hit = True
+                environment.finish_pip_compile(tmp_path=tmp_path, resolved=False)
+                return pending
+        pending.env = self.get_command_environment(environment)
+        return pending
+
+    async def lock(self, environment: PipCompileEnvironment) -> _LockOutcome:
+        """
+        Lock an environment without syncing it
+
+        The virtualenv is only created when the resolver needs it.
+        """
+        tmp_path = pathlib.Path(tempfile.mkdtemp(prefix="hatch-pip-compile-"))
+        try:
+            pending = await self.run_blocking(self._prepare_lock, environment, tmp_path)
+            if pending.command is not None and pending.env is not None:
+                await self.run_command(environment, pending.command, pending.env)
+                await self.run_blocking(
+                    environment.finish_pip_compile, tmp_path=tmp_path, resolved=True
+                )
+        finally:
+            # cleaned up on the worker thread, after a cancelled step finishes
+            await self.run_blocking(shutil.rmtree, tmp_path, ignore_errors=True)
+        lock_hash = await self.run_blocking(self._get_lock_hash, environment)
+        return _LockOutcome(
+            cache_hit=pending.cache_hit, lock_changed=lock_hash != pending.lock_hash
+        )
+
+    async def lock_only(self, environment: PipCompileEnvironment) -> _LockOutcome:
+        """
+        Lock an environment the same way as `run_pip_compile(lock_only=True)`
+
+        A virtualenv that's created for the resolver is removed afterwards.
+        """
+        environment.lock_only = True
+        created = False
+        if not environment.resolver.venv_free:
+            created = await self.run_blocking(self._create, environment)
+        try:
+            return await self.lock(environment)
+        finally:
+            if created:
+                await self.run_blocking(self._remove, environment)
+
+    def _prepare_install(
+        self, environment: PipCompileEnvironment
+    ) -> tuple[list[str] | None, dict[str, str] | None]:
+        """
+        Bootstrap the installer, cloning the dependencies when possible
+
+        Returns
+        -------
+        Tuple[Optional[List[str]], Optional[Dict[str, str]]]
+            The install command and its process environment, None when
+            the dependencies were cloned or installed on the worker thread.
+        """
+        if environment.clone_dependencies():
+            return None, None
+        installer = environment.installer
+        installer.clear_sync_marker()
+        installer.install_pypi_dependencies()
+        with environment.safe_activation():
+            installer.check_offline_artifacts()
+            command = installer.construct_install_command()
+        if command is None:
+            installer.install_dependencies()
+            return None, None
+        return command, self.get_command_environment(environment)
+
+    def _finish_install(self, environment: PipCompileEnvironment) -> None:
+        """
+        Record the synced lock file, the same as `sync_dependencies`
+        """
+        environment.installer.write_sync_marker()
+        venv_index_key = environment.venv_index_key
+        if venv_index_key is not None:
+            environment.venv_index.register(
+                venv_index_key, pathlib.Path(environment.virtual_env.directory)
+            )
+
+    def _prepare_project_install(
+        self, environment: PipCompileEnvironment
+    ) -> tuple[list[str], dict[str, str]]:
+        """
+        Bootstrap the installer for the project install command
+        """
+        environment.installer.install_pypi_dependencies()
+        command = environment.installer.construct_project_install_command(
+            dev_mode=environment.dev_mode
+        )
+        return command, self.get_command_environment(environment)
+
+    def _create(self, environment: PipCompileEnvironment) -> bool:
+        """
+        Create the virtualenv if it doesn't exist, returns whether it was created
+        """
+        if environment.virtualenv_exists():
+            return False
+        environment.create()
+        return True
+
+    def _remove(self, environment: PipCompileEnvironment) -> None:
+        """
+        Remove a virtualenv that was only created to lock the environment
+        """
+        environment.discard_virtualenv()
+
+    async def sync(self, environment: PipCompileEnvironment) -> _LockOutcome:
+        """
+        Lock an environment and sync its dependencies
+
+        Mirrors `prepare_environment` followed by hatch's sync check: the
+        virtualenv is created when it's missing, the dependencies are
+        synced when they're out of date and the project is installed into
+        new virtualenvs (and after `pip-sync`, which uninstalls it).
+        """
+        created = await self.run_blocking(self._create, environment)
+        outcome = await self.lock(environment)
+        synced = False
+        if not await self.run_blocking(environment.dependencies_in_sync):
+            command, env = await self.run_blocking(self._prepare_install, environment)
+            if command is not None and env is not None:
+                await self.run_command(environment, command, env)
+            await self.run_blocking(self._finish_install, environment)
+            synced = True
+        reinstall_project = synced and environment.installer.sync_uninstalls_project
+        if not environment.skip_install and (created or reinstall_project):
+            project_command, project_env = await self.run_blocking(
+                self._prepare_project_install, environment
+            )
+            await self.run_command(environment, project_command, project_env)
+        return outcome
+
+    async def _run_environment(
+        self,
+        name: str,
+        operation: Callable[[PipCompileEnvironment], Awaitable[_LockOutcome]],
+        dependencies: set[str],
+    ) -> EnvironmentResult:
+        """
+        Run an operation on an environment once its dependencies succeeded
+        """
+        start = time.perf_counter()
+        try:
+            for dependency in sorted(dependencies):
+                dependency_task = self.tasks[dependency]
+                await asyncio.wait({dependency_task})
+                if dependency_task.cancelled():
+                    dependency_status = self.CANCELLED
+                else:
+                    dependency_status = dependency_task.result().status
+                if dependency_status != self.SUCCEEDED:
+                    return EnvironmentResult(
+                        environment=name,
+                        status=self.SKIPPED,
+                        error=f"{dependency} {dependency_status}",
+                    )
+            if self._semaphore is None:
+                msg = "[hatch-pip-compile] The runner isn't running"
+                raise RuntimeError(msg)
+            async with self._semaphore:
+                start = time.perf_counter()
+                outcome = await asyncio.wait_for(
+                    operation(self.environments[name]), timeout=self.timeout
+                )
+        except asyncio.TimeoutError:
+            return EnvironmentResult(
+                environment=name,
+                status=self.TIMED_OUT,
+                duration=time.perf_counter() - start,
+                error=f"timed out after {self.timeout} seconds",
+            )
+        except asyncio.CancelledError:
+            if name not in self._cancelled:
+                raise
+            return EnvironmentResult(
+                environment=name,
+                status=self.CANCELLED,
+                duration=time.perf_counter() - start,
+            )
+        except (Exception, SystemExit) as e:
+            return EnvironmentResult(
+                environment=name,
+                status=self.FAILED,
+                duration=time.perf_counter() - start,
+                error=str(e) or repr(e),
+            )
+        return EnvironmentResult(
+            environment=name,
+            status=self.SUCCEEDED,
+            duration=time.perf_counter() - start,
+            cache_hit=outcome.cache_hit,
+            lock_changed=outcome.lock_changed,
+        )
+
+    async def run(
+        self, operation: Callable[[PipCompileEnvironment], Awaitable[_LockOutcome]]
+    ) -> dict[str, EnvironmentResult]:
+        """
+        Run an operation (`lock_only` or `sync`) on every environment
+
+        Returns
+        -------
+        Dict[str, EnvironmentResult]
+            The result of each environment, keyed by environment name
+        """
+        graph = self.get_dependency_graph()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            for name in sorted(self.environments):
+                self.tasks[name] = asyncio.ensure_future(
+                    self._run_environment(name, operation, graph[name])
+                )
+            if self.tasks:
+                await asyncio.wait(self.tasks.values())
+        finally:
+            for task in self.tasks.values():
+                task.cancel()
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self._executor.shutdown, wait=True)
+            )
+            self._executor = None
+        results: dict[str, EnvironmentResult] = {}
+        for name, task in self.tasks.items():
+            if task.cancelled():
+                results[name] = EnvironmentResult(environment=name, status=self.CANCELLED)
+            elif task.exception() is not None:
+                results[name] = EnvironmentResult(
+                    environment=name, status=self.FAILED, error=repr(task.exception())
+                )
+            else:
+                results[name] = task.result()
+        return results
+
+
+def _load_environments(
+    environments: Iterable[str], root: os.PathLike | str | None
+) -> tuple[Project, list[PipCompileEnvironment]]:
+    """
+    Load the environments of a project
+    """
+    application = load_application(root=root)
+    loaded = [
+        get_environment(application=application, environment_name=environment_name)
+        for environment_name in environments
+    ]
+    return application.project, loaded
+
+
+async def _run_many(
+    environments: Iterable[str],
+    operation_name: str,
+    concurrency: int,
+    timeout: float | None,
+    root: os.PathLike | str | None,
+    runner_callback: Callable[[AsyncEnvironmentRunner], None] | None,
+) -> dict[str, EnvironmentResult]:
+    """
+    Load a project's environments and run them through an `AsyncEnvironmentRunner`
+    """
+    project, loaded = _load_environments(environments=environments, root=root)
+    runner = AsyncEnvironmentRunner(environments=loaded, concurrency=concurrency, timeout=timeout)
+    if runner_callback is not None:
+        runner_callback(runner)
+    with project.ensure_cwd():
+        return await runner.run(getattr(runner, operation_name))
+
+
+async def lock_many(
+    environments: Iterable[str],
+    concurrency: int = 4,
+    timeout: float | None = None,
+    root: os.PathLike | str | None = None,
+    runner_callback: Callable[[AsyncEnvironmentRunner], None] | None = None,
+) -> dict[str, EnvironmentResult]:
+    """
+    Lock many environments concurrently, without syncing them
+
+    Parameters
+    ----------
+    environments : Iterable[str]
+        The names of the environments to lock
+    concurrency : int
+        The maximum number of resolvers running at once, defaults to 4
+    timeout : Optional[float]
+        The timeout of each environment in seconds, defaults to None
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+    runner_callback : Optional[Callable[[AsyncEnvironmentRunner], None]]
+        Called with the runner before it starts, e.g. to keep it around
+        for `AsyncEnvironmentRunner.cancel`
+
+    Returns
+    -------
+    Dict[str, EnvironmentResult]
+        The result of each environment, keyed by environment name
+    """
+    return await _run_many(
+        environments=environments,
+        operation_name="lock_only",
+        concurrency=concurrency,
+        timeout=timeout,
+        root=root,
+        runner_callback=runner_callback,
+    )
+
+
+async def sync_many(
+    environments: Iterable[str],
+    concurrency: int = 4,
+    timeout: float | None = None,
+    root: os.PathLike | str | None = None,
+    runner_callback: Callable[[AsyncEnvironmentRunner], None] | None = None,
+) -> dict[str, EnvironmentResult]:
+    """
+    Lock and sync many environments concurrently
+
+    Virtualenvs are created when they're missing, their dependencies are
+    synced and the project is installed into them. Unlike `hatch env create`,
+    `pre-install-commands` and `post-install-commands` aren't run and hatch's
+    environment metadata isn't updated, so `hatch` checks the dependencies
+    again the next time it uses an environment.
+
+    Parameters
+    ----------
+    environments : Iterable[str]
+        The names of the environments to sync
+    concurrency : int
+        The maximum number of environments syncing at once, defaults to 4
+    timeout : Optional[float]
+        The timeout of each environment in seconds, defaults to None
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+    runner_callback : Optional[Callable[[AsyncEnvironmentRunner], None]]
+        Called with the runner before it starts, e.g. to keep it around
+        for `AsyncEnvironmentRunner.cancel`
+
+    Returns
+    -------
+    Dict[str, EnvironmentResult]
+        The result of each environment, keyed by environment name
+    """
+    return await _run_many(
+        environments=environments,
+        operation_name="sync",
+        concurrency=concurrency,
+        timeout=timeout,
+        root=root,
+        runner_callback=runner_callback,
+    )
@@ -0,0 +1,315 @@
+"""
+hatch-pip-compile programmatic API
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import pathlib
+from typing import Any, Iterable, NoReturn
+
+from hatch.cli.application import Application
+from hatch.config.constants import ConfigEnvVars
+from hatch.config.model import RootConfig
+from hatch.project.core import Project
+from hatch.utils.fs import Path
+
+from hatch_pip_compile.discovery import EnvironmentDiscovery
+from hatch_pip_compile.exceptions import HatchPipCompileError
+from hatch_pip_compile.plugin import PipCompileEnvironment
+from hatch_pip_compile.snapshot import SnapshotStore
+
+
+def _exit(code: int = 1) -> NoReturn:
+    """
+    Raise instead of exiting when hatch aborts
+    """
+    msg = f"hatch exited with code {code}"
+    raise HatchPipCompileError(msg)
+
+
+def load_application(root: os.PathLike | str | None = None, verbosity: int = 0) -> Application:
+    """
+    Load a hatch `Application` for a project the same way the `hatch` CLI does
+
+    Parameters
+    ----------
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+    verbosity : int
+        The hatch verbosity, defaults to 0
+    """
+    application = Application(
+        exit_func=_exit,
+        verbosity=verbosity,
+        interactive=False,
+        enable_color=False,
+    )
+    if application.config_file.path.is_file():
+        application.config_file.load()
+    else:
+        application.config_file.model = RootConfig({})
+    application.data_dir = Path(
+        os.getenv(ConfigEnvVars.DATA) or application.config.dirs.data
+    ).expand()
+    application.cache_dir = Path(
+        os.getenv(ConfigEnvVars.CACHE) or application.config.dirs.cache
+    ).expand()
+    application.project = Project(Path(root or Path.cwd()).resolve())
+    return application
+
+
+def get_environment(application: Application, environment_name: str) -> PipCompileEnvironment:
+    """
+    Get a `pip-compile` environment from a hatch `Application`
+    """
+    environment = application.get_environment(env_name=environment_name)
+    if not isinstance(environment, PipCompileEnvironment):
+        msg = (
+            f"[hatch-pip-compile] The environment {environment_name} "
+            "is not a pip-compile environment."
+        )
+        raise HatchPipCompileError(msg)
+    return environment
+
+
+def get_environments(application: Application) -> list[PipCompileEnvironment]:
+    """
+    Get every `pip-compile` environment of a project, with matrices expanded
+    """
+    return [
+        get_environment(application=application, environment_name=environment_name)
+        for environment_name in sorted(get_environment_configs(application))
+    ]
+
+
+def get_environment_configs(application: Application) -> dict[str, dict[str, Any]]:
+    """
+    Get the configuration of a project's `pip-compile` environments, in-process
+
+    Matrices are expanded the same way as `hatch env show --json`,
+    without building any environment.
+    """
+    return {
+        environment_name: config
+        for environment_name, config in application.project.config.envs.items()
+        if config.get("type") == "pip-compile"
+    }
+
+
+def discover_environment_configs(
+    root: os.PathLike | str | None = None,
+) -> dict[str, dict[str, Any]]:
+    """
+    Get the `pip-compile` environments of a project, cached on disk
+
+    The environments are enumerated in-process with `get_environment_configs`
+    and only the options needed to order them are kept: `type`,
+    `pip-compile-constraint` and `pip-compile-universal`. The result is cached
+    in the hatch data directory until the project's `pyproject.toml` or
+    `hatch.toml`, the hatch configuration file, or an environment variable
+    used by `overrides` changes. Projects with environment collector plugins
+    are enumerated every time, since their environments can come from any file.
+
+    Parameters
+    ----------
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        The environment configurations, keyed by environment name
+    """
+    application = load_application(root=root)
+    if not EnvironmentDiscovery.is_cacheable(application.project.config.env_collectors):
+        return EnvironmentDiscovery.summarize(get_environment_configs(application))
+    discovery = EnvironmentDiscovery.from_data_directory(
+        pathlib.Path(application.data_dir) / "env" / PipCompileEnvironment.PLUGIN_NAME
+    )
+    project_root = pathlib.Path(application.project.location)
+    key = discovery.get_key(
+        root=project_root, user_config_file=pathlib.Path(application.config_file.path)
+    )
+    environment_configs = discovery.get(root=project_root, key=key)
+    if environment_configs is None:
+        environment_configs = EnvironmentDiscovery.summarize(get_environment_configs(application))
+        variables = EnvironmentDiscovery.get_override_variables(
+            application.project.config.config.get("envs", {})
+        )
+        discovery.set(
+            root=project_root,
+            key=key,
+            environments=environment_configs,
+            variables=variables,
+        )
+    return environment_configs
+
+
+def check_lock_files(
+    environment_names: Iterable[str] | None = None,
+    root: os.PathLike | str | None = None,
+    jobs: int = 8,
+) -> dict[str, list[str]]:
+    """
+    Check whether the lock files of many environments are up-to-date
+
+    Nothing is locked or installed: no virtualenv is created and no
+    resolver runs, the lock file headers are compared with the environments'
+    dependencies and constraint lock files. See
+    `PipCompileEnvironment.check_lock_file`.
+
+    Parameters
+    ----------
+    environment_names : Optional[Iterable[str]]
+        The environments to check, defaults to every `pip-compile` environment
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+    jobs : int
+        The number of lock files read concurrently, defaults to 8
+
+    Returns
+    -------
+    Dict[str, List[str]]
+        The reasons each lock file is out of date, keyed by environment
+        name. Up-to-date lock files have no reasons.
+    """
+    application = load_application(root=root)
+    if environment_names is None:
+        environment_names = sorted(get_environment_configs(application))
+    environments = [
+        get_environment(application=application, environment_name=environment_name)
+        for environment_name in environment_names
+    ]
+    with application.project.location.as_cwd(), concurrent.futures.ThreadPoolExecutor(
+        max_workers=jobs
+    ) as executor:
+        # the project metadata is loaded once, up front, instead of racing in the threads
+        for environment in environments:
+            _ = environment.dependencies_complex
+        problems = executor.map(lambda environment: environment.check_lock_file(), environments)
+        return {
+            environment.name: environment_problems
+            for environment, environment_problems in zip(environments, problems)
+        }
+
+
+def lock_environment(environment_name: str, root: os.PathLike | str | None = None) -> None:
+    """
+    Lock an environment without syncing its dependencies or installing the project
+
+    Only the resolver is bootstrapped before `pip-compile` runs and the
+    lockfile is post-processed, the same as a regular lock.
+
+    Parameters
+    ----------
+    environment_name : str
+        The name of the environment to lock
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+    """
+    application = load_application(root=root)
+    environment = get_environment(application=application, environment_name=environment_name)
+    with application.project.location.as_cwd():
+        environment.run_pip_compile(lock_only=True)
+
+
+def get_snapshot_store(
+    environment: PipCompileEnvironment, directory: os.PathLike | str | None = None
+) -> SnapshotStore:
+    """
+    Get the snapshot store in a directory, defaulting to the hatch data directory
+    """
+    if directory is None:
+        return SnapshotStore.from_data_directory(environment.isolated_data_directory)
+    return SnapshotStore(directory=pathlib.Path(directory).absolute())
+
+
+def save_snapshot(
+    environment_name: str,
+    directory: os.PathLike | str | None = None,
+    root: os.PathLike | str | None = None,
+) -> pathlib.Path:
+    """
+    Save a snapshot of an environment's installed dependencies
+
+    The environment is prepared first if it doesn't exist, and its
+    dependencies must be in sync with an up-to-date lock file.
+
+    Parameters
+    ----------
+    environment_name : str
+        The name of the environment to snapshot
+    directory : Optional[os.PathLike]
+        The snapshot directory, defaults to the hatch data directory
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+
+    Returns
+    -------
+    pathlib.Path
+        The path of the snapshot
+    """
+    application = load_application(root=root)
+    environment = get_environment(application=application, environment_name=environment_name)
+    snapshot_store = get_snapshot_store(environment=environment, directory=directory)
+    with application.project.location.as_cwd():
+        environment.prepare_environment()
+        if not environment.dependencies_in_sync():
+            msg = (
+                f"[hatch-pip-compile] The {environment_name} environment isn't in sync "
+                "with its lock file."
+            )
+            raise HatchPipCompileError(msg)
+        return snapshot_store.save(environment)
+
+
+def restore_snapshot(
+    environment_name: str,
+    directory: os.PathLike | str | None = None,
+    root: os.PathLike | str | None = None,
+) -> bool:
+    """
+    Create an environment from a snapshot of its installed dependencies
+
+    The virtualenv is created and the snapshot matching its interpreter and
+    lock file is unpacked into it. When there is no snapshot, or the restored
+    dependencies aren't in sync, the dependencies are installed as usual.
+    The project is installed afterwards. Existing environments are left alone.
+
+    Parameters
+    ----------
+    environment_name : str
+        The name of the environment to restore
+    directory : Optional[os.PathLike]
+        The snapshot directory, defaults to the hatch data directory
+    root : Optional[os.PathLike]
+        The project directory, defaults to the current working directory
+
+    Returns
+    -------
+    bool
+        Whether the environment was restored from a snapshot
+    """
+    application = load_application(root=root)
+    environment = get_environment(application=application, environment_name=environment_name)
+    snapshot_store = get_snapshot_store(environment=environment, directory=directory)
+    with application.project.location.as_cwd():
+        if environment.virtualenv_exists():
+            return False
+        environment.create()
+        restored = False
+        if environment.lockfile_up_to_date and environment.piptools_lock_file.exists():
+            restored = snapshot_store.restore(environment)
+        if restored and environment.installed_dependencies_in_sync():
+            environment.installer.write_sync_marker()
+        else:
+            restored = False
+            environment.sync_dependencies()
+        if not environment.skip_install:
+            if environment.dev_mode:
+                environment.install_project_dev_mode()
+            else:
+                environment.install_project()
+    return restored
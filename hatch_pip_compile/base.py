@@ -4,21 +4,64 @@ Base classes for hatch-pip-compile
 
 from __future__ import annotations
 
+import functools
+import os
+import shutil
+import sys
+import sysconfig
 from typing import TYPE_CHECKING, ClassVar
 
 from hatchling.dep.core import dependencies_in_sync
 from packaging.requirements import Requirement
 
+from hatch_pip_compile.exceptions import HatchPipCompileError
+from hatch_pip_compile.toolchain import ToolchainEnvironment
+from hatch_pip_compile.trace import traced
+
 if TYPE_CHECKING:
     from hatch_pip_compile.plugin import PipCompileEnvironment
 
 
+_uv_binaries: dict[tuple[str | None, str | None, str | None], str] = {}
+
+
+def find_uv_binary(
+    configured_path: str | None = None,
+    search_path: str | None = None,
+    scripts_directory: str | None = None,
+) -> str | None:
+    """
+    Find the `uv` binary
+
+    In order: the configured path, `uv` on the search path and the binary
+    the `uv` wheel installs into `scripts_directory`. Binaries that are found
+    are cached for the rest of the process, misses are looked up again since
+    `uv` may be installed into `scripts_directory` later on.
+    """
+    cache_key = (configured_path, search_path, scripts_directory)
+    if cache_key in _uv_binaries:
+        return _uv_binaries[cache_key]
+    if configured_path:
+        uv_binary = shutil.which(configured_path)
+        if uv_binary is None:
+            msg = f"[hatch-pip-compile] The configured uv binary doesn't exist: {configured_path}"
+            raise HatchPipCompileError(msg)
+    else:
+        uv_binary = shutil.which("uv", path=search_path)
+        if uv_binary is None and scripts_directory is not None:
+            uv_binary = shutil.which("uv", path=scripts_directory)
+    if uv_binary is not None:
+        _uv_binaries[cache_key] = uv_binary
+    return uv_binary
+
+
 class HatchPipCompileBase:
     """
     Base Class for hatch-pip-compile tools
     """
 
     pypi_dependencies: ClassVar[list[str]] = []
+    offline_flags: ClassVar[list[str]] = ["--no-index"]
 
     def __init__(self, environment: PipCompileEnvironment) -> None:
         """
@@ -27,13 +70,26 @@ class HatchPipCompileBase:
         self.environment = environment
         self.pypi_dependencies_installed = False
 
+    @traced("install_pypi_dependencies")
     def install_pypi_dependencies(self) -> None:
         """
         Install the resolver from PyPI
+
+        When the environment uses a shared toolchain the tools are installed
+        there, once per interpreter, instead of into the environment. In
+        offline mode the tools are installed from the wheelhouse.
         """
         if not self.pypi_dependencies:
             return
-        elif self.pypi_dependencies_installed:
+        elif self.pypi_dependencies_installed or self.venv_free:
+            return
+        elif set(self.pypi_dependencies) == {"uv"} and self.uv_binary is not None:
+            self.pypi_dependencies_installed = True
+            return
+        pip_offline_args = self.get_offline_args(flags=HatchPipCompileBase.offline_flags)
+        if self.toolchain is not None:
+            self.toolchain.ensure(install_args=pip_offline_args)
+            self.pypi_dependencies_installed = True
             return
         with self.environment.safe_activation():
             in_sync = dependencies_in_sync(
@@ -43,6 +99,103 @@ class HatchPipCompileBase:
             )
             if not in_sync:
                 self.environment.plugin_check_command(
-                    self.environment.construct_pip_install_command(self.pypi_dependencies)
+                    self.environment.construct_pip_install_command(
+                        [*pip_offline_args, *self.pypi_dependencies]
+                    )
                 )
             self.pypi_dependencies_installed = True
+
+    def get_offline_args(self, flags: list[str]) -> list[str]:
+        """
+        Get the arguments that keep a tool off the network in offline mode
+
+        The given flags, plus the shared wheelhouse as `--find-links`
+        when it exists. Empty unless offline mode is enabled.
+        """
+        if not self.environment.offline:
+            return []
+        args = list(flags)
+        wheelhouse_directory = self.environment.wheelhouse.directory
+        if wheelhouse_directory.is_dir():
+            args.extend(["--find-links", str(wheelhouse_directory)])
+        return args
+
+    @property
+    def offline_args(self) -> list[str]:
+        """
+        The offline arguments for this tool, see `get_offline_args`
+        """
+        return self.get_offline_args(flags=self.offline_flags)
+
+    @property
+    def toolchain(self) -> ToolchainEnvironment | None:
+        """
+        The shared toolchain environment, if one is used
+
+        Toolchains are used with `pip-compile-shared-toolchain`, and always
+        in lock-only mode so the tools aren't installed into the environment.
+        """
+        if not self.pypi_dependencies or self.venv_free:
+            return None
+        elif (
+            self.environment.config.get("pip-compile-shared-toolchain", False) is not True
+            and not self.environment.lock_only
+        ):
+            return None
+        return self.shared_toolchain
+
+    @functools.cached_property
+    def shared_toolchain(self) -> ToolchainEnvironment:
+        """
+        The toolchain environment matching the environment's interpreter
+        """
+        return ToolchainEnvironment.from_environment(
+            environment=self.environment, dependencies=self.pypi_dependencies
+        )
+
+    @property
+    def venv_free(self) -> bool:
+        """
+        Whether the tool runs from the plugin's own interpreter without the virtualenv
+        """
+        return False
+
+    @property
+    def tool_python_executable(self) -> str:
+        """
+        The Python executable the tools are run with
+        """
+        if self.toolchain is not None:
+            return self.toolchain.python_executable
+        return self.environment.virtual_env.python_info.executable
+
+    @property
+    def uv_binary(self) -> str | None:
+        """
+        The `uv` binary to call directly, if one can be found
+
+        See `find_uv_binary`, the binary is configured with `pip-compile-uv-path`.
+        """
+        if self.toolchain is not None:
+            scripts_directory = os.path.dirname(self.toolchain.python_executable)
+        elif not self.venv_free and self.environment.virtualenv_exists():
+            scripts_directory = str(self.environment.virtual_env.executables_directory)
+        else:
+            scripts_directory = sysconfig.get_path("scripts")
+        return find_uv_binary(
+            configured_path=self.environment.config.get("pip-compile-uv-path"),
+            search_path=os.environ.get("PATH"),
+            scripts_directory=scripts_directory,
+        )
+
+    @property
+    def uv_command(self) -> list[str]:
+        """
+        The command used to run `uv`, falling back to `python -m uv`
+        """
+        uv_binary = self.uv_binary
+        if uv_binary is not None:
+            return [uv_binary]
+        elif self.venv_free:
+            return [sys.executable, "-m", "uv"]
+        return [self.tool_python_executable, "-m", "uv"]
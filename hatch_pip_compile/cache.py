@@ -0,0 +1,153 @@
+"""
+hatch-pip-compile resolution cache
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import tempfile
+from typing import Any, ClassVar
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheEntry:
+    """
+    A single cached resolution
+    """
+
+    key: str
+    path: pathlib.Path
+    size: int
+    last_used: float
+
+
+class ResolutionCache:
+    """
+    Content-addressed cache of resolver output
+
+    Each entry is the raw output of a resolver run, stored under the
+    SHA256 of everything that went into the resolution. Entries are
+    evicted least-recently-used first once the cache grows past `max_size`.
+    """
+
+    default_max_size: ClassVar[int] = 64 * 1024 * 1024
+    suffix: ClassVar[str] = ".txt"
+
+    def __init__(self, directory: pathlib.Path, max_size: int | None = None) -> None:
+        """
+        Initialize the cache in a given directory
+        """
+        self.directory = directory
+        if max_size is None:
+            max_size = int(os.getenv("PIP_COMPILE_CACHE_MAX_SIZE") or self.default_max_size)
+        self.max_size = max_size
+
+    @classmethod
+    def from_data_directory(cls, data_directory: pathlib.Path) -> ResolutionCache:
+        """
+        Get the cache stored under the plugin's hatch data directory
+        """
+        return cls(directory=data_directory / ".pip-compile" / "resolutions")
+
+    @staticmethod
+    def get_key(inputs: dict[str, Any]) -> str:
+        """
+        Get the cache key for a set of resolver inputs
+        """
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def _get_path(self, key: str) -> pathlib.Path:
+        """
+        Get the path of a cache entry
+        """
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> str | None:
+        """
+        Get the cached resolver output for a key, marking it as recently used
+        """
+        entry_path = self._get_path(key)
+        try:
+            output = entry_path.read_text()
+            os.utime(entry_path)
+        except OSError:
+            return None
+        logger.debug("[hatch-pip-compile] Resolution cache hit: %s", key)
+        return output
+
+    def set(self, key: str, output: str) -> None:
+        """
+        Store resolver output for a key and evict old entries
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=f".{key}.", suffix=".tmp"
+            )
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                temp_file.write(output)
+            os.replace(temp_path, self._get_path(key))
+        except OSError:
+            logger.debug("[hatch-pip-compile] Unable to write resolution cache entry: %s", key)
+            return
+        self.evict()
+
+    def entries(self) -> list[CacheEntry]:
+        """
+        List the cache entries, most recently used first
+        """
+        cache_entries = []
+        for entry_path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat_result = entry_path.stat()
+            except OSError:
+                continue
+            cache_entries.append(
+                CacheEntry(
+                    key=entry_path.name[: -len(self.suffix)],
+                    path=entry_path,
+                    size=stat_result.st_size,
+                    last_used=stat_result.st_mtime,
+                )
+            )
+        return sorted(cache_entries, key=lambda entry: entry.last_used, reverse=True)
+
+    def evict(self) -> int:
+        """
+        Evict least-recently-used entries until the cache fits in `max_size`
+
+        Returns
+        -------
+        int
+            The number of evicted entries
+        """
+        cache_entries = self.entries()
+        total_size = sum(entry.size for entry in cache_entries)
+        evicted = 0
+        while cache_entries and total_size > self.max_size:
+            entry = cache_entries.pop()
+            entry.path.unlink(missing_ok=True)
+            total_size -= entry.size
+            evicted += 1
+        return evicted
+
+    def clear(self) -> int:
+        """
+        Remove every entry from the cache
+
+        Returns
+        -------
+        int
+            The number of removed entries
+        """
+        cache_entries = self.entries()
+        for entry in cache_entries:
+            entry.path.unlink(missing_ok=True)
+        return len(cache_entries)
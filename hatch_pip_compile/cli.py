@@ -4,16 +4,34 @@ hatch-pip-compile CLI
 
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
 import dataclasses
-import json
 import os
+import pathlib
 import subprocess
+import sys
 from typing import Any, Sequence
 
 import click
 import rich.traceback
 
 from hatch_pip_compile.__about__ import __application__, __version__
+from hatch_pip_compile.aio import EnvironmentResult
+from hatch_pip_compile.api import (
+    check_lock_files,
+    discover_environment_configs,
+    get_environment,
+    get_environments,
+    load_application,
+    lock_environment,
+    restore_snapshot,
+    save_snapshot,
+)
+from hatch_pip_compile.cache import ResolutionCache
+from hatch_pip_compile.exceptions import HatchPipCompileError
+from hatch_pip_compile.watch import LockWatcher
+from hatch_pip_compile.wheelhouse import Wheelhouse, WheelhouseTarget, read_locked_artifacts
 
 
 @dataclasses.dataclass
@@ -26,10 +44,14 @@ class HatchCommandRunner:
     upgrade: bool = False
     upgrade_all: bool = False
     upgrade_packages: Sequence[str] = dataclasses.field(default_factory=list)
+    jobs: int = 1
+    lock_only: bool = False
 
-    former_env_vars: dict[str, Any] = dataclasses.field(init=False, default_factory=dict)
+    env_vars: dict[str, str] = dataclasses.field(init=False, default_factory=dict)
     console: rich.console.Console = dataclasses.field(init=False)
+    environment_configs: dict[str, dict[str, Any]] = dataclasses.field(init=False)
     supported_environments: set[str] = dataclasses.field(init=False)
+    shared_lock_environments: dict[str, str] = dataclasses.field(init=False, default_factory=dict)
 
     def __post_init__(self):
         """
@@ -37,7 +59,8 @@ class HatchCommandRunner:
         """
         self.console = rich.console.Console()
         rich.traceback.install(show_locals=True, console=self.console)
-        self.supported_environments = self._get_supported_environments()
+        self.environment_configs = self._get_environment_configs()
+        self.supported_environments = set(self.environment_configs.keys())
         if all(
             [not self.environments, "default" in self.supported_environments, not self.upgrade_all]
         ):
@@ -58,42 +81,91 @@ class HatchCommandRunner:
 
     def __enter__(self) -> HatchCommandRunner:
         """
-        Set the environment variables
+        Prepare the environment variables passed to every `hatch` command
         """
-        env_vars = {"__PIP_COMPILE_FORCE__": "1"}
+        self.env_vars = {"__PIP_COMPILE_FORCE__": "1"}
         if self.upgrade:
-            env_vars["PIP_COMPILE_UPGRADE"] = "1"
+            self.env_vars["PIP_COMPILE_UPGRADE"] = "1"
             self.console.print(
                 "[bold green]hatch-pip-compile[/bold green]: Upgrading all dependencies"
             )
         elif self.upgrade_packages:
-            env_vars["PIP_COMPILE_UPGRADE_PACKAGE"] = ",".join(self.upgrade_packages)
+            self.env_vars["PIP_COMPILE_UPGRADE_PACKAGE"] = ",".join(self.upgrade_packages)
             message = (
                 "[bold green]hatch-pip-compile[/bold green]: "
                 f"Upgrading packages: {', '.join(self.upgrade_packages)}"
             )
             self.console.print(message)
-        self.former_env_vars = {
-            key: os.environ.get(key) for key in env_vars.keys() if os.environ.get(key) is not None
-        }
-        os.environ.update(env_vars)
         return self
 
     def __exit__(self, *args, **kwargs):
         """
-        Restore the environment variables
+        Clear the environment variables
         """
-        os.environ.update(self.former_env_vars)
+        self.env_vars = {}
 
-    def hatch_cli(self):
+    def get_constraint_graph(self) -> dict[str, str]:
         """
-        Run the `hatch` CLI
+        Map each targeted environment to the targeted environment it is constrained by
+
+        Environments without a `pip-compile-constraint`, or whose constraint
+        environment isn't being locked in this run, are left out.
         """
-        self.console.print(
-            "[bold green]hatch-pip-compile[/bold green]: Targeting environments: "
-            f"{', '.join(sorted(self.environments))}"
+        constraint_graph = {}
+        for environment in self.environments:
+            if environment in self.shared_lock_environments:
+                continue
+            constraint = self.environment_configs[environment].get("pip-compile-constraint")
+            if not constraint:
+                continue
+            constraint = self.shared_lock_environments.get(constraint, constraint)
+            if constraint != environment and constraint in self.environments:
+                constraint_graph[environment] = constraint
+        return constraint_graph
+
+    def get_shared_lock_environments(self) -> dict[str, str]:
+        """
+        Map targeted universal environments to the environment that locks their lockfile
+
+        The entries of a matrix with `pip-compile-universal` share a single
+        lockfile, which only needs to be locked by one of them.
+        """
+        universal_environments = sorted(
+            environment
+            for environment in self.environments
+            if self.environment_configs[environment].get("pip-compile-universal") is True
         )
-        for environment in sorted(self.environments):
+        if len(universal_environments) <= 1:
+            return {}
+        application = load_application()
+        lock_owners: dict[pathlib.Path, str] = {}
+        shared_lock_environments = {}
+        for environment in universal_environments:
+            lock_file = get_environment(
+                application=application, environment_name=environment
+            ).piptools_lock_file
+            owner = lock_owners.setdefault(lock_file, environment)
+            if owner != environment:
+                shared_lock_environments[environment] = owner
+        return shared_lock_environments
+
+    def run_environment(self, environment: str) -> subprocess.CompletedProcess:
+        """
+        Lock a single environment in a subprocess, buffering its output
+
+        By default the environment is locked with `hatch env run`, in lock-only
+        mode the `lock-environment` command is used instead, which doesn't sync
+        dependencies or install the project.
+        """
+        if self.lock_only:
+            environment_command = [
+                sys.executable,
+                "-m",
+                "hatch_pip_compile",
+                "lock-environment",
+                environment,
+            ]
+        else:
             environment_command = [
                 "hatch",
                 "env",
@@ -104,49 +176,198 @@ class HatchCommandRunner:
                 "python",
                 "--version",
             ]
+        self.console.print(
+            f"[bold green]hatch-pip-compile[/bold green]: Running "
+            f"`[bold blue]{' '.join(environment_command)}`[/bold blue]"
+        )
+        return subprocess.run(
+            args=environment_command,
+            capture_output=True,
+            check=False,
+            env={**os.environ, **self.env_vars},
+        )
+
+    def hatch_cli(self):
+        """
+        Run the `hatch` CLI
+
+        Constraint environments are locked before the environments that
+        depend on them, independent environments are locked concurrently
+        (up to `jobs` at a time). When an environment fails to lock its
+        dependents are skipped. Environments sharing a universal lockfile
+        are locked once.
+        """
+        self.console.print(
+            "[bold green]hatch-pip-compile[/bold green]: Targeting environments: "
+            f"{', '.join(sorted(self.environments))}"
+        )
+        self.shared_lock_environments = self.get_shared_lock_environments()
+        for environment, owner in sorted(self.shared_lock_environments.items()):
             self.console.print(
-                f"[bold green]hatch-pip-compile[/bold green]: Running "
-                f"`[bold blue]{' '.join(environment_command)}`[/bold blue]"
+                f"[bold green]hatch-pip-compile[/bold green]: {environment} shares "
+                f"its universal lockfile with {owner}"
             )
-            result = subprocess.run(
-                args=environment_command,
-                capture_output=True,
-                check=False,
+        constraint_graph = self.get_constraint_graph()
+        pending = sorted(set(self.environments).difference(self.shared_lock_environments))
+        completed: set[str] = set()
+        failed: set[str] = set()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            running: dict[concurrent.futures.Future, str] = {}
+            while pending or running:
+                skipped = [env for env in pending if constraint_graph.get(env) in failed]
+                while skipped:
+                    for environment in skipped:
+                        pending.remove(environment)
+                        failed.add(environment)
+                        self.console.print(
+                            f"[bold red]hatch-pip-compile[/bold red]: Skipping {environment}, "
+                            f"its constraint environment {constraint_graph[environment]} failed"
+                        )
+                    skipped = [env for env in pending if constraint_graph.get(env) in failed]
+                ready = [
+                    env
+                    for env in pending
+                    if constraint_graph.get(env) is None or constraint_graph[env] in completed
+                ]
+                if pending and not ready and not running:
+                    # constraint cycle - nothing will unblock these, run them in order
+                    ready = pending[:1]
+                for environment in ready[: self.jobs - len(running)]:
+                    pending.remove(environment)
+                    running[executor.submit(self.run_environment, environment)] = environment
+                if not running:
+                    continue
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    environment = running.pop(future)
+                    result = future.result()
+                    if result.returncode == 0:
+                        completed.add(environment)
+                        continue
+                    failed.add(environment)
+                    self.console.print(
+                        "[bold yellow]hatch command[/bold yellow]: "
+                        f"[bold blue]`{' '.join(result.args)}`[/bold blue]"
+                    )
+                    self.console.print(result.stdout.decode("utf-8"))
+                    self.console.print(result.stderr.decode("utf-8"))
+        if failed:
+            self.console.print(
+                "[bold red]hatch-pip-compile[/bold red]: Error running hatch command for: "
+                f"{', '.join(sorted(failed))}"
             )
-            if result.returncode != 0:  # pragma: no cover
+            raise click.exceptions.Exit(1)
+
+    def watch_cli(self) -> None:
+        """
+        Keep the environments locked until interrupted
+
+        The environments are locked in-process, then only the environments
+        whose lock inputs change (and the environments constrained by them)
+        are relocked, up to `jobs` at a time.
+        """
+        self.console.print(
+            "[bold green]hatch-pip-compile[/bold green]: Watching environments: "
+            f"{', '.join(sorted(self.environments))} (press Ctrl+C to stop)"
+        )
+        watcher = LockWatcher(
+            environments=self.environments,
+            concurrency=self.jobs,
+            report=self.print_results,
+        )
+        try:
+            asyncio.run(watcher.watch())
+        except KeyboardInterrupt:
+            self.console.print("[bold green]hatch-pip-compile[/bold green]: Stopped watching")
+
+    def print_results(self, results: dict[str, EnvironmentResult]) -> None:
+        """
+        Print the results of locking environments
+        """
+        for name, result in sorted(results.items()):
+            if result.succeeded:
+                change = "updated" if result.lock_changed else "unchanged"
+                cache = ", cached" if result.cache_hit else ""
                 self.console.print(
-                    "[bold yellow]hatch command[/bold yellow]: "
-                    f"[bold blue]`{' '.join(environment_command)}`[/bold blue]"
+                    f"[bold green]hatch-pip-compile[/bold green]: {name} {change} "
+                    f"({result.duration:.1f}s{cache})"
                 )
-                self.console.print(result.stdout.decode("utf-8"))
+            else:
                 self.console.print(
-                    "[bold red]hatch-pip-compile[/bold red]: Error running hatch command"
+                    f"[bold red]hatch-pip-compile[/bold red]: {name} {result.status}"
+                    + (f": {result.error}" if result.error else "")
                 )
-                raise click.exceptions.Exit(1)
 
     @classmethod
-    def _get_supported_environments(cls) -> set[str]:
+    def _get_environment_configs(cls) -> dict[str, dict[str, Any]]:
         """
-        Get the names of the environments from `hatch env show --json`
+        Get the configuration of the `pip-compile` environments
+
+        The project is loaded in-process and the result is cached on disk
+        until its configuration changes, see `discover_environment_configs`.
 
         Returns
         -------
-        List[str]
-            The name of the environments
+        Dict[str, Dict[str, Any]]
+            The environment configurations, keyed by environment name
         """
-        result = subprocess.run(
-            args=["hatch", "env", "show", "--json"],
-            capture_output=True,
-            check=True,
-        )
-        environment_dict: dict[str, Any] = json.loads(result.stdout)
-        return {
-            key for key, value in environment_dict.items() if value.get("type") == "pip-compile"
-        }
+        return discover_environment_configs()
+
 
+class DefaultCommandGroup(click.Group):
+    """
+    Click group that runs a default command when no subcommand is given
+    """
 
-@click.command("hatch-pip-compile")
+    default_command: str = "lock"
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        """
+        Insert the default command unless a subcommand or a group option is given
+
+        A subcommand named like one of the project's `pip-compile`
+        environments locks that environment instead, with a warning,
+        so `hatch-pip-compile <environment>` keeps working.
+        """
+        if not args or (args[0] not in self.commands and args[0] not in {"--help", "--version"}):
+            args = [self.default_command, *args]
+        elif self.is_environment_name(args[0]):
+            rich.console.Console(stderr=True).print(
+                f"[bold yellow]hatch-pip-compile[/bold yellow]: `{args[0]}` is a pip-compile "
+                f"environment, locking it instead of running the `{args[0]}` command"
+            )
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+    def is_environment_name(self, name: str) -> bool:
+        """
+        Whether a visible subcommand name is also a `pip-compile` environment of the project
+        """
+        command = self.commands.get(name)
+        if command is None or command.hidden:
+            return False
+        try:
+            return name in HatchCommandRunner._get_environment_configs()
+        except HatchPipCompileError:
+            return False
+
+
+@click.group("hatch-pip-compile", cls=DefaultCommandGroup)
 @click.version_option(version=__version__, prog_name=__application__)
+def cli():
+    """
+    Upgrade your `hatch-pip-compile` managed dependencies
+    from the command line.
+
+    When no command is given the `lock` command is run. An environment
+    named like a command, e.g. `cache`, is locked instead of running
+    the command.
+    """
+
+
+@cli.command("lock")
 @click.argument("environment", default=None, type=click.STRING, required=False, nargs=-1)
 @click.option(
     "-U",
@@ -170,23 +391,264 @@ class HatchCommandRunner:
     default=False,
     help="Upgrade all environments",
 )
-def cli(
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of environments to lock concurrently",
+)
+@click.option(
+    "--lock-only",
+    is_flag=True,
+    default=False,
+    help="Only update lockfiles, don't sync dependencies or install the project",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    default=False,
+    help="Keep running and relock the environments whose dependencies change (lock-only)",
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    default=False,
+    help="Only check that the lockfiles are up-to-date, without creating environments",
+)
+def lock(
     environment: Sequence[str],
     upgrade: bool,
     upgrade_packages: Sequence[str],
     upgrade_all: bool,
+    jobs: int,
+    lock_only: bool,
+    watch: bool,
+    check: bool,
 ):
     """
-    Upgrade your `hatch-pip-compile` managed dependencies
-    from the command line.
+    Lock (and optionally upgrade) `hatch-pip-compile` environments
     """
+    if check and (upgrade or upgrade_packages or watch):
+        msg = "`--check` can't be combined with `--upgrade`, `--upgrade-package` or `--watch`"
+        raise click.BadParameter(msg)
+    if check:
+        check_lock_files_command(environments=environment, check_all=upgrade_all)
+        return
+    if watch and (upgrade or upgrade_packages):
+        msg = "`--watch` can't be combined with `--upgrade` or `--upgrade-package`"
+        raise click.BadParameter(msg)
     with HatchCommandRunner(
         environments=environment,
         upgrade=upgrade,
         upgrade_packages=upgrade_packages,
         upgrade_all=upgrade_all,
+        jobs=jobs,
+        lock_only=lock_only or watch,
     ) as hatch_runner:
-        hatch_runner.hatch_cli()
+        if watch:
+            hatch_runner.watch_cli()
+        else:
+            hatch_runner.hatch_cli()
+
+
+def check_lock_files_command(environments: Sequence[str], check_all: bool) -> None:
+    """
+    Check the lockfiles of environments, exiting non-zero when any is out of date
+    """
+    console = rich.console.Console()
+    if check_all:
+        environment_names = None
+    elif environments:
+        environment_names = list(environments)
+    else:
+        environment_names = ["default"]
+    try:
+        problems = check_lock_files(environment_names=environment_names)
+    except HatchPipCompileError as e:
+        raise click.BadParameter(str(e)) from e
+    for name, environment_problems in sorted(problems.items()):
+        if environment_problems:
+            console.print(f"[bold red]hatch-pip-compile[/bold red]: {name} is out of date")
+            for problem in environment_problems:
+                console.print(f"  - {problem}")
+        else:
+            console.print(f"[bold green]hatch-pip-compile[/bold green]: {name} is up-to-date")
+    if any(problems.values()):
+        raise click.exceptions.Exit(1)
+
+
+@cli.command("lock-environment", hidden=True)
+@click.argument("environment", type=click.STRING)
+def lock_environment_command(environment: str):
+    """
+    Lock a single environment in lock-only mode
+    """
+    lock_environment(environment_name=environment)
+
+
+@cli.command("cache")
+@click.option(
+    "--clear",
+    is_flag=True,
+    default=False,
+    help="Remove every cached resolution",
+)
+def cache(clear: bool):
+    """
+    Inspect or clear the resolution caches of the project's environments
+    """
+    console = rich.console.Console()
+    resolution_caches: dict[pathlib.Path, ResolutionCache] = {}
+    for environment in get_environments(application=load_application()):
+        resolution_caches.setdefault(
+            environment.resolution_cache.directory, environment.resolution_cache
+        )
+    if clear:
+        removed = sum(resolution_cache.clear() for resolution_cache in resolution_caches.values())
+        console.print(
+            f"[bold green]hatch-pip-compile[/bold green]: Removed {removed} cached resolutions"
+        )
+        return
+    for resolution_cache in resolution_caches.values():
+        cache_entries = resolution_cache.entries()
+        total_size = sum(entry.size for entry in cache_entries)
+        console.print("[bold green]hatch-pip-compile[/bold green]: Resolution cache")
+        console.print(f"Location: {resolution_cache.directory}", highlight=False, soft_wrap=True)
+        console.print(f"Entries: {len(cache_entries)}")
+        console.print(f"Size: {total_size:,} / {resolution_cache.max_size:,} bytes")
+
+
+@cli.command("prefetch")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Number of artifacts to download concurrently",
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    default=False,
+    help="Only verify, without network access, that every pin is in the wheelhouse",
+)
+def prefetch(jobs: int, check: bool):
+    """
+    Download the pins of every lockfile into the wheelhouse of its environment
+    """
+    console = rich.console.Console()
+    wheelhouses: dict[pathlib.Path, Wheelhouse] = {}
+    target_lock_files: dict[tuple[pathlib.Path, WheelhouseTarget], list[pathlib.Path]] = {}
+    for environment in get_environments(application=load_application()):
+        lock_file = environment.piptools_lock_file
+        if not lock_file.exists():
+            continue
+        wheelhouse = wheelhouses.setdefault(
+            environment.wheelhouse.directory, environment.wheelhouse
+        )
+        lock_files = target_lock_files.setdefault(
+            (wheelhouse.directory, environment.wheelhouse_target), []
+        )
+        if lock_file not in lock_files:
+            lock_files.append(lock_file)
+    target_artifacts = {
+        key: read_locked_artifacts(lock_files) for key, lock_files in target_lock_files.items()
+    }
+    artifact_count = sum(len(artifacts) for artifacts in target_artifacts.values())
+    lock_file_count = len({path for paths in target_lock_files.values() for path in paths})
+    if check:
+        missing_count = 0
+        for (directory, target), artifacts in target_artifacts.items():
+            wheelhouse = wheelhouses[directory]
+            missing = wheelhouse.missing(artifacts, target=target)
+            missing_count += len(missing)
+            for artifact in missing:
+                console.print(
+                    f"[bold red]hatch-pip-compile[/bold red]: Missing from the wheelhouse: "
+                    f"{wheelhouse.get_manifest_key(artifact=artifact, target=target)}"
+                )
+        console.print(
+            f"[bold green]hatch-pip-compile[/bold green]: {artifact_count - missing_count} of "
+            f"{artifact_count} pins from {lock_file_count} lockfiles are in the wheelhouse"
+        )
+        if missing_count:
+            raise click.exceptions.Exit(1)
+        return
+    console.print(
+        f"[bold green]hatch-pip-compile[/bold green]: Prefetching {artifact_count} pins "
+        f"from {lock_file_count} lockfiles for {len(target_artifacts)} interpreters"
+    )
+    fetched_count = 0
+    failures: dict[str, str] = {}
+    for (directory, target), artifacts in target_artifacts.items():
+        fetched, target_failures = wheelhouses[directory].prefetch(
+            artifacts=artifacts, target=target, jobs=jobs
+        )
+        fetched_count += len(fetched)
+        failures.update(target_failures)
+    console.print(
+        f"[bold green]hatch-pip-compile[/bold green]: Downloaded {fetched_count} artifacts, "
+        f"{artifact_count - fetched_count - len(failures)} already in the wheelhouse"
+    )
+    for directory in wheelhouses:
+        console.print(f"Location: {directory}", highlight=False, soft_wrap=True)
+    if failures:
+        for key, error in sorted(failures.items()):
+            console.print(f"[bold red]hatch-pip-compile[/bold red]: Failed to download {key}")
+            console.print(error, highlight=False)
+        raise click.exceptions.Exit(1)
+
+
+@cli.group("snapshot")
+def snapshot():
+    """
+    Save and restore snapshots of environments, e.g. for a CI cache
+    """
+
+
+snapshot_directory_option = click.option(
+    "-d",
+    "--directory",
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+    default=None,
+    envvar="PIP_COMPILE_SNAPSHOT_DIR",
+    help="Directory of the snapshots, defaults to the hatch data directory",
+)
+
+
+@snapshot.command("save")
+@click.argument("environment", type=click.STRING, required=True, nargs=-1)
+@snapshot_directory_option
+def snapshot_save(environment: Sequence[str], directory: pathlib.Path | None):
+    """
+    Save snapshots of environments keyed by their interpreter and lockfile
+    """
+    console = rich.console.Console()
+    for environment_name in environment:
+        snapshot_path = save_snapshot(environment_name=environment_name, directory=directory)
+        console.print(
+            f"[bold green]hatch-pip-compile[/bold green]: Saved {environment_name} "
+            f"to {snapshot_path}",
+            highlight=False,
+            soft_wrap=True,
+        )
+
+
+@snapshot.command("restore")
+@click.argument("environment", type=click.STRING, required=True, nargs=-1)
+@snapshot_directory_option
+def snapshot_restore(environment: Sequence[str], directory: pathlib.Path | None):
+    """
+    Create environments from their snapshots, installing them as usual without one
+    """
+    console = rich.console.Console()
+    for environment_name in environment:
+        restored = restore_snapshot(environment_name=environment_name, directory=directory)
+        message = "restored from a snapshot" if restored else "not restored from a snapshot"
+        console.print(f"[bold green]hatch-pip-compile[/bold green]: {environment_name} {message}")
 
 
 if __name__ == "__main__":
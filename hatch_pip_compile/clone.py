@@ -0,0 +1,226 @@
+"""
+hatch-pip-compile virtualenv cloning
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata as importlib_metadata
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+from typing import Any, Iterable, Iterator
+
+from packaging.utils import canonicalize_name
+
+from hatch_pip_compile.exceptions import HatchPipCompileError
+
+logger = logging.getLogger(__name__)
+
+
+class VenvIndex:
+    """
+    Index of built virtualenvs, keyed by interpreter and lock file
+
+    Each entry points to the most recent virtualenv that was synced with a
+    given lock file on a given interpreter, so that another environment with
+    an identical lock can be populated from it instead of installed from scratch.
+    """
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        """
+        Initialize the index in a given directory
+        """
+        self.directory = directory
+
+    @classmethod
+    def from_data_directory(cls, data_directory: pathlib.Path) -> VenvIndex:
+        """
+        Get the index stored under the plugin's hatch data directory
+        """
+        return cls(directory=data_directory / ".pip-compile" / "venvs")
+
+    @staticmethod
+    def get_key(interpreter: dict[str, Any], lock_hash: str) -> str:
+        """
+        Get the index key for an interpreter and a lock file content hash
+        """
+        key_inputs = {"interpreter": interpreter, "lock_hash": lock_hash}
+        return hashlib.sha256(json.dumps(key_inputs, sort_keys=True).encode()).hexdigest()
+
+    def _get_path(self, key: str) -> pathlib.Path:
+        """
+        Get the path of an index entry
+        """
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> pathlib.Path | None:
+        """
+        Get the virtualenv directory registered for a key, if it still exists
+        """
+        try:
+            entry = json.loads(self._get_path(key).read_text())
+        except (OSError, ValueError):
+            return None
+        directory = pathlib.Path(entry.get("directory", ""))
+        return directory if directory.is_absolute() and directory.is_dir() else None
+
+    def register(self, key: str, directory: pathlib.Path) -> None:
+        """
+        Register a synced virtualenv directory for a key
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=f".{key}.", suffix=".tmp"
+            )
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump({"directory": str(directory)}, temp_file)
+            os.replace(temp_path, self._get_path(key))
+        except OSError:
+            logger.debug("[hatch-pip-compile] Unable to write virtualenv index entry: %s", key)
+
+
+def find_site_packages(
+    venv_directory: pathlib.Path, sys_path: Iterable[str]
+) -> pathlib.Path | None:
+    """
+    Find the `site-packages` directory of a virtualenv on its `sys.path`
+    """
+    for path in sys_path:
+        site_packages = pathlib.Path(path)
+        if site_packages.name == "site-packages" and venv_directory in site_packages.parents:
+            return site_packages
+    return None
+
+
+def get_distribution_names(site_packages: pathlib.Path) -> set[str]:
+    """
+    Get the canonical names of the distributions installed in a `site-packages` directory
+    """
+    return {
+        canonicalize_name(distribution.metadata["Name"])
+        for distribution in importlib_metadata.distributions(path=[str(site_packages)])
+        if distribution.metadata["Name"]
+    }
+
+
+def _link_or_copy(source: pathlib.Path, target: pathlib.Path) -> None:
+    """
+    Hardlink a file, falling back to a copy across filesystems
+    """
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def relocate_shebang(first_line: bytes, source_root: str, target_root: str) -> bytes | None:
+    """
+    Point the shebang line of a script at another virtualenv
+
+    Returns None when the line isn't a shebang into the source virtualenv.
+    """
+    if not first_line.startswith(b"#!") or source_root.encode() not in first_line:
+        return None
+    return first_line.replace(source_root.encode(), target_root.encode())
+
+
+def _copy_script(
+    source: pathlib.Path, target: pathlib.Path, source_root: str, target_root: str
+) -> None:
+    """
+    Copy a script, pointing its shebang at the target virtualenv
+    """
+    with source.open("rb") as script_file:
+        first_line = relocate_shebang(script_file.readline(), source_root, target_root)
+        if first_line is None:
+            _link_or_copy(source, target)
+            return
+        contents = first_line + script_file.read()
+    target.write_bytes(contents)
+    shutil.copymode(source, target)
+
+
+def iter_distribution_files(
+    source_root: pathlib.Path, source_site_packages: pathlib.Path, skip: set[str]
+) -> Iterator[tuple[pathlib.Path, pathlib.Path]]:
+    """
+    Iterate over the files of the distributions installed in a virtualenv
+
+    Files are read from each distribution's `RECORD`, bytecode caches and
+    files outside of the virtualenv are left out.
+
+    Yields
+    ------
+    Tuple[pathlib.Path, pathlib.Path]
+        The path of each file and its path relative to `source_root`
+    """
+    for distribution in importlib_metadata.distributions(path=[str(source_site_packages)]):
+        name = distribution.metadata["Name"]
+        if not name or canonicalize_name(name) in skip:
+            continue
+        files = distribution.files
+        if files is None:
+            msg = f"[hatch-pip-compile] {name} has no RECORD and can't be cloned"
+            raise HatchPipCompileError(msg)
+        for file in files:
+            source = pathlib.Path(os.path.normpath(str(distribution.locate_file(file))))
+            relative_path = pathlib.Path(os.path.relpath(source, source_root))
+            if relative_path.parts[0] == os.pardir or "__pycache__" in relative_path.parts:
+                continue
+            elif source.is_file():
+                yield source, relative_path
+
+
+def clone_distributions(
+    source_root: pathlib.Path,
+    source_site_packages: pathlib.Path,
+    target_root: pathlib.Path,
+    scripts_directory: str,
+    skip: set[str],
+) -> int:
+    """
+    Clone the distributions of one virtualenv into another
+
+    Every file recorded in a distribution's `RECORD` is hardlinked (or
+    copied) to the same relative location in the target virtualenv, except
+    for bytecode caches, which embed the source path. Scripts in
+    `scripts_directory` get their shebang rewritten to the target virtualenv.
+    Files that already exist in the target are left alone.
+
+    Parameters
+    ----------
+    source_root : pathlib.Path
+        The virtualenv to clone from
+    source_site_packages : pathlib.Path
+        The `site-packages` directory of the source virtualenv
+    target_root : pathlib.Path
+        The virtualenv to clone into, created with the same interpreter
+    scripts_directory : str
+        The scripts directory, relative to the virtualenv root (e.g. `bin`)
+    skip : Set[str]
+        Canonical names of distributions that aren't cloned
+
+    Returns
+    -------
+    int
+        The number of cloned files
+    """
+    cloned = 0
+    for source, relative_path in iter_distribution_files(
+        source_root=source_root, source_site_packages=source_site_packages, skip=skip
+    ):
+        target = target_root / relative_path
+        if target.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if relative_path.parent == pathlib.Path(scripts_directory):
+            _copy_script(source, target, str(source_root), str(target_root))
+        else:
+            _link_or_copy(source, target)
+        cloned += 1
+    return cloned
@@ -0,0 +1,180 @@
+"""
+hatch-pip-compile resolver daemon client
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata as importlib_metadata
+import json
+import logging
+import os
+import pathlib
+import socket
+import subprocess
+import time
+from typing import Any, ClassVar
+
+logger = logging.getLogger(__name__)
+
+
+class ResolverDaemon:
+    """
+    Client of a warm `pip-compile` worker for a single interpreter
+
+    The worker (`resolver_worker.py`) runs with the interpreter that has
+    `pip-tools` installed and listens on a Unix socket in the hatch data
+    directory. It's spawned on first use and exits on its own once it has
+    been idle for `idle_timeout` seconds. Whenever the worker can't be
+    reached the caller falls back to running `pip-compile` as a subprocess.
+    """
+
+    worker_path: ClassVar[pathlib.Path] = pathlib.Path(__file__).with_name("resolver_worker.py")
+    idle_timeout: ClassVar[float] = 600
+    startup_timeout: ClassVar[float] = 10
+    # sockaddr_un paths are limited to 104 (macOS) or 108 (Linux) bytes
+    max_socket_path_length: ClassVar[int] = 100
+
+    def __init__(self, directory: pathlib.Path, python_executable: str) -> None:
+        """
+        Initialize the client of the worker for an interpreter
+        """
+        self.directory = directory
+        self.python_executable = python_executable
+
+    @classmethod
+    def from_data_directory(
+        cls, data_directory: pathlib.Path, python_executable: str
+    ) -> ResolverDaemon:
+        """
+        Get the client of the worker whose socket is in the plugin's hatch data directory
+        """
+        return cls(
+            directory=data_directory / ".pip-compile" / "daemons",
+            python_executable=python_executable,
+        )
+
+    @property
+    def piptools_version(self) -> str | None:
+        """
+        The version of `pip-tools` installed for the interpreter, None if it isn't installed
+
+        The interpreter is always the one of a virtual environment, so
+        its `site-packages` are found without running it.
+        """
+        prefix = pathlib.Path(self.python_executable).parent.parent
+        site_packages = [str(path) for path in sorted(prefix.glob("lib/python*/site-packages"))]
+        for distribution in importlib_metadata.distributions(name="pip-tools", path=site_packages):
+            return distribution.version
+        return None
+
+    @property
+    def socket_path(self) -> pathlib.Path:
+        """
+        The worker's socket, keyed on the interpreter, its `pip-tools` and the worker's source
+
+        A new version of the worker or of `pip-tools` gets a new socket,
+        instead of talking to a worker that's still running the old one.
+        """
+        key_inputs = {
+            "python": self.python_executable,
+            "pip-tools": self.piptools_version,
+            "worker": hashlib.sha256(self.worker_path.read_bytes()).hexdigest(),
+        }
+        key = hashlib.sha256(json.dumps(key_inputs, sort_keys=True).encode()).hexdigest()
+        return self.directory / f"{key[:16]}.sock"
+
+    @property
+    def supported(self) -> bool:
+        """
+        Whether the worker can run on this platform for this interpreter
+        """
+        return (
+            os.name == "posix"
+            and hasattr(socket, "AF_UNIX")
+            and os.path.isabs(self.python_executable)
+            and len(os.fsencode(self.socket_path)) <= self.max_socket_path_length
+        )
+
+    def connect(self) -> socket.socket | None:
+        """
+        Connect to a running worker, None if there isn't one
+        """
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(str(self.socket_path))
+        except OSError:
+            client.close()
+            return None
+        return client
+
+    def spawn(self, env: dict[str, str]) -> subprocess.Popen:
+        """
+        Start a worker in the background
+        """
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        command = [
+            self.python_executable,
+            str(self.worker_path),
+            "--socket",
+            str(self.socket_path),
+            "--idle-timeout",
+            str(self.idle_timeout),
+        ]
+        return subprocess.Popen(
+            command,  # noqa: S603
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    def start(self, env: dict[str, str]) -> socket.socket | None:
+        """
+        Connect to the worker, spawning it when it isn't running
+
+        Returns None when the worker doesn't come up within `startup_timeout`,
+        e.g. when `pip-tools` isn't installed for the interpreter.
+        """
+        client = self.connect()
+        if client is not None:
+            return client
+        process = self.spawn(env=env)
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline and process.poll() is None:
+            time.sleep(0.05)
+            client = self.connect()
+            if client is not None:
+                return client
+        return self.connect()
+
+    def resolve(self, args: list[str], cwd: str, env: dict[str, str]) -> dict[str, Any] | None:
+        """
+        Run `pip-compile` with the given arguments in the worker
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            The `returncode`, `stdout` and `stderr` of the run, None when
+            the worker couldn't be reached or dropped the connection
+        """
+        if not self.supported:
+            return None
+        try:
+            client = self.start(env=env)
+            if client is None:
+                return None
+            with client:
+                request = {"args": args, "cwd": cwd, "env": env}
+                client.sendall(json.dumps(request).encode() + b"\n")
+                chunks = []
+                while True:
+                    chunk = client.recv(2**16)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            return json.loads(b"".join(chunks))
+        except (OSError, ValueError) as e:
+            logger.debug("[hatch-pip-compile] Resolver daemon unavailable: %s", e)
+            return None
@@ -0,0 +1,190 @@
+"""
+hatch-pip-compile environment discovery cache
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+from typing import Any, ClassVar, Mapping
+
+from hatch_pip_compile.__about__ import __version__
+
+logger = logging.getLogger(__name__)
+
+
+class EnvironmentDiscovery:
+    """
+    On-disk cache of a project's `pip-compile` environments
+
+    Each project gets a small JSON document with the names of its `pip-compile`
+    environments, with matrices expanded, and the few options the CLI needs
+    to order them. The document is keyed on the content of the project and
+    user configuration files, and on the environment variables the project's
+    `overrides` depend on, so a matching document can be used without loading
+    the project's environments at all. A missing or corrupt document is a miss.
+    Projects with environment collector plugins aren't cached, see `is_cacheable`.
+    """
+
+    schema_version: ClassVar[int] = 1
+    config_file_names: ClassVar[list[str]] = ["pyproject.toml", "hatch.toml"]
+    environment_options: ClassVar[list[str]] = [
+        "type",
+        "pip-compile-constraint",
+        "pip-compile-universal",
+    ]
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        """
+        Initialize the cache in a given directory
+        """
+        self.directory = directory
+
+    @classmethod
+    def from_data_directory(cls, data_directory: pathlib.Path) -> EnvironmentDiscovery:
+        """
+        Get the cache stored under the plugin's hatch data directory
+        """
+        return cls(directory=data_directory / ".pip-compile" / "discovery")
+
+    def get_path(self, root: pathlib.Path) -> pathlib.Path:
+        """
+        Get the path of a project's document
+        """
+        project_id = hashlib.sha256(str(root).encode()).hexdigest()[:16]
+        return self.directory / f"{project_id}.json"
+
+    @staticmethod
+    def _hash_file(path: pathlib.Path) -> str | None:
+        """
+        Get the SHA256 of a file, or None if it doesn't exist
+        """
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def get_key(self, root: pathlib.Path, user_config_file: pathlib.Path) -> str:
+        """
+        Get the cache key for a project's configuration files
+        """
+        key_inputs = {
+            "version": __version__,
+            "platform": sys.platform,
+            "root": str(root),
+            "files": {
+                file_name: self._hash_file(root / file_name) for file_name in self.config_file_names
+            },
+            "user_config": self._hash_file(user_config_file),
+        }
+        return hashlib.sha256(json.dumps(key_inputs, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def is_cacheable(environment_collectors: Mapping[str, Any]) -> bool:
+        """
+        Whether a project's environments can be cached
+
+        Environment collector plugins can generate environments from
+        any file, e.g. `hatch-mkdocs` reads `mkdocs.yml`, so only projects
+        that use nothing but hatch's default collector are cached.
+
+        Parameters
+        ----------
+        environment_collectors : Mapping[str, Any]
+            The project's `env.collectors` tables, keyed by collector name
+        """
+        return set(environment_collectors) <= {"default"}
+
+    @staticmethod
+    def get_override_variables(environments: Mapping[str, Any]) -> list[str]:
+        """
+        Get the environment variables that `overrides.env` tables depend on
+
+        Parameters
+        ----------
+        environments : Mapping[str, Any]
+            The project's raw `envs` tables, before matrices are expanded
+        """
+        variables: set[str] = set()
+        for environment_config in environments.values():
+            if not isinstance(environment_config, dict):
+                continue
+            overrides = environment_config.get("overrides")
+            if isinstance(overrides, dict) and isinstance(overrides.get("env"), dict):
+                variables.update(overrides["env"])
+        return sorted(variables)
+
+    @classmethod
+    def summarize(
+        cls, environment_configs: Mapping[str, dict[str, Any]]
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Keep only the options the CLI needs from each environment configuration
+        """
+        return {
+            environment_name: {
+                option: config[option] for option in cls.environment_options if option in config
+            }
+            for environment_name, config in environment_configs.items()
+        }
+
+    def get(self, root: pathlib.Path, key: str) -> dict[str, dict[str, Any]] | None:
+        """
+        Get the cached environments of a project, None when they're missing or stale
+        """
+        try:
+            data = json.loads(self.get_path(root).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.debug("[hatch-pip-compile] Ignoring corrupt discovery cache: %s", root)
+            return None
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != self.schema_version
+            or data.get("key") != key
+            or not isinstance(data.get("variables"), dict)
+            or not isinstance(data.get("environments"), dict)
+        ):
+            return None
+        for variable, value in data["variables"].items():
+            if os.environ.get(variable) != value:
+                return None
+        logger.debug("[hatch-pip-compile] Environment discovery cache hit: %s", root)
+        return data["environments"]
+
+    def set(
+        self,
+        root: pathlib.Path,
+        key: str,
+        environments: dict[str, dict[str, Any]],
+        variables: list[str],
+    ) -> None:
+        """
+        Store the environments of a project along with the variables they depend on
+
+        Failure to write the cache is never fatal, it only
+        means that the next run discovers the environments again.
+        """
+        document = {
+            "version": self.schema_version,
+            "key": key,
+            "variables": {variable: os.environ.get(variable) for variable in variables},
+            "environments": environments,
+        }
+        path = self.get_path(root)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=f".{path.name}.", suffix=".tmp"
+            )
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump(document, temp_file, indent=2, sort_keys=True)
+            os.replace(temp_path, path)
+        except OSError:
+            logger.debug("[hatch-pip-compile] Unable to write discovery cache: %s", root)
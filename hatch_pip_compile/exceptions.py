@@ -19,3 +19,9 @@ class LockFileError(HatchPipCompileError, ValueError):
     """
     A lock file content Error
     """
+
+
+class MissingArtifactsError(HatchPipCompileError):
+    """
+    Locked artifacts are missing from the wheelhouse in offline mode
+    """
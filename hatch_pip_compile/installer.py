@@ -4,12 +4,22 @@ Package + Dependency Installers
 
 from __future__ import annotations
 
+import importlib.metadata as importlib_metadata
+import json
+import pathlib
+import tempfile
 from abc import ABC, abstractmethod
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from hatch.env.utils import add_verbosity_flag
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
 
 from hatch_pip_compile.base import HatchPipCompileBase
+from hatch_pip_compile.exceptions import MissingArtifactsError
+from hatch_pip_compile.trace import traced
+from hatch_pip_compile.wheelhouse import LockedArtifact
 
 
 class PluginInstaller(HatchPipCompileBase, ABC):
@@ -20,18 +30,149 @@ class PluginInstaller(HatchPipCompileBase, ABC):
     how the plugin should install packages and dependencies.
     """
 
+    sync_marker_name: ClassVar[str] = ".hatch-pip-compile-sync.json"
+    offline_cache: ClassVar[bool] = False
+    sync_uninstalls_project: ClassVar[bool] = False
+
     @abstractmethod
     def install_dependencies(self) -> None:
         """
         Install the dependencies
         """
 
+    def construct_install_command(self) -> list[str] | None:
+        """
+        Construct the command that installs the lock file
+
+        None when the lock file isn't installed with a single command,
+        `install_dependencies` has to be used instead.
+        """
+        return None
+
     def sync_dependencies(self) -> None:
         """
         Sync the dependencies - same as `install_dependencies`
         """
+        self.clear_sync_marker()
         self.install_pypi_dependencies()
         self.install_dependencies()
+        self.write_sync_marker()
+
+    @property
+    def sync_marker_path(self) -> pathlib.Path:
+        """
+        The path of the sync state marker inside the virtualenv
+        """
+        return pathlib.Path(self.environment.virtual_env.directory) / self.sync_marker_name
+
+    @property
+    def sync_state(self) -> dict[str, Any]:
+        """
+        The state recorded in the sync marker
+
+        The content hash of the lock file and the installer used to sync it.
+        """
+        lock_hash = None
+        if self.environment.piptools_lock_file.exists():
+            lock_hash = self.environment.current_lock_hash()
+        return {
+            "installer": self.environment.config.get("pip-compile-installer", "pip"),
+            "lock_hash": lock_hash,
+        }
+
+    def read_sync_marker(self, directory: pathlib.Path | None = None) -> dict[str, Any] | None:
+        """
+        Read the sync state marker, None if it's missing or unreadable
+
+        The marker of another virtualenv is read when `directory` is given.
+        """
+        marker_path = self.sync_marker_path
+        if directory is not None:
+            marker_path = directory / self.sync_marker_name
+        try:
+            return json.loads(marker_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def write_sync_marker(self) -> None:
+        """
+        Record the current lock file as synced into the virtualenv
+        """
+        if not self.environment.virtualenv_exists():
+            return
+        self.sync_marker_path.write_text(json.dumps(self.sync_state, sort_keys=True))
+
+    def clear_sync_marker(self) -> None:
+        """
+        Remove the sync state marker before the environment is modified
+        """
+        try:
+            self.sync_marker_path.unlink()
+        except OSError:
+            pass
+
+    def get_locked_pins(self) -> dict[str, str | None]:
+        """
+        Get the pinned versions from the lock file
+
+        Requirements with markers that don't apply to the environment
+        are skipped, requirements that aren't pinned to a single version
+        (e.g. direct URLs) map to None.
+
+        Returns
+        -------
+        Dict[str, Optional[str]]
+            Pinned versions keyed by canonical distribution name
+        """
+        marker_environment = self.environment.virtual_env.environment
+        locked: dict[str, str | None] = {}
+        for requirement in self.environment.piptools_lock.read_lock_requirements():
+            if requirement.marker is not None and not requirement.marker.evaluate(
+                marker_environment
+            ):
+                continue
+            specifiers = list(requirement.specifier)
+            pinned_version = None
+            if requirement.url is None and len(specifiers) == 1:
+                if specifiers[0].operator in ("==", "==="):
+                    pinned_version = specifiers[0].version
+            locked[canonicalize_name(requirement.name)] = pinned_version
+        return locked
+
+    def check_offline_artifacts(self) -> None:
+        """
+        Fail fast when the lock file can't be installed offline
+
+        In offline mode every pin of the lock file must be in the shared
+        wheelhouse, unless the installer can fall back to its own cache.
+        Pins that aren't pinned to a single version can't be checked.
+
+        Raises
+        ------
+        MissingArtifactsError
+            Listing the pins missing from the wheelhouse
+        """
+        if not self.environment.offline or self.offline_cache:
+            return
+        elif not self.environment.piptools_lock_file.exists():
+            return
+        locked_artifacts = [
+            LockedArtifact(name=name, version=version)
+            for name, version in self.get_locked_pins().items()
+            if version is not None
+        ]
+        missing = self.environment.wheelhouse.missing(
+            locked_artifacts, target=self.environment.wheelhouse_target
+        )
+        if missing:
+            msg = (
+                f"[hatch-pip-compile] Offline mode: {len(missing)} locked artifacts of the "
+                f"{self.environment.name} environment are missing from the wheelhouse "
+                f"({self.environment.wheelhouse.directory}): "
+                f"{', '.join(artifact.key for artifact in missing)}. "
+                "Run `hatch-pip-compile prefetch` with network access first."
+            )
+            raise MissingArtifactsError(msg)
 
     def construct_pip_install_command(self, args: list[str]) -> list[str]:
         """
@@ -39,15 +180,40 @@ class PluginInstaller(HatchPipCompileBase, ABC):
         """
         return self.environment.construct_pip_install_command(args)
 
+    def construct_pip_uninstall_command(self, args: list[str]) -> list[str]:
+        """
+        Construct a `pip uninstall` command with the given arguments
+        """
+        command = [
+            "python",
+            "-u",
+            "-m",
+            "pip",
+            "uninstall",
+            "--yes",
+            "--disable-pip-version-check",
+        ]
+        add_verbosity_flag(command, self.environment.verbosity, adjustment=-1)
+        command.extend(args)
+        return command
+
+    def construct_project_install_command(self, dev_mode: bool = False) -> list[str]:
+        """
+        Construct the command that installs the project (`--no-deps`)
+        """
+        args = [*self.offline_args, "--no-deps"]
+        if dev_mode:
+            args.append("--editable")
+        args.append(str(self.environment.root))
+        return self.construct_pip_install_command(args=args)
+
     def install_project(self) -> None:
         """
         Install the project (`--no-deps`)
         """
         self.install_pypi_dependencies()
         with self.environment.safe_activation():
-            self.environment.plugin_check_command(
-                self.construct_pip_install_command(args=["--no-deps", str(self.environment.root)])
-            )
+            self.environment.plugin_check_command(self.construct_project_install_command())
 
     def install_project_dev_mode(self) -> None:
         """
@@ -56,9 +222,7 @@ class PluginInstaller(HatchPipCompileBase, ABC):
         self.install_pypi_dependencies()
         with self.environment.safe_activation():
             self.environment.plugin_check_command(
-                self.construct_pip_install_command(
-                    args=["--no-deps", "--editable", str(self.environment.root)]
-                )
+                self.construct_project_install_command(dev_mode=True)
             )
 
 
@@ -67,6 +231,15 @@ class PipInstaller(PluginInstaller):
     Plugin Installer for `pip`
     """
 
+    protected_packages: ClassVar[list[str]] = [
+        "pip",
+        "pip-tools",
+        "setuptools",
+        "uv",
+        "wheel",
+    ]
+
+    @traced("install_dependencies")
     def install_dependencies(self) -> None:
         """
         Install the dependencies with `pip`
@@ -75,10 +248,155 @@ class PipInstaller(PluginInstaller):
         with self.environment.safe_activation():
             if not self.environment.piptools_lock_file.exists():
                 return
-            extra_args = self.environment.config.get("pip-compile-install-args", [])
-            args = [*extra_args, "--requirement", str(self.environment.piptools_lock_file)]
-            install_command = self.construct_pip_install_command(args=args)
-            self.environment.plugin_check_command(install_command)
+            self.check_offline_artifacts()
+            install_command = self.construct_install_command()
+            if install_command is None:
+                self.install_dependencies_incremental()
+            else:
+                self.environment.plugin_check_command(install_command)
+
+    def construct_install_command(self) -> list[str] | None:
+        """
+        Construct the `pip install` command for the lock file
+
+        None with `pip-compile-incremental-install`, which compares the
+        installed distributions against the lock file first.
+        """
+        if not self.environment.piptools_lock_file.exists():
+            return None
+        elif self.environment.config.get("pip-compile-incremental-install", False) is True:
+            return None
+        extra_args = self.environment.config.get("pip-compile-install-args", [])
+        args = [
+            *self.wheelhouse_args,
+            *extra_args,
+            "--requirement",
+            str(self.environment.piptools_lock_file),
+        ]
+        return self.construct_pip_install_command(args=args)
+
+    def install_dependencies_incremental(self) -> None:
+        """
+        Install only the dependencies that changed since the last sync
+
+        The installed distributions are compared against the lock file pins,
+        new and changed pins are installed with a single `pip install` and
+        distributions that are no longer locked are removed with a single
+        `pip uninstall`. Nothing is run when the environment matches the lock file.
+        """
+        distributions = self.get_distributions()
+        installed = self.get_installed_versions(distributions=distributions)
+        locked = self.get_locked_pins()
+        changed = {
+            name
+            for name, version in locked.items()
+            if version is None or not self._versions_match(installed.get(name), version)
+        }
+        removed = set(installed) - set(locked)
+        if removed:
+            removed -= self.get_protected_distributions(distributions=distributions)
+        if removed:
+            self.environment.plugin_check_command(
+                self.construct_pip_uninstall_command(args=sorted(removed))
+            )
+        if not changed:
+            return
+        extra_args = self.environment.config.get("pip-compile-install-args", [])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            requirements_file = pathlib.Path(tmpdir) / "requirements.txt"
+            requirements_file.write_text(
+                self.environment.piptools_lock.select_lock_entries(names=changed)
+            )
+            args = [*self.wheelhouse_args, *extra_args, "--requirement", str(requirements_file)]
+            self.environment.plugin_check_command(self.construct_pip_install_command(args=args))
+
+    @property
+    def wheelhouse_args(self) -> list[str]:
+        """
+        Installer arguments to install the lock file from the shared wheelhouse
+
+        With `pip-compile-wheelhouse` enabled the wheelhouse is passed with
+        `--find-links`, and the index is disabled with `--no-index` when
+        the wheelhouse holds every pin of the lock file for the environment's
+        interpreter and platform. In offline mode the offline arguments are
+        always used.
+        """
+        if self.environment.offline:
+            return self.offline_args
+        elif self.environment.config.get("pip-compile-wheelhouse", False) is not True:
+            return []
+        wheelhouse = self.environment.wheelhouse
+        if not wheelhouse.directory.is_dir():
+            return []
+        args = ["--find-links", str(wheelhouse.directory)]
+        if wheelhouse.covers(self.get_locked_pins(), target=self.environment.wheelhouse_target):
+            args.append("--no-index")
+        return args
+
+    def get_distributions(self) -> list[importlib_metadata.Distribution]:
+        """
+        Get the distributions installed in the environment
+        """
+        return list(importlib_metadata.distributions(path=self.environment.virtual_env.sys_path))
+
+    @staticmethod
+    def get_installed_versions(
+        distributions: list[importlib_metadata.Distribution],
+    ) -> dict[str, str]:
+        """
+        Get the versions of the installed distributions
+
+        Returns
+        -------
+        Dict[str, str]
+            Installed versions keyed by canonical distribution name
+        """
+        installed: dict[str, str] = {}
+        for distribution in distributions:
+            name = distribution.metadata["Name"]
+            if name:
+                installed.setdefault(canonicalize_name(name), distribution.version)
+        return installed
+
+    def get_protected_distributions(
+        self, distributions: list[importlib_metadata.Distribution]
+    ) -> set[str]:
+        """
+        Get the distributions that are never uninstalled
+
+        The packaging tools, the project itself and everything they depend on.
+        """
+        distributions_by_name = {
+            canonicalize_name(distribution.metadata["Name"]): distribution
+            for distribution in distributions
+            if distribution.metadata["Name"]
+        }
+        pending = [canonicalize_name(name) for name in self.protected_packages]
+        pending.append(canonicalize_name(self.environment.metadata.name))
+        protected: set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name in protected:
+                continue
+            protected.add(name)
+            distribution = distributions_by_name.get(name)
+            if distribution is None:
+                continue
+            for requirement_text in distribution.requires or []:
+                pending.append(canonicalize_name(Requirement(requirement_text).name))
+        return protected
+
+    @staticmethod
+    def _versions_match(installed: str | None, locked: str) -> bool:
+        """
+        Whether an installed version matches a pinned version
+        """
+        if installed is None:
+            return False
+        try:
+            return Version(installed) == Version(locked)
+        except InvalidVersion:
+            return installed == locked
 
 
 class UvInstaller(PipInstaller):
@@ -87,18 +405,25 @@ class UvInstaller(PipInstaller):
     """
 
     pypi_dependencies: ClassVar[list[str]] = ["uv"]
+    offline_flags: ClassVar[list[str]] = ["--offline"]
+    offline_cache: ClassVar[bool] = True
 
     def construct_pip_install_command(self, args: list[str]) -> list[str]:
         """
         Construct a `pip install` command with the given arguments
         """
-        command = [
-            "python",
-            "-m",
-            "uv",
-            "pip",
-            "install",
-        ]
+        command = [*self.uv_command, "pip", "install"]
+        command.extend(["--python", self.environment.python_executable])
+        add_verbosity_flag(command, self.environment.verbosity, adjustment=-1)
+        command.extend(args)
+        return command
+
+    def construct_pip_uninstall_command(self, args: list[str]) -> list[str]:
+        """
+        Construct a `pip uninstall` command with the given arguments
+        """
+        command = [*self.uv_command, "pip", "uninstall"]
+        command.extend(["--python", self.environment.python_executable])
         add_verbosity_flag(command, self.environment.verbosity, adjustment=-1)
         command.extend(args)
         return command
@@ -110,7 +435,9 @@ class PipSyncInstaller(PluginInstaller):
     """
 
     pypi_dependencies: ClassVar[list[str]] = ["pip-tools"]
+    sync_uninstalls_project: ClassVar[bool] = True
 
+    @traced("install_dependencies")
     def install_dependencies(self) -> None:
         """
         Install the dependencies with `pip-sync`
@@ -120,8 +447,30 @@ class PipSyncInstaller(PluginInstaller):
         lockfile.
         """
         self.install_pypi_dependencies()
+        if not self.environment.dependencies:
+            self.environment.piptools_lock_file.write_text("")
+            self.environment.plugin_check_command(self.construct_sync_command())
+            self.environment.piptools_lock_file.unlink()
+            return
+        self.check_offline_artifacts()
+        self.environment.plugin_check_command(self.construct_sync_command())
+
+    def construct_install_command(self) -> list[str] | None:
+        """
+        Construct the `pip-sync` command for the lock file
+
+        None without dependencies, when `pip-sync` needs an empty lock file.
+        """
+        if not self.environment.dependencies:
+            return None
+        return self.construct_sync_command()
+
+    def construct_sync_command(self) -> list[str]:
+        """
+        Construct the `pip-sync` command
+        """
         cmd = [
-            self.environment.virtual_env.python_info.executable,
+            self.tool_python_executable,
             "-m",
             "piptools",
             "sync",
@@ -129,16 +478,13 @@ class PipSyncInstaller(PluginInstaller):
             if self.environment.config.get("pip-compile-verbose", None) is True
             else "--quiet",
             "--python-executable",
-            str(self.environment.virtual_env.python_info.executable),
+            str(self.environment.python_executable),
         ]
-        if not self.environment.dependencies:
-            self.environment.piptools_lock_file.write_text("")
+        cmd.extend(self.offline_args)
         extra_args = self.environment.config.get("pip-compile-install-args", [])
         cmd.extend(extra_args)
         cmd.append(str(self.environment.piptools_lock_file))
-        self.environment.plugin_check_command(cmd)
-        if not self.environment.dependencies:
-            self.environment.piptools_lock_file.unlink()
+        return cmd
 
     def _full_install(self) -> None:
         """
@@ -148,9 +494,11 @@ class PipSyncInstaller(PluginInstaller):
         2) Run pip-sync
         3) (re)install project
         """
+        self.clear_sync_marker()
         with self.environment.safe_activation():
             self.environment.run_pip_compile()
             self.install_dependencies()
+        self.write_sync_marker()
         if not self.environment.skip_install:
             if self.environment.dev_mode:
                 super().install_project_dev_mode()
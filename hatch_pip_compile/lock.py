@@ -4,32 +4,165 @@ hatch-pip-compile header operations
 
 from __future__ import annotations
 
+import dataclasses
 import hashlib
 import logging
+import os
 import pathlib
 import re
+import shutil
+import tempfile
 from textwrap import dedent
-from typing import Iterable
+from typing import IO, TYPE_CHECKING, Iterable, Iterator
 
-from packaging.requirements import Requirement
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
 from packaging.version import Version
 from piptools._compat.pip_compat import PipSession, parse_requirements
 
 from hatch_pip_compile.base import HatchPipCompileBase
+from hatch_pip_compile.trace import traced
+
+if TYPE_CHECKING:
+    from hatch_pip_compile.plugin import PipCompileEnvironment
 
 logger = logging.getLogger(__name__)
 
+_python_version_pattern = re.compile(
+    r"# This file is autogenerated by hatch-pip-compile with Python (.*)"
+)
+_constraint_sha_pattern = re.compile(r"# \[constraints\] \S* \(SHA256: (.*)\)")
+_universal_line = "# [universal]"
+_header_end_pattern = re.compile(rb"(?:^|\n)[^#]")
+_constraint_flag_pattern = re.compile(r"-c \S*")
+_chunk_size = 2**16
+
+
+def iter_normalized_chunks(file: IO[bytes], chunk_size: int = _chunk_size) -> Iterator[bytes]:
+    """
+    Read a binary file in chunks with `CRLF` line endings normalized to `LF`
+
+    A trailing carriage return is held back until the next chunk so that
+    a `CRLF` split across two chunks is still normalized.
+    """
+    pending = b""
+    while chunk := file.read(chunk_size):
+        chunk = pending + chunk
+        if chunk.endswith(b"\r"):
+            chunk, pending = chunk[:-1], b"\r"
+        else:
+            pending = b""
+        yield chunk.replace(b"\r\n", b"\n")
+    if pending:
+        yield pending
+
+
+@dataclasses.dataclass(frozen=True)
+class LockFileContents:
+    """
+    Parsed lock file
+
+    Everything the plugin needs to know about a lock file, extracted
+    from a single read of the file.
+    """
+
+    requirements: tuple[Requirement, ...]
+    python_version: Version | None
+    constraint_sha: str | None
+    content_hash: str
+    universal: bool = False
+
+    @classmethod
+    def from_path(cls, path: pathlib.Path) -> LockFileContents:
+        """
+        Read and parse a lock file in a single pass
+
+        The content hash is computed on the raw bytes with `CRLF` line
+        endings normalized, streaming the file in chunks so memory use
+        doesn't grow with the size of the lock file. Only the header is
+        kept in memory, it is scanned line by line until the first
+        non-comment line. The header is cut at the newline before that
+        line before it's decoded, so a multibyte character split across
+        chunks is never decoded in halves.
+        """
+        digest = hashlib.sha256()
+        header = b""
+        header_complete = False
+        with path.open("rb") as lock_file:
+            for chunk in iter_normalized_chunks(lock_file):
+                digest.update(chunk)
+                if not header_complete:
+                    header += chunk
+                    header_end = _header_end_pattern.search(header)
+                    if header_end is not None:
+                        header = header[: header_end.start()]
+                        header_complete = True
+        content_hash = digest.hexdigest()
+        requirements: list[Requirement] = []
+        python_version: Version | None = None
+        constraint_sha: str | None = None
+        universal = False
+        for line in header.decode("utf-8").splitlines():
+            if line.startswith("# - "):
+                requirements.append(Requirement(line[4:]))
+            elif not line.startswith("#"):
+                break
+            elif python_version is None and (match := _python_version_pattern.match(line)):
+                python_version = Version(match.group(1))
+            elif constraint_sha is None and (match := _constraint_sha_pattern.match(line)):
+                constraint_sha = match.group(1).strip()
+            elif line == _universal_line:
+                universal = True
+        return cls(
+            requirements=tuple(requirements),
+            python_version=python_version,
+            constraint_sha=constraint_sha,
+            content_hash=content_hash,
+            universal=universal,
+        )
+
 
 class PipCompileLock(HatchPipCompileBase):
     """
     Pip Compile Lock File Operations
     """
 
+    def __init__(self, environment: PipCompileEnvironment) -> None:
+        """
+        Inject the environment and initialize the lock file cache
+        """
+        super().__init__(environment=environment)
+        self._lock_file_cache: tuple[tuple[str, int, int], LockFileContents] | None = None
+
+    def read_lock_file(self) -> LockFileContents:
+        """
+        Read the parsed lock file
+
+        The parsed lock file is cached on the instance and keyed
+        on the path, modification time and size of the lock file,
+        so it is only re-read when the file changes.
+        """
+        lock_file = self.environment.piptools_lock_file
+        stat_result = lock_file.stat()
+        cache_key = (str(lock_file), stat_result.st_mtime_ns, stat_result.st_size)
+        if self._lock_file_cache is None or self._lock_file_cache[0] != cache_key:
+            self._lock_file_cache = (cache_key, LockFileContents.from_path(lock_file))
+        return self._lock_file_cache[1]
+
+    @traced("process_lock")
     def process_lock(self, lockfile: pathlib.Path) -> None:
         """
         Post process lockfile
+
+        Universal lock files are marked in the header, along with the
+        oldest Python version they were resolved for. The lock file is
+        rewritten line by line to a temporary file next to it, which then
+        atomically replaces the original.
         """
-        version = f"{self.current_python_version.major}.{self.current_python_version.minor}"
+        python_version = self.current_python_version
+        if self.environment.universal:
+            python_version = self.environment.resolver.resolution_python_version or python_version
+        version = f"{python_version.major}.{python_version.minor}"
         raw_prefix = f"""
         #
         # This file is autogenerated by hatch-pip-compile with Python {version}
@@ -37,39 +170,43 @@ class PipCompileLock(HatchPipCompileBase):
         """
         prefix = dedent(raw_prefix).strip()
         joined_dependencies = "\n".join([f"# - {dep}" for dep in self.environment.dependencies])
-        lockfile_text = lockfile.read_text()
-        cleaned_input_file = self.replace_temporary_lockfile(lockfile_text=lockfile_text)
+        constraints_flag: str | None = None
         if self.environment.piptools_constraints_file is not None:
-            lockfile_contents = self.environment.piptools_constraints_file.read_bytes()
-            cross_platform_contents = lockfile_contents.replace(b"\r\n", b"\n")
-            constraint_sha = hashlib.sha256(cross_platform_contents).hexdigest()
+            constraint_sha = self.environment.constraint_env.piptools_lock.get_file_content_hash()
             constraints_path = self.environment.piptools_constraints_file.relative_to(
                 self.environment.root
             ).as_posix()
             constraints_line = f"# [constraints] {constraints_path} (SHA256: {constraint_sha})"
             joined_dependencies = "\n".join([constraints_line, "#", joined_dependencies])
-            cleaned_input_file = re.sub(
-                r"-c \S*",
-                lambda _: f"-c {constraints_path}",
-                cleaned_input_file,
-            )
+            constraints_flag = f"-c {constraints_path}"
+        if self.environment.universal:
+            joined_dependencies = "\n".join([_universal_line, "#", joined_dependencies])
         prefix += "\n" + joined_dependencies + "\n#"
-        new_text = prefix + "\n\n" + cleaned_input_file
-        lockfile.write_text(new_text)
+        file_descriptor, temporary_name = tempfile.mkstemp(
+            dir=lockfile.parent, prefix=f".{lockfile.name}.", suffix=".tmp"
+        )
+        temporary_path = pathlib.Path(temporary_name)
+        try:
+            with os.fdopen(file_descriptor, "w") as output_file, lockfile.open() as input_file:
+                output_file.write(prefix + "\n\n")
+                for line in input_file:
+                    cleaned_line = self.replace_temporary_lockfile(lockfile_text=line)
+                    if constraints_flag is not None:
+                        cleaned_line = _constraint_flag_pattern.sub(
+                            lambda _: constraints_flag, cleaned_line
+                        )
+                    output_file.write(cleaned_line)
+            shutil.copymode(lockfile, temporary_path)
+            os.replace(temporary_path, lockfile)
+        except BaseException:
+            temporary_path.unlink(missing_ok=True)
+            raise
 
     def read_header_requirements(self) -> list[Requirement]:
         """
         Read requirements from lock file header
         """
-        lock_file_text = self.environment.piptools_lock_file.read_text()
-        parsed_requirements = []
-        for line in lock_file_text.splitlines():
-            if line.startswith("# - "):
-                requirement = Requirement(line[4:])
-                parsed_requirements.append(requirement)
-            elif not line.startswith("#"):
-                break
-        return parsed_requirements
+        return list(self.read_lock_file().requirements)
 
     @property
     def current_python_version(self) -> Version:
@@ -78,8 +215,11 @@ class PipCompileLock(HatchPipCompileBase):
 
         In the case of running as a hatch plugin, the `virtualenv` will be set,
         otherwise it will be None and the Python version will be read differently.
+        Resolvers that run without the `virtualenv` provide the version themselves.
         """
-        if self.environment.virtual_env is not None:
+        if self.environment.resolver.venv_free:
+            return self.environment.resolver.target_python_version
+        elif self.environment.virtual_env is not None:
             return Version(self.environment.virtual_env.environment["python_version"])
         else:
             msg = "VirtualEnv is not set"
@@ -90,17 +230,13 @@ class PipCompileLock(HatchPipCompileBase):
         """
         Get lock file version
         """
-        lock_file_text = self.environment.piptools_lock_file.read_text()
-        match = re.search(
-            r"# This file is autogenerated by hatch-pip-compile with Python (.*)", lock_file_text
-        )
-        if match is None:
+        lock_file_version = self.read_lock_file().python_version
+        if lock_file_version is None:
             logger.error(
                 "[hatch-pip-compile] Non hatch-pip-compile lock file detected (%s)",
                 self.environment.piptools_lock_file.name,
             )
-            return None
-        return Version(match.group(1))
+        return lock_file_version
 
     def compare_python_versions(self, verbose: bool | None = None) -> bool:
         """
@@ -111,7 +247,11 @@ class PipCompileLock(HatchPipCompileBase):
         verbose : Optional[bool]
             Print warning if python versions are different, by default None
             which will print the warning. Used as a plugin flag.
+
+        Universal lock files match every Python version.
         """
+        if self.read_lock_file().universal:
+            return True
         lock_version = self.lock_file_version
         if lock_version is None:
             return False
@@ -156,19 +296,16 @@ class PipCompileLock(HatchPipCompileBase):
         """
         Compare SHA to the SHA on the lockfile
         """
-        lock_file_text = self.environment.piptools_lock_file.read_text()
-        match = re.search(r"# \[constraints\] \S* \(SHA256: (.*)\)", lock_file_text)
-        if match is None:
+        constraint_sha = self.read_lock_file().constraint_sha
+        if constraint_sha is None:
             return False
-        return match.group(1).strip() == sha.strip()
+        return constraint_sha == sha.strip()
 
     def get_file_content_hash(self) -> str:
         """
         Get hash of lock file
         """
-        lockfile_contents = self.environment.piptools_lock_file.read_bytes()
-        cross_platform_contents = lockfile_contents.replace(b"\r\n", b"\n")
-        return hashlib.sha256(cross_platform_contents).hexdigest()
+        return self.read_lock_file().content_hash
 
     def read_lock_requirements(self) -> list[Requirement]:
         """
@@ -182,6 +319,42 @@ class PipCompileLock(HatchPipCompileBase):
         )
         return [ireq.req for ireq in install_requirements]  # type: ignore[misc]
 
+    def select_lock_entries(self, names: set[str]) -> str:
+        """
+        Select entries from the lock file
+
+        Option lines (e.g. `--index-url`) and requirements without a name,
+        like editable installs, are always kept, along with their hashes.
+
+        Parameters
+        ----------
+        names : set[str]
+            Canonical names of the requirements to keep
+
+        Returns
+        -------
+        str
+            A requirements file with only the selected entries
+        """
+        selected_lines: list[str] = []
+        lock_text = self.environment.piptools_lock_file.read_text()
+        for line in lock_text.replace("\\\n", " ").splitlines():
+            stripped_line = " ".join(line.split())
+            if not stripped_line or stripped_line.startswith("#"):
+                continue
+            elif stripped_line.startswith("-") and not stripped_line.startswith("--hash"):
+                selected_lines.append(stripped_line)
+                continue
+            requirement_text = stripped_line.split(" --hash", 1)[0]
+            try:
+                requirement_name = canonicalize_name(Requirement(requirement_text).name)
+            except InvalidRequirement:
+                selected_lines.append(stripped_line)
+                continue
+            if requirement_name in names:
+                selected_lines.append(stripped_line)
+        return "\n".join([*selected_lines, ""])
+
     def replace_temporary_lockfile(self, lockfile_text: str) -> str:
         """
         Replace the temporary lockfile with the new lockfile
@@ -0,0 +1,114 @@
+"""
+hatch-pip-compile lock state manifest
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import pathlib
+import tempfile
+from typing import Any, ClassVar
+
+logger = logging.getLogger(__name__)
+
+
+class LockManifest:
+    """
+    Project-wide record of lock file state
+
+    The manifest is a small JSON document that records, for each environment,
+    a fingerprint of the inputs to its lock file and the resulting lock file
+    hash. A single read of the manifest is enough to tell whether every
+    environment in a project is up-to-date; a missing or corrupt manifest is
+    treated as empty so callers fall back to parsing the lock files.
+    """
+
+    schema_version: ClassVar[int] = 1
+    _instances: ClassVar[dict[pathlib.Path, LockManifest]] = {}
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """
+        Initialize the manifest for a given path
+        """
+        self.path = path
+        self._cache: tuple[list[int] | None, dict[str, dict[str, Any]]] | None = None
+
+    @classmethod
+    def for_path(cls, path: pathlib.Path) -> LockManifest:
+        """
+        Get the shared manifest instance for a path
+        """
+        if path not in cls._instances:
+            cls._instances[path] = cls(path=path)
+        return cls._instances[path]
+
+    @staticmethod
+    def stat_signature(path: pathlib.Path) -> list[int] | None:
+        """
+        Get the `[mtime_ns, size]` signature of a file, or None if it doesn't exist
+        """
+        try:
+            stat_result = path.stat()
+        except OSError:
+            return None
+        return [stat_result.st_mtime_ns, stat_result.st_size]
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """
+        Load the environment entries from disk
+        """
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.debug("[hatch-pip-compile] Ignoring corrupt lock manifest: %s", self.path)
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.schema_version:
+            return {}
+        environments = data.get("environments")
+        if not isinstance(environments, dict):
+            return {}
+        return environments
+
+    def read(self) -> dict[str, dict[str, Any]]:
+        """
+        Read the environment entries, re-reading only when the manifest changes
+        """
+        signature = self.stat_signature(self.path)
+        if self._cache is None or self._cache[0] != signature:
+            self._cache = (signature, self._load())
+        return self._cache[1]
+
+    def get(self, environment_name: str) -> dict[str, Any] | None:
+        """
+        Get the entry for an environment
+        """
+        entry = self.read().get(environment_name)
+        return entry if isinstance(entry, dict) else None
+
+    def update(self, environment_name: str, values: dict[str, Any]) -> None:
+        """
+        Merge values into the entry for an environment and write the manifest
+
+        Failure to write the manifest is never fatal, it only
+        means that the next check falls back to the lock files.
+        """
+        environments = self._load()
+        entry = environments.get(environment_name)
+        environments[environment_name] = {**(entry if isinstance(entry, dict) else {}), **values}
+        document = {"version": self.schema_version, "environments": environments}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+            )
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump(document, temp_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except OSError:
+            logger.debug("[hatch-pip-compile] Unable to write lock manifest: %s", self.path)
+            return
+        self._cache = (self.stat_signature(self.path), environments)
@@ -2,25 +2,44 @@
 hatch-pip-compile plugin
 """
 
+import contextlib
 import functools
 import hashlib
+import json
 import logging
 import os
 import pathlib
+import re
 import shutil
 import tempfile
+import weakref
+from collections import Counter
 from subprocess import CompletedProcess
-from typing import Any, ClassVar, Dict, List, Optional, Type, Union
+from typing import Any, ClassVar, Dict, Generator, List, Optional, Tuple, Type, Union
 
 import hatch.cli
+from hatch.env.plugin.interface import EnvironmentInterface
 from hatch.env.virtual import VirtualEnvironment
 from hatch.utils.platform import Platform
 from hatchling.dep.core import dependencies_in_sync
+from packaging.markers import default_environment
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
 
+from hatch_pip_compile.cache import ResolutionCache
+from hatch_pip_compile.clone import (
+    VenvIndex,
+    clone_distributions,
+    find_site_packages,
+    get_distribution_names,
+)
 from hatch_pip_compile.exceptions import HatchPipCompileError
 from hatch_pip_compile.installer import PipInstaller, PipSyncInstaller, PluginInstaller, UvInstaller
 from hatch_pip_compile.lock import PipCompileLock
+from hatch_pip_compile.manifest import LockManifest
 from hatch_pip_compile.resolver import BaseResolver, PipCompileResolver, UvResolver
+from hatch_pip_compile.trace import PhaseTracer, traced
+from hatch_pip_compile.wheelhouse import Wheelhouse, WheelhouseTarget
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +60,12 @@ class PipCompileEnvironment(VirtualEnvironment):
         "pip-sync": PipSyncInstaller,
         "uv": UvInstaller,
     }
+    dependency_hash_stats: ClassVar[Counter] = Counter()
+    environment_registry: ClassVar[
+        "weakref.WeakKeyDictionary[Any, Dict[Tuple[str, ...], PipCompileEnvironment]]"
+    ] = weakref.WeakKeyDictionary()
+    project_config_files: ClassVar[List[str]] = ["pyproject.toml", "hatch.toml"]
+    _cache_input_placeholder: ClassVar[str] = "-r {hatch-pip-compile-input}"
 
     def __repr__(self):
         """
@@ -55,10 +80,11 @@ class PipCompileEnvironment(VirtualEnvironment):
         super().__init__(*args, **kwargs)
         lock_filename_config = self.config.get("lock-filename")
         if lock_filename_config is None:
-            if self.name == self.default_env_name:
+            lock_name = self.matrix_template if self.universal else self.name
+            if lock_name == self.default_env_name:
                 lock_filename = "requirements.txt"
             else:
-                lock_filename = f"requirements/requirements-{self.name}.txt"
+                lock_filename = f"requirements/requirements-{lock_name}.txt"
         else:
             with self.metadata.context.apply_context(self.context):
                 lock_filename = self.metadata.context.format(lock_filename_config)
@@ -80,8 +106,16 @@ class PipCompileEnvironment(VirtualEnvironment):
             raise HatchPipCompileError(msg)
         resolver_class = self.dependency_resolvers[resolve_method]
         installer_class = self.dependency_installers[install_method]
+        for uv_option in ["pip-compile-venv-free", "pip-compile-universal"]:
+            if self.config.get(uv_option, False) is True and resolve_method != "uv":
+                msg = f"{uv_option} requires the uv pip-compile-resolver"
+                raise HatchPipCompileError(msg)
         self.resolver: BaseResolver = resolver_class(environment=self)
         self.installer: PluginInstaller = installer_class(environment=self)
+        self.lock_only = False
+        self.venv_created = False
+        self._lock_file_current: Optional[Tuple[Any, bool]] = None
+        self._lockfile_up_to_date: Optional[Tuple[Any, bool]] = None
 
     @staticmethod
     def get_option_types() -> Dict[str, Any]:
@@ -92,29 +126,126 @@ class PipCompileEnvironment(VirtualEnvironment):
             "lock-filename": str,
             "pip-compile-hashes": bool,
             "pip-compile-args": list,
+            "pip-compile-cache": bool,
+            "pip-compile-clone": bool,
             "pip-compile-constraint": str,
+            "pip-compile-daemon": bool,
+            "pip-compile-incremental-install": bool,
             "pip-compile-installer": str,
             "pip-compile-install-args": list,
+            "pip-compile-offline": bool,
+            "pip-compile-paranoid-sync": bool,
             "pip-compile-resolver": str,
+            "pip-compile-shared-toolchain": bool,
+            "pip-compile-trace": str,
+            "pip-compile-universal": bool,
+            "pip-compile-uv-path": str,
+            "pip-compile-venv-free": bool,
+            "pip-compile-wheelhouse": bool,
         }
 
+    @traced("dependency_hash")
     def dependency_hash(self) -> str:
         """
         Get the dependency hash
+
+        When the dependencies, the lock file and the constraint lock file
+        are unchanged since the last call, the hash recorded in the lock
+        manifest is returned without running `pip-compile`.
         """
+        entry = self.lock_manifest.get(self.name)
+        if (
+            entry is not None
+            and not self.force_upgrade
+            and entry.get("dependency_fingerprint") == self.dependency_fingerprint
+        ):
+            self.dependency_hash_stats["fast"] += 1
+            logger.debug(
+                "[hatch-pip-compile] Reusing dependency hash for %s (fast path %d/%d)",
+                self.name,
+                self.dependency_hash_stats["fast"],
+                sum(self.dependency_hash_stats.values()),
+            )
+            return entry["dependency_hash"]
+        self.dependency_hash_stats["full"] += 1
         self.run_pip_compile()
         hatch_hash = super().dependency_hash()
         if not self.dependencies:
-            return hatch_hash
+            dependency_hash = hatch_hash
         else:
             lockfile_hash = self.piptools_lock.get_file_content_hash()
-            return hashlib.sha256(f"{hatch_hash}-{lockfile_hash}".encode()).hexdigest()
+            dependency_hash = hashlib.sha256(f"{hatch_hash}-{lockfile_hash}".encode()).hexdigest()
+        self.lock_manifest.update(
+            self.name,
+            {
+                "dependency_fingerprint": self.dependency_fingerprint,
+                "dependency_hash": dependency_hash,
+            },
+        )
+        return dependency_hash
 
-    def run_pip_compile(self) -> None:
+    @property
+    def dependency_fingerprint(self) -> str:
+        """
+        Get a fingerprint of the dependencies and lock files behind `dependency_hash`
+
+        The constraint environment's lock inputs are included, so a change
+        to its dependencies is picked up even when this environment
+        doesn't inherit them.
+        """
+        constraint_stat = None
+        constraint_inputs = None
+        if self.piptools_constraints_file is not None:
+            constraint_stat = LockManifest.stat_signature(self.piptools_constraints_file)
+            constraint_inputs = self.constraint_env.lock_inputs_hash
+        fingerprint = {
+            "dependencies": self.dependencies,
+            "lock_stat": LockManifest.stat_signature(self.piptools_lock_file),
+            "constraint_stat": constraint_stat,
+            "constraint_inputs": constraint_inputs,
+        }
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+    @property
+    def force_upgrade(self) -> bool:
+        """
+        Whether an upgrade or a forced lock was requested through the environment
+        """
+        return any(
+            [
+                bool(os.getenv("PIP_COMPILE_UPGRADE")),
+                bool(os.getenv("PIP_COMPILE_UPGRADE_PACKAGE")),
+                bool(os.getenv("__PIP_COMPILE_FORCE__")),
+            ]
+        )
+
+    @traced("run_pip_compile")
+    def run_pip_compile(self, lock_only: bool = False) -> None:
         """
         Run pip-compile if necessary
+
+        Parameters
+        ----------
+        lock_only : bool
+            Only lock the environment instead of preparing it: dependencies
+            aren't synced, the project isn't installed and the resolver runs
+            from a toolchain environment, so the virtualenv's site-packages
+            are left untouched. A virtualenv that doesn't exist yet is only
+            created for the duration of the lock. Constraint environments are
+            locked the same way. Defaults to False.
+        """
+        if lock_only:
+            self.lock_only = True
+            with self.lock_only_virtualenv():
+                self.lock_dependencies()
+        else:
+            self.prepare_environment()
+            self.lock_dependencies()
+
+    def lock_dependencies(self) -> None:
+        """
+        Run pip-compile if the lock file isn't up-to-date
         """
-        self.prepare_environment()
         if not self.lockfile_up_to_date:
             with self.safe_activation():
                 self.resolver.install_pypi_dependencies()
@@ -124,6 +255,36 @@ class PipCompileEnvironment(VirtualEnvironment):
                     )
                 self.pip_compile_cli()
 
+    @contextlib.contextmanager
+    def lock_only_virtualenv(self) -> Generator[None, None, None]:
+        """
+        Create a missing virtualenv for a lock-only run and remove it afterwards
+
+        The resolver needs the virtualenv's interpreter, but a virtualenv that
+        outlives the lock would look prepared to hatch even though its
+        dependencies and the project were never installed. Resolvers that run
+        without the virtualenv don't create it at all.
+        """
+        if self.virtualenv_exists() or self.resolver.venv_free:
+            yield
+            return
+        self.create()
+        try:
+            yield
+        finally:
+            self.discard_virtualenv()
+
+    def discard_virtualenv(self) -> None:
+        """
+        Remove the virtualenv, along with what's cached about its interpreter
+        """
+        self.virtual_env.remove()
+        self.virtual_env = type(self.virtual_env)(
+            self.virtual_env.directory, self.platform, self.verbosity
+        )
+        self.venv_created = False
+
+    @traced("pip_compile_cli")
     def pip_compile_cli(self) -> None:
         """
         Run pip-compile
@@ -132,44 +293,222 @@ class PipCompileEnvironment(VirtualEnvironment):
             self.piptools_lock_file.unlink(missing_ok=True)
             self.lockfile_up_to_date = True
             return
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = pathlib.Path(tmpdir)
+            cmd = self.prepare_pip_compile(tmp_path=tmp_path)
+            if cmd is not None:
+                self.resolver.resolve(cmd)
+            self.finish_pip_compile(tmp_path=tmp_path, resolved=cmd is not None)
+
+    def prepare_pip_compile(self, tmp_path: pathlib.Path) -> Optional[List[str]]:
+        """
+        Write the resolver input into a temporary directory
+
+        Returns
+        -------
+        Optional[List[str]]
+            The resolver command to run, None when the resolver
+            output was restored from the resolution cache
+        """
         no_compile = bool(os.getenv("PIP_COMPILE_DISABLE"))
         if no_compile:
             msg = "hatch-pip-compile is disabled but attempted to run a lockfile update."
             raise HatchPipCompileError(msg)
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp_path = pathlib.Path(tmpdir)
-            input_file = tmp_path / f"{self.name}.in"
-            output_file = tmp_path / "lock.txt"
-            input_file.write_text("\n".join([*self.dependencies, ""]))
-            if self.piptools_lock_file.exists():
-                shutil.copy(self.piptools_lock_file, output_file)
-            self.piptools_lock_file.parent.mkdir(exist_ok=True, parents=True)
-            cmd = self.resolver.get_pip_compile_args(
-                input_file=input_file,
-                output_file=output_file,
+        input_file = tmp_path / f"{self.name}.in"
+        output_file = tmp_path / "lock.txt"
+        input_file.write_text("\n".join([*self.dependencies, ""]))
+        if self.piptools_lock_file.exists():
+            shutil.copy(self.piptools_lock_file, output_file)
+        self.piptools_lock_file.parent.mkdir(exist_ok=True, parents=True)
+        cache_key = self.resolution_cache_key
+        cached_output = None
+        if cache_key is not None:
+            cached_output = self.resolution_cache.get(cache_key)
+        if cached_output is not None:
+            output_file.write_text(
+                cached_output.replace(self._cache_input_placeholder, f"-r {input_file}")
             )
-            self.plugin_check_command(cmd)
-            self.piptools_lock.process_lock(lockfile=output_file)
-            shutil.move(output_file, self.piptools_lock_file)
+            return None
+        return self.resolver.get_pip_compile_args(
+            input_file=input_file,
+            output_file=output_file,
+        )
+
+    def finish_pip_compile(self, tmp_path: pathlib.Path, resolved: bool) -> None:
+        """
+        Cache, post-process and move the resolver output into place
+
+        Parameters
+        ----------
+        tmp_path : pathlib.Path
+            The temporary directory passed to `prepare_pip_compile`
+        resolved : bool
+            Whether the resolver ran, rather than the output coming from the cache
+        """
+        output_file = tmp_path / "lock.txt"
+        cache_key = self.resolution_cache_key
+        if resolved and cache_key is not None:
+            self.resolution_cache.set(
+                cache_key,
+                re.sub(
+                    rf"-r \S*{re.escape(self.name)}\.in",
+                    lambda _: self._cache_input_placeholder,
+                    output_file.read_text(),
+                ),
+            )
+        self.piptools_lock.process_lock(lockfile=output_file)
+        shutil.move(output_file, self.piptools_lock_file)
         self.lockfile_up_to_date = True
+        self.record_lock_state()
+
+    @functools.cached_property
+    def tracer(self) -> PhaseTracer:
+        """
+        Get the phase tracer, enabled by `PIP_COMPILE_TRACE` or `pip-compile-trace`
+        """
+        return PhaseTracer.from_environment(self)
+
+    @functools.cached_property
+    def resolution_cache(self) -> ResolutionCache:
+        """
+        Get the resolution cache shared by all environments
+        """
+        return ResolutionCache.from_data_directory(self.isolated_data_directory)
+
+    @property
+    def offline(self) -> bool:
+        """
+        Whether to lock and install without network access
+
+        Enabled with `pip-compile-offline` or the `PIP_COMPILE_OFFLINE` environment variable.
+        """
+        return (
+            bool(os.getenv("PIP_COMPILE_OFFLINE"))
+            or self.config.get("pip-compile-offline", False) is True
+        )
 
+    @functools.cached_property
+    def wheelhouse(self) -> Wheelhouse:
+        """
+        Get the wheelhouse shared by all environments
+        """
+        return Wheelhouse.from_data_directory(self.isolated_data_directory)
+
+    @property
+    def wheelhouse_target(self) -> WheelhouseTarget:
+        """
+        Get the interpreter and platform the environment's pins are fetched for
+
+        Without a virtualenv the target is the interpreter hatch would
+        create it with: the plugin's own, at the version of a `python`
+        option like `3.12`.
+        """
+        if self.resolver.venv_free or self.virtualenv_exists():
+            return WheelhouseTarget.from_markers(self.resolver.marker_environment)
+        markers = {name: str(value) for name, value in default_environment().items()}
+        python_version = re.fullmatch(r"(\d+)\.(\d+)", str(self.config.get("python", "")))
+        if python_version is not None:
+            markers["python_version"] = python_version.group(0)
+        return WheelhouseTarget.from_markers(markers)
+
+    @property
+    def resolution_cache_key(self) -> Optional[str]:
+        """
+        Get the resolution cache key for the current resolver inputs
+
+        Returns None when the cache is disabled or an upgrade was
+        requested, since an upgrade must always reach the resolver.
+        """
+        if self.config.get("pip-compile-cache", False) is not True:
+            return None
+        elif os.getenv("PIP_COMPILE_UPGRADE") or os.getenv("PIP_COMPILE_UPGRADE_PACKAGE"):
+            return None
+        canonical_dependencies = []
+        for dependency in self.dependencies_complex:
+            requirement = Requirement(str(dependency))
+            requirement.name = canonicalize_name(requirement.name)
+            canonical_dependencies.append(str(requirement))
+        constraint_sha = None
+        if self.piptools_constraints_file is not None:
+            constraint_sha = self.constraint_env.current_lock_hash()
+        previous_pins = None
+        if self.piptools_lock_file.exists():
+            pinned_lines = [
+                line
+                for line in self.piptools_lock_file.read_text().splitlines()
+                if line and not line.startswith(("#", " "))
+            ]
+            previous_pins = hashlib.sha256("\n".join(pinned_lines).encode()).hexdigest()
+        resolver_class = type(self.resolver)
+        return ResolutionCache.get_key(
+            {
+                "dependencies": sorted(canonical_dependencies),
+                "python": str(self.piptools_lock.current_python_version),
+                "markers": self.resolver.marker_environment,
+                "resolver": f"{resolver_class.__module__}.{resolver_class.__qualname__}",
+                "args": self.config.get("pip-compile-args", []),
+                "hashes": self.config.get("pip-compile-hashes", False),
+                "constraint_sha": constraint_sha,
+                "previous_pins": previous_pins,
+            }
+        )
+
+    @traced("install_project")
     def install_project(self) -> None:
         """
         Install the project (`--no-deps`)
         """
         self.installer.install_project()
 
+    @traced("install_project_dev_mode")
     def install_project_dev_mode(self) -> None:
         """
         Install the project in editable mode (`--no-deps`)
         """
         self.installer.install_project_dev_mode()
 
-    @functools.cached_property
+    @property
     def lockfile_up_to_date(self) -> bool:
         """
         Check if the lockfile is up-to-date
 
+        The result is memoized on `lockfile_state`, so an environment
+        shared through the `environment_registry` notices lock files
+        that changed since it was last checked.
+        """
+        lockfile_state = self.lockfile_state
+        if self._lockfile_up_to_date is None or self._lockfile_up_to_date[0] != lockfile_state:
+            self._lockfile_up_to_date = (lockfile_state, self.check_lockfile_up_to_date())
+        return self._lockfile_up_to_date[1]
+
+    @lockfile_up_to_date.setter
+    def lockfile_up_to_date(self, value: bool) -> None:
+        """
+        Record that the lockfile is, or isn't, up-to-date as of now
+        """
+        self._lockfile_up_to_date = (self.lockfile_state, value)
+
+    @property
+    def lockfile_state(self) -> Tuple[Any, ...]:
+        """
+        Get the state `lockfile_up_to_date` is memoized on
+
+        The stat signatures of the lock file and the constraint lock file,
+        and whether an upgrade was requested.
+        """
+        constraint_stat = None
+        if self.piptools_constraints_file is not None:
+            constraint_stat = LockManifest.stat_signature(self.piptools_constraints_file)
+        return (
+            LockManifest.stat_signature(self.piptools_lock_file),
+            constraint_stat,
+            self.force_upgrade,
+        )
+
+    def check_lockfile_up_to_date(self) -> bool:
+        """
+        Check if the lockfile is up-to-date, without memoizing the result
+
         Behavior
         --------
         1) If there are no dependencies and no lock file, exit early and return True.
@@ -184,17 +523,14 @@ class PipCompileEnvironment(VirtualEnvironment):
             c) If the lock file dependencies are current but the lockfile
                has a different sha than its constraints file, return False.
         7) Otherwise, return True.
+
+        Raises
+        ------
+        HatchPipCompileError
+            If the entries of a universal matrix have different dependencies
         """
-        upgrade = os.getenv("PIP_COMPILE_UPGRADE") or False
-        upgrade_packages = os.getenv("PIP_COMPILE_UPGRADE_PACKAGE") or False
-        pip_compile_force = bool(os.getenv("__PIP_COMPILE_FORCE__"))
-        force_upgrade = any(
-            [
-                upgrade is not False,
-                upgrade_packages is not False,
-                pip_compile_force is not False,
-            ]
-        )
+        self.check_universal_dependencies()
+        force_upgrade = self.force_upgrade
         if not self.dependencies and not self.piptools_lock_file.exists():
             return True
         if self.piptools_constraints_file:
@@ -210,8 +546,10 @@ class PipCompileEnvironment(VirtualEnvironment):
         elif self.dependencies and not self.piptools_lock_file.exists():
             return False
         elif self.dependencies and self.piptools_lock_file.exists():
+            if self.lock_state_matches_manifest():
+                return True
             if self.piptools_constraints_file:
-                current_sha = self.constraint_env.piptools_lock.get_file_content_hash()
+                current_sha = self.constraint_env.current_lock_hash()
                 sha_match = self.piptools_lock.compare_constraint_sha(sha=current_sha)
                 if sha_match is False:
                     return False
@@ -220,28 +558,370 @@ class PipCompileEnvironment(VirtualEnvironment):
             )
             if not expected_dependencies:
                 return False
+            self.record_lock_state()
         return True
 
+    def check_lock_file(self) -> List[str]:
+        """
+        Check whether the lock file is up-to-date without locking anything
+
+        The same checks as `lockfile_up_to_date`, but read-only: no virtualenv
+        is created, no resolver runs and the constraint environment isn't
+        locked when it's out of date. Python versions aren't compared since
+        that requires the virtualenv.
+
+        Returns
+        -------
+        List[str]
+            The reasons the lock file is out of date, empty when it's up-to-date
+
+        Raises
+        ------
+        HatchPipCompileError
+            If the entries of a universal matrix have different dependencies
+        """
+        self.check_universal_dependencies()
+        if not self.dependencies:
+            if self.piptools_lock_file.exists():
+                return ["the environment has no dependencies but has a lock file"]
+            return []
+        elif not self.piptools_lock_file.exists():
+            return [f"the lock file is missing: {self.piptools_lock_file}"]
+        elif self.lock_state_matches_manifest():
+            return []
+        problems = []
+        if self.piptools_lock.lock_file_version is None:
+            problems.append("the lock file has no hatch-pip-compile header")
+        constraints_file = self.piptools_constraints_file
+        if constraints_file is not None:
+            if not constraints_file.exists():
+                problems.append(f"the constraint lock file is missing: {constraints_file}")
+            elif not self.piptools_lock.compare_constraint_sha(
+                sha=self.constraint_env.current_lock_hash()
+            ):
+                problems.append(
+                    f"the constraint SHA doesn't match the {self.constraint_env.name} lock file"
+                )
+        if not self.piptools_lock.compare_requirements(requirements=self.dependencies_complex):
+            problems.append("the dependencies don't match the lock file")
+        return problems
+
+    @functools.cached_property
+    def lock_manifest(self) -> LockManifest:
+        """
+        Get the lock state manifest shared by all environments of the project
+        """
+        project_id = hashlib.sha256(str(self.root).encode()).hexdigest()[:16]
+        manifest_path = (
+            self.isolated_data_directory / ".pip-compile" / "manifests" / f"{project_id}.json"
+        )
+        return LockManifest.for_path(manifest_path)
+
+    @property
+    def lock_inputs_hash(self) -> str:
+        """
+        Get a fingerprint of everything that goes into resolving the lock file
+        """
+        constraint_sha = None
+        if self.piptools_constraints_file and self.piptools_constraints_file.exists():
+            constraint_sha = self.constraint_env.current_lock_hash()
+        lock_inputs = {
+            "dependencies": sorted(self.dependencies),
+            "python": self.config.get("python", ""),
+            "resolver": self.config.get("pip-compile-resolver", "pip-compile"),
+            "args": self.config.get("pip-compile-args", []),
+            "hashes": self.config.get("pip-compile-hashes", False),
+            "constraint_sha": constraint_sha,
+        }
+        return hashlib.sha256(json.dumps(lock_inputs, sort_keys=True).encode()).hexdigest()
+
+    def current_lock_hash(self) -> str:
+        """
+        Get the content hash of the lock file
+
+        The hash is read from the lock manifest when the lock file
+        hasn't changed since it was recorded, otherwise the lock file is read.
+        """
+        entry = self.lock_manifest.get(self.name)
+        if entry is not None and entry.get("lock_stat") == LockManifest.stat_signature(
+            self.piptools_lock_file
+        ):
+            return entry["lock_hash"]
+        return self.piptools_lock.get_file_content_hash()
+
+    def lock_state_matches_manifest(self) -> bool:
+        """
+        Whether the lock manifest says this environment's lock file is up-to-date
+        """
+        entry = self.lock_manifest.get(self.name)
+        if entry is None:
+            return False
+        elif entry.get("lock_stat") != LockManifest.stat_signature(self.piptools_lock_file):
+            return False
+        return entry.get("inputs") == self.lock_inputs_hash
+
+    def record_lock_state(self) -> None:
+        """
+        Record the current lock file state in the lock manifest
+        """
+        lock_stat = LockManifest.stat_signature(self.piptools_lock_file)
+        if lock_stat is None:
+            return
+        self.lock_manifest.update(
+            self.name,
+            {
+                "inputs": self.lock_inputs_hash,
+                "lock_hash": self.piptools_lock.get_file_content_hash(),
+                "lock_stat": lock_stat,
+            },
+        )
+
+    @traced("dependencies_in_sync")
     def dependencies_in_sync(self):
         """
         Whether the dependencies are in sync
+
+        The sync state marker the installers write into the virtualenv is
+        checked first, the installed distributions are only scanned when
+        the marker is missing or `pip-compile-paranoid-sync` is enabled.
         """
         if not self.lockfile_up_to_date:
             return False
-        else:
-            with self.safe_activation():
-                return dependencies_in_sync(
-                    self.piptools_lock.read_lock_requirements(),
-                    sys_path=self.virtual_env.sys_path,
-                    environment=self.virtual_env.environment,
-                )
+        paranoid = self.config.get("pip-compile-paranoid-sync", False) is True
+        sync_marker = None if paranoid else self.installer.read_sync_marker()
+        if sync_marker is not None:
+            return sync_marker == self.installer.sync_state
+        in_sync = self.installed_dependencies_in_sync()
+        if in_sync:
+            self.installer.write_sync_marker()
+        return in_sync
 
+    def installed_dependencies_in_sync(self) -> bool:
+        """
+        Whether the installed distributions satisfy the lock file
+        """
+        with self.safe_activation():
+            return dependencies_in_sync(
+                self.piptools_lock.read_lock_requirements(),
+                sys_path=self.virtual_env.sys_path,
+                environment=self.virtual_env.environment,
+            )
+
+    @traced("sync_dependencies")
     def sync_dependencies(self) -> None:
         """
         Sync dependencies
+
+        With `pip-compile-clone` a freshly created virtualenv is populated
+        from a virtualenv with the same interpreter and lock file when
+        there is one, the installer only runs when that isn't possible.
         """
         self.run_pip_compile()
-        self.installer.sync_dependencies()
+        if not self.clone_dependencies():
+            self.installer.sync_dependencies()
+        venv_index_key = self.venv_index_key
+        if venv_index_key is not None:
+            self.venv_index.register(venv_index_key, pathlib.Path(self.virtual_env.directory))
+
+    def create(self) -> None:
+        """
+        Create the virtualenv, remembering that it's new
+        """
+        super().create()
+        self.venv_created = True
+
+    @functools.cached_property
+    def venv_index(self) -> VenvIndex:
+        """
+        Get the index of built virtualenvs shared by all environments
+        """
+        return VenvIndex.from_data_directory(self.isolated_data_directory)
+
+    @property
+    def venv_index_key(self) -> Optional[str]:
+        """
+        Get the virtualenv index key of this environment
+
+        The key combines the lock file content hash with the environment
+        markers and base interpreter of the virtualenv. None when
+        `pip-compile-clone` is disabled, on Windows, where console script
+        launchers embed the interpreter path, or without a lock file.
+        """
+        if self.config.get("pip-compile-clone", False) is not True or self.platform.windows:
+            return None
+        elif not self.piptools_lock_file.exists() or not self.virtualenv_exists():
+            return None
+        pyvenv_cfg = pathlib.Path(self.virtual_env.directory) / "pyvenv.cfg"
+        try:
+            pyvenv_lines = pyvenv_cfg.read_text().splitlines()
+        except OSError:
+            return None
+        base_interpreter = {
+            key.strip(): value.strip()
+            for key, _, value in (line.partition("=") for line in pyvenv_lines)
+            if key.strip() in {"home", "version", "version_info", "implementation"}
+        }
+        with self.safe_activation():
+            markers = self.virtual_env.environment
+        return VenvIndex.get_key(
+            interpreter={"base": base_interpreter, "markers": markers},
+            lock_hash=self.current_lock_hash(),
+        )
+
+    @property
+    def site_packages_directory(self) -> Optional[pathlib.Path]:
+        """
+        The `site-packages` directory of the virtualenv
+        """
+        with self.safe_activation():
+            return find_site_packages(
+                pathlib.Path(self.virtual_env.directory), self.virtual_env.sys_path
+            )
+
+    @property
+    def scripts_directory(self) -> pathlib.Path:
+        """
+        The scripts directory of the virtualenv, relative to the virtualenv
+        """
+        return pathlib.Path(self.virtual_env.executables_directory).relative_to(
+            self.virtual_env.directory
+        )
+
+    @traced("clone_dependencies")
+    def clone_dependencies(self) -> bool:
+        """
+        Populate a new virtualenv from an existing one with an identical lock
+
+        The distributions of the indexed virtualenv are hardlinked into this
+        one, except for those already installed here, like `pip` or the
+        project itself. The clone is only kept as the sync result when the
+        installed distributions then satisfy the lock file.
+
+        Returns
+        -------
+        bool
+            Whether the dependencies are in sync after cloning
+        """
+        venv_index_key = self.venv_index_key
+        if venv_index_key is None or not self.venv_created:
+            return False
+        venv_directory = pathlib.Path(self.virtual_env.directory)
+        source_directory = self.venv_index.get(venv_index_key)
+        if source_directory is None or source_directory == venv_directory:
+            return False
+        source_marker = self.installer.read_sync_marker(directory=source_directory)
+        if source_marker is None or source_marker.get("lock_hash") != self.current_lock_hash():
+            return False
+        site_packages = self.site_packages_directory
+        if site_packages is None:
+            return False
+        skip = get_distribution_names(site_packages)
+        skip.add(canonicalize_name(self.metadata.name))
+        try:
+            cloned = clone_distributions(
+                source_root=source_directory,
+                source_site_packages=source_directory / site_packages.relative_to(venv_directory),
+                target_root=venv_directory,
+                scripts_directory=str(self.scripts_directory),
+                skip=skip,
+            )
+        except (OSError, HatchPipCompileError) as e:
+            logger.warning("[hatch-pip-compile] Unable to clone %s: %s", source_directory, e)
+            return False
+        if not self.installed_dependencies_in_sync():
+            return False
+        logger.info("[hatch-pip-compile] Cloned %s files from %s", cloned, source_directory)
+        self.installer.write_sync_marker()
+        return True
+
+    @property
+    def universal(self) -> bool:
+        """
+        Whether the environment shares a universal lock file with its matrix
+        """
+        return self.config.get("pip-compile-universal", False) is True
+
+    @staticmethod
+    def get_matrix_template(environment_name: str, environment_dict: Dict[str, Any]) -> str:
+        """
+        Get the name of the environment an environment was generated from
+
+        hatch names matrix environments `<template>.<variables>`, except
+        for the `default` template whose matrix environments are named
+        `<variables>`. Environments outside of a matrix are their own template.
+        """
+        if environment_name in environment_dict:
+            return environment_name
+        template, _, _ = environment_name.partition(".")
+        if template in environment_dict and "matrix" in environment_dict[template]:
+            return template
+        return PipCompileEnvironment.default_env_name
+
+    @property
+    def matrix_template(self) -> str:
+        """
+        Get the name of the environment this environment was generated from
+        """
+        return self.get_matrix_template(self.name, self.pipools_environment_dict)
+
+    @property
+    def matrix_environment_names(self) -> List[str]:
+        """
+        Get the names of every entry of the environment's matrix
+
+        Matrices are only expanded by a hatch `Application`,
+        outside of one there are no entries.
+        """
+        if not isinstance(self.app, hatch.cli.Application):
+            return []
+        matrix = self.app.project.config.matrices.get(self.matrix_template, {})
+        return [
+            environment_name
+            for environment_name in matrix.get("envs", {})
+            if environment_name in self.app.project.config.envs
+        ]
+
+    def check_universal_dependencies(self) -> None:
+        """
+        Make sure every entry of a universal matrix has the same dependencies
+
+        The entries share a single lockfile, entries with different
+        dependencies would overwrite each other's lockfile on every run.
+
+        Raises
+        ------
+        HatchPipCompileError
+            If an entry of the matrix has different dependencies
+        """
+        if not self.universal:
+            return
+        dependencies = sorted(str(dependency) for dependency in self.dependencies_complex)
+        for environment_name in self.matrix_environment_names:
+            if environment_name == self.name:
+                continue
+            environment = self.app.get_environment(env_name=environment_name)
+            entry_dependencies = sorted(
+                str(dependency) for dependency in environment.dependencies_complex
+            )
+            if entry_dependencies != dependencies:
+                msg = (
+                    f"[hatch-pip-compile] The {self.matrix_template} matrix shares a universal "
+                    f"lockfile, but {self.name} and {environment_name} have different "
+                    "dependencies. Disable pip-compile-universal or give every entry "
+                    "the same dependencies."
+                )
+                raise HatchPipCompileError(msg)
+
+    @property
+    def matrix_python_versions(self) -> List[str]:
+        """
+        Get the Python versions of every entry of the environment's matrix
+        """
+        template_config = self.pipools_environment_dict.get(self.matrix_template, {})
+        python_versions = []
+        for matrix_entry in template_config.get("matrix", []):
+            python_versions.extend(matrix_entry.get("python", matrix_entry.get("py", [])))
+        return python_versions
 
     @property
     def piptools_constraints_file(self) -> Optional[pathlib.Path]:
@@ -253,18 +933,60 @@ class PipCompileEnvironment(VirtualEnvironment):
         else:
             return self.constraint_env.piptools_lock_file
 
-    def get_piptools_environment(self, environment_name: str) -> "PipCompileEnvironment":
+    def get_piptools_environment(self, environment_name: str) -> "EnvironmentInterface":
         """
         Get a `PipCompileEnvironment` instance for an environment
         other than the current instance. This is useful
         for recursively checking other environments for lock file
         validity and defining inheritance.
+
+        Instances are shared through the `environment_registry`, which
+        is scoped to the hatch `Application`, or to the project metadata
+        outside of one, and keyed on the project, the environment and the
+        project's configuration, so a later run in the same process never
+        gets a stale environment.
         """
         if environment_name not in self.pipools_environment_dict.keys():
             error_message = (
                 f"[hatch-pip-compile] The environment {environment_name} does not exist."
             )
             raise HatchPipCompileError(error_message)
+        registry_scope = self.app if isinstance(self.app, hatch.cli.Application) else self.metadata
+        registry = self.environment_registry.setdefault(registry_scope, {})
+        registry_key = (str(self.root), environment_name, self.project_fingerprint)
+        shared_env = registry.get(registry_key)
+        if shared_env is not None:
+            return shared_env
+        env = self._build_piptools_environment(environment_name=environment_name)
+        if isinstance(env, PipCompileEnvironment):
+            registry[registry_key] = env
+        return env
+
+    @property
+    def project_fingerprint(self) -> str:
+        """
+        Get a fingerprint of the project's configuration
+
+        This covers the environment configuration, the project's
+        dependencies and the stat signatures of its configuration files.
+        """
+        fingerprint_inputs = {
+            "envs": self.pipools_environment_dict,
+            "dependencies": self.metadata.core.dependencies,
+            "optional_dependencies": self.metadata.core.optional_dependencies,
+            "files": {
+                file_name: LockManifest.stat_signature(self.root / file_name)
+                for file_name in self.project_config_files
+            },
+        }
+        return hashlib.sha256(
+            json.dumps(fingerprint_inputs, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _build_piptools_environment(self, environment_name: str) -> "EnvironmentInterface":
+        """
+        Build a new environment instance for another environment
+        """
         if isinstance(self.app, hatch.cli.Application):
             env = self.app.get_environment(env_name=environment_name)
         else:
@@ -286,6 +1008,40 @@ class PipCompileEnvironment(VirtualEnvironment):
     def constraint_env(self) -> "PipCompileEnvironment":
         """
         Get the constraint environment
+
+        The whole constraint chain is walked once, so a cycle is reported
+        instead of recursing forever.
+        """
+        _ = self.constraint_chain
+        return self.direct_constraint_env
+
+    @property
+    def constraint_chain(self) -> List["PipCompileEnvironment"]:
+        """
+        Get the constraint environments this environment depends on, closest first
+
+        Raises
+        ------
+        HatchPipCompileError
+            If the constraint environments form a cycle
+        """
+        chain: List[PipCompileEnvironment] = []
+        environment = self
+        while True:
+            constraint = environment.direct_constraint_env
+            if constraint is environment:
+                return chain
+            elif constraint.name in {self.name, *(env.name for env in chain)}:
+                cycle = " -> ".join([self.name, *(env.name for env in chain), constraint.name])
+                msg = f"[hatch-pip-compile] Constraint environments form a cycle: {cycle}"
+                raise HatchPipCompileError(msg)
+            chain.append(constraint)
+            environment = constraint
+
+    @functools.cached_property
+    def direct_constraint_env(self) -> "PipCompileEnvironment":
+        """
+        Get the environment named by `pip-compile-constraint`, without checking for cycles
         """
         constraint_env = self.config.get("pip-compile-constraint")
         if not constraint_env:
@@ -293,7 +1049,10 @@ class PipCompileEnvironment(VirtualEnvironment):
         elif self.name == constraint_env:
             return self
         environment = self.get_piptools_environment(environment_name=constraint_env)
-        if environment.config.get("type") != self.PLUGIN_NAME:
+        if (
+            not isinstance(environment, PipCompileEnvironment)
+            or environment.config.get("type") != self.PLUGIN_NAME
+        ):
             logger.error("The constraint environment is not a hatch-pip-compile environment.")
             return self
         elif not environment.dependencies:
@@ -320,17 +1079,29 @@ class PipCompileEnvironment(VirtualEnvironment):
             Whether the constraints file is valid
         """
         if not constraints_file.exists():
-            self.constraint_env.run_pip_compile()
+            self.constraint_env.run_pip_compile(lock_only=self.lock_only)
+            return False
+        elif not environment.lock_file_current:
+            self.constraint_env.run_pip_compile(lock_only=self.lock_only)
             return False
-        else:
-            up_to_date = environment.piptools_lock.compare_requirements(
-                requirements=environment.dependencies_complex
-            )
-            if not up_to_date:
-                self.constraint_env.run_pip_compile()
-                return False
         return True
 
+    @property
+    def lock_file_current(self) -> bool:
+        """
+        Whether the lock file matches the environment's dependencies
+
+        The result is memoized on the lock file's stat signature, so an
+        environment shared by many dependents is only checked once.
+        """
+        lock_stat = LockManifest.stat_signature(self.piptools_lock_file)
+        if self._lock_file_current is None or self._lock_file_current[0] != lock_stat:
+            lock_file_current = self.lock_state_matches_manifest() or (
+                self.piptools_lock.compare_requirements(requirements=self.dependencies_complex)
+            )
+            self._lock_file_current = (lock_stat, lock_file_current)
+        return self._lock_file_current[1]
+
     @property
     def pipools_environment_dict(self) -> Dict[str, Any]:
         """
@@ -343,13 +1114,26 @@ class PipCompileEnvironment(VirtualEnvironment):
     ) -> CompletedProcess:
         """
         Run a command from the virtualenv
+
+        Every command is traced as a `check_command` phase with its exit code.
         """
-        with self.safe_activation():
-            return self.virtual_env.platform.check_command(
-                command=command,
-                shell=shell,
-                **kwargs,
-            )
+        with self.tracer.phase("check_command", argv=command) as record:
+            with self.safe_activation():
+                result = self.virtual_env.platform.check_command(
+                    command=command,
+                    shell=shell,
+                    **kwargs,
+                )
+            record["exit_code"] = result.returncode
+            return result
+
+    @property
+    def python_executable(self) -> str:
+        """
+        The absolute path of the virtualenv's Python executable
+        """
+        python_name = "python.exe" if self.platform.windows else "python"
+        return str(self.virtual_env.executables_directory / python_name)
 
     def virtualenv_exists(self) -> bool:
         """
@@ -5,10 +5,19 @@ Dependency Resolvers
 from __future__ import annotations
 
 import os
+import re
+import sys
 from abc import ABC, abstractmethod
 from typing import ClassVar
 
+from packaging.markers import default_environment
+from packaging.version import Version
+
 from hatch_pip_compile.base import HatchPipCompileBase
+from hatch_pip_compile.daemon import ResolverDaemon
+from hatch_pip_compile.exceptions import HatchPipCompileError
+
+_python_version_pattern = re.compile(r"(\d+)\.(\d+)")
 
 
 class BaseResolver(HatchPipCompileBase, ABC):
@@ -25,6 +34,28 @@ class BaseResolver(HatchPipCompileBase, ABC):
         Resolver Executable
         """
 
+    @property
+    def resolution_python_version(self) -> Version | None:
+        """
+        The Python version the resolver targets instead of the environment's own
+        """
+        return None
+
+    @property
+    def target_python_version(self) -> Version:
+        """
+        The Python version to resolve for, the virtualenv's by default
+        """
+        return Version(self.environment.virtual_env.environment["python_version"])
+
+    @property
+    def marker_environment(self) -> dict[str, str]:
+        """
+        The environment markers to resolve for, the virtualenv's by default
+        """
+        markers = self.environment.virtual_env.environment
+        return {name: str(value) for name, value in markers.items()}
+
     def get_pip_compile_args(self, input_file: os.PathLike, output_file: os.PathLike) -> list[str]:
         """
         Get the pip compile arguments
@@ -48,6 +79,7 @@ class BaseResolver(HatchPipCompileBase, ABC):
             else "--quiet",
             "--no-header",
             *self.resolver_options,
+            *self.offline_args,
         ]
         if self.environment.config.get("pip-compile-hashes", False) is True:
             cmd.append("--generate-hashes")
@@ -59,6 +91,12 @@ class BaseResolver(HatchPipCompileBase, ABC):
         cmd.extend(["--output-file", str(output_file), str(input_file)])
         return cmd
 
+    def resolve(self, cmd: list[str]) -> None:
+        """
+        Run the resolver command built by `get_pip_compile_args`
+        """
+        self.environment.plugin_check_command(cmd)
+
 
 class PipCompileResolver(BaseResolver):
     """
@@ -67,6 +105,7 @@ class PipCompileResolver(BaseResolver):
 
     pypi_dependencies: ClassVar[list[str]] = ["pip-tools"]
     resolver_options: ClassVar[list[str]] = ["--resolver=backtracking", "--strip-extras"]
+    offline_flags: ClassVar[list[str]] = ["--no-index", "--no-emit-find-links"]
 
     @property
     def resolver_executable(self) -> list[str]:
@@ -74,12 +113,43 @@ class PipCompileResolver(BaseResolver):
         Resolver Executable
         """
         return [
-            self.environment.virtual_env.python_info.executable,
+            self.tool_python_executable,
             "-m",
             "piptools",
             "compile",
         ]
 
+    def resolve(self, cmd: list[str]) -> None:
+        """
+        Run `pip-compile`, in the warm resolver daemon when it's enabled
+
+        With `pip-compile-daemon` the command is sent to a long-lived
+        worker for the tool interpreter, which keeps `pip-tools` imported.
+        The command runs as a subprocess whenever the worker isn't available.
+        """
+        if self.environment.config.get("pip-compile-daemon", False) is not True:
+            super().resolve(cmd)
+            return
+        resolver_executable = self.resolver_executable
+        daemon = ResolverDaemon.from_data_directory(
+            data_directory=self.environment.isolated_data_directory,
+            python_executable=resolver_executable[0],
+        )
+        with self.environment.safe_activation():
+            env = dict(os.environ)
+        with self.environment.tracer.phase("check_command", argv=cmd) as record:
+            record["daemon"] = True
+            result = daemon.resolve(args=cmd[len(resolver_executable) :], cwd=os.getcwd(), env=env)
+            if result is not None:
+                record["exit_code"] = result["returncode"]
+        if result is None:
+            super().resolve(cmd)
+            return
+        sys.stdout.write(result["stdout"])
+        sys.stderr.write(result["stderr"])
+        if result["returncode"]:
+            self.environment.platform.exit_with_code(result["returncode"])
+
 
 class UvResolver(BaseResolver):
     """
@@ -87,16 +157,97 @@ class UvResolver(BaseResolver):
     """
 
     pypi_dependencies: ClassVar[list[str]] = ["uv"]
+    offline_flags: ClassVar[list[str]] = ["--offline"]
 
     @property
     def resolver_executable(self) -> list[str]:
         """
         Resolver Executable
+
+        When `pip-compile-venv-free` is enabled `uv` resolves with the
+        plugin's own interpreter for the environment's `--python-version`.
         """
-        return [
-            self.environment.virtual_env.python_info.executable,
-            "-m",
-            "uv",
-            "pip",
-            "compile",
-        ]
+        command = [*self.uv_command, "pip", "compile"]
+        if self.venv_free:
+            command.extend(["--python", sys.executable])
+        else:
+            command.extend(["--python", self.environment.python_executable])
+        python_version = self.resolution_python_version
+        if python_version is not None:
+            command.extend(["--python-version", f"{python_version.major}.{python_version.minor}"])
+        if self.environment.universal:
+            command.append("--universal")
+        return command
+
+    @property
+    def resolution_python_version(self) -> Version | None:
+        """
+        The Python version passed to `--python-version`, if any
+
+        Universal lock files are resolved for the oldest Python version
+        of the environment's matrix, venv-free resolution for the
+        environment's own Python version.
+        """
+        if self.environment.universal:
+            matrix_versions = [
+                self.parse_python_version(str(python))
+                for python in self.environment.matrix_python_versions
+            ]
+            if matrix_versions:
+                return min(matrix_versions)
+        if self.venv_free:
+            return self.target_python_version
+        return None
+
+    @property
+    def venv_free(self) -> bool:
+        """
+        Whether `pip-compile-venv-free` is enabled
+        """
+        return self.environment.config.get("pip-compile-venv-free", False) is True
+
+    @property
+    def target_python_version(self) -> Version:
+        """
+        The Python version to resolve for, from the environment's `python` option
+
+        Defaults to the plugin's own Python version when `python` isn't set.
+        Without `pip-compile-venv-free` the virtualenv's version is used.
+        """
+        if not self.venv_free:
+            return super().target_python_version
+        python = self.environment.config.get("python")
+        if not python:
+            return Version(f"{sys.version_info.major}.{sys.version_info.minor}")
+        return self.parse_python_version(python)
+
+    def parse_python_version(self, python: str) -> Version:
+        """
+        Parse the `major.minor` Python version from a `python` option
+        """
+        match = _python_version_pattern.search(os.path.basename(python))
+        if match is None:
+            msg = (
+                f"[hatch-pip-compile] Can't determine the Python version of {python!r} "
+                f"for the {self.environment.name} environment, a `python` option "
+                "like `3.12` is required."
+            )
+            raise HatchPipCompileError(msg)
+        return Version(f"{match.group(1)}.{match.group(2)}")
+
+    @property
+    def marker_environment(self) -> dict[str, str]:
+        """
+        The environment markers of the plugin's interpreter for the target Python version
+
+        Like `uv pip compile --python-version`, the lowest patch release
+        of the target version is assumed for `python_full_version`.
+        Without `pip-compile-venv-free` the virtualenv's markers are used.
+        """
+        if not self.venv_free:
+            return super().marker_environment
+        target_python_version = self.target_python_version
+        markers = {name: str(value) for name, value in default_environment().items()}
+        markers["python_version"] = str(target_python_version)
+        markers["python_full_version"] = f"{target_python_version}.0"
+        return markers
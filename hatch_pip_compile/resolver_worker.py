@@ -0,0 +1,144 @@
+"""
+hatch-pip-compile resolver worker
+
+A long-lived `pip-compile` worker, run with the interpreter that has
+`pip-tools` installed (not the plugin's own interpreter), so this module
+only uses the standard library and `pip-tools`:
+
+    python resolver_worker.py --socket <path> --idle-timeout <seconds>
+
+The worker imports `pip-tools` once and listens on a Unix socket. Each
+connection carries a single JSON request line with the `pip-compile`
+arguments, the working directory and the process environment, and gets a
+single JSON response line with the exit code and the captured output.
+Every request is served by a forked child, so requests run concurrently
+and can't leak state into each other or into the worker. The worker exits
+when no request arrives for `--idle-timeout` seconds.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+
+
+def run_pip_compile(args, cwd, env):
+    """
+    Run `pip-compile` in-process, returning its exit code and output
+    """
+    import click
+    from piptools.scripts.compile import cli
+
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(env)
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            result = cli.main(args=args, prog_name="pip-compile", standalone_mode=False)
+            returncode = result if isinstance(result, int) else 0
+        except click.exceptions.Exit as e:
+            returncode = e.exit_code
+        except click.ClickException as e:
+            e.show()
+            returncode = e.exit_code
+        except click.exceptions.Abort:
+            returncode = 1
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+    return {"returncode": returncode, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def read_line(connection):
+    """
+    Read a single line from a connection
+    """
+    chunks = []
+    while True:
+        chunk = connection.recv(2**16)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def handle(connection):
+    """
+    Serve a single request in a forked child
+    """
+    try:
+        request = json.loads(read_line(connection))
+        response = run_pip_compile(args=request["args"], cwd=request["cwd"], env=request["env"])
+    except Exception:
+        response = {"returncode": 1, "stdout": "", "stderr": traceback.format_exc()}
+    connection.sendall(json.dumps(response).encode() + b"\n")
+
+
+def serve(socket_path, idle_timeout):
+    """
+    Accept requests until the worker has been idle for `idle_timeout` seconds
+    """
+    # warm up the imports every request needs, the children inherit them
+    import piptools.scripts.compile  # noqa: F401
+
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    temp_path = f"{socket_path}.{os.getpid()}"
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(temp_path)
+    os.chmod(temp_path, 0o600)
+    server.listen(16)
+    os.replace(temp_path, socket_path)
+    socket_inode = os.stat(socket_path).st_ino
+    server.settimeout(idle_timeout)
+    try:
+        while True:
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                break
+            if os.fork() == 0:
+                exit_code = 0
+                try:
+                    # pip-compile waits on its own subprocesses, e.g. sdist builds
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    server.close()
+                    connection.settimeout(None)
+                    handle(connection)
+                except BaseException:
+                    exit_code = 1
+                finally:
+                    os._exit(exit_code)
+            connection.close()
+    finally:
+        server.close()
+        # leave the socket alone when another worker has replaced it
+        with contextlib.suppress(OSError):
+            if os.stat(socket_path).st_ino == socket_inode:
+                os.unlink(socket_path)
+
+
+def main():
+    """
+    Parse the arguments and serve
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--socket", required=True)
+    parser.add_argument("--idle-timeout", type=float, default=600)
+    arguments = parser.parse_args()
+    serve(socket_path=arguments.socket, idle_timeout=arguments.idle_timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
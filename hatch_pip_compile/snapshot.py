@@ -0,0 +1,186 @@
+"""
+hatch-pip-compile virtualenv snapshots
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tarfile
+import tempfile
+from typing import TYPE_CHECKING, Any, ClassVar
+
+from packaging.utils import canonicalize_name
+
+from hatch_pip_compile.clone import iter_distribution_files, relocate_shebang
+from hatch_pip_compile.exceptions import HatchPipCompileError
+
+if TYPE_CHECKING:
+    from hatch_pip_compile.plugin import PipCompileEnvironment
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """
+    Directory of relocatable virtualenv snapshots
+
+    A snapshot is a compressed tarball of the distributions installed in a
+    virtualenv, stored under a hash of the interpreter and the lock file
+    content hash. Any virtualenv created with the same interpreter for the
+    same lock file can be restored from it, e.g. from a CI cache.
+    """
+
+    suffix: ClassVar[str] = ".tar.gz"
+    metadata_name: ClassVar[str] = ".hatch-pip-compile-snapshot.json"
+    interpreter_markers: ClassVar[list[str]] = [
+        "implementation_name",
+        "implementation_version",
+        "os_name",
+        "platform_machine",
+        "platform_python_implementation",
+        "python_full_version",
+        "sys_platform",
+    ]
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        """
+        Initialize the store in a given directory
+        """
+        self.directory = directory
+
+    @classmethod
+    def from_data_directory(cls, data_directory: pathlib.Path) -> SnapshotStore:
+        """
+        Get the store under the plugin's hatch data directory
+        """
+        return cls(directory=data_directory / ".pip-compile" / "snapshots")
+
+    @classmethod
+    def get_key(cls, markers: dict[str, str], lock_hash: str) -> str:
+        """
+        Get the snapshot key for an interpreter's environment markers and a lock file hash
+
+        Only the markers that identify the interpreter are used, so that
+        machines with e.g. different kernel versions share snapshots.
+        """
+        key_inputs: dict[str, Any] = {
+            "interpreter": {name: markers.get(name) for name in cls.interpreter_markers},
+            "lock_hash": lock_hash,
+        }
+        return hashlib.sha256(json.dumps(key_inputs, sort_keys=True).encode()).hexdigest()
+
+    def get_environment_key(self, environment: PipCompileEnvironment) -> str:
+        """
+        Get the snapshot key of an environment's virtualenv and lock file
+        """
+        with environment.safe_activation():
+            markers = environment.virtual_env.environment
+        return self.get_key(markers=markers, lock_hash=environment.current_lock_hash())
+
+    def get_path(self, key: str) -> pathlib.Path:
+        """
+        Get the path of a snapshot
+        """
+        return self.directory / f"{key}{self.suffix}"
+
+    def save(self, environment: PipCompileEnvironment) -> pathlib.Path:
+        """
+        Save a snapshot of an environment's installed distributions
+
+        The project itself is left out. Its distributions are archived
+        with their scripts, without bytecode caches, and the virtualenv's
+        location is recorded so that scripts can be relocated on restore.
+
+        Returns
+        -------
+        pathlib.Path
+            The path of the snapshot
+        """
+        venv_directory = pathlib.Path(environment.virtual_env.directory)
+        site_packages = environment.site_packages_directory
+        if site_packages is None:
+            msg = f"[hatch-pip-compile] Can't find the site-packages of {venv_directory}"
+            raise HatchPipCompileError(msg)
+        metadata = {
+            "environment": environment.name,
+            "lock_hash": environment.current_lock_hash(),
+            "scripts_directory": environment.scripts_directory.as_posix(),
+            "venv_directory": str(venv_directory),
+        }
+        snapshot_path = self.get_path(self.get_environment_key(environment))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_name = tempfile.mkstemp(
+            dir=self.directory, prefix=f".{snapshot_path.name}.", suffix=".tmp"
+        )
+        os.close(file_descriptor)
+        try:
+            with tarfile.open(temp_name, "w:gz", dereference=True) as archive:
+                metadata_bytes = json.dumps(metadata, sort_keys=True).encode()
+                metadata_info = tarfile.TarInfo(self.metadata_name)
+                metadata_info.size = len(metadata_bytes)
+                archive.addfile(metadata_info, io.BytesIO(metadata_bytes))
+                for source, relative_path in iter_distribution_files(
+                    source_root=venv_directory,
+                    source_site_packages=site_packages,
+                    skip={canonicalize_name(environment.metadata.name)},
+                ):
+                    archive.add(source, arcname=relative_path.as_posix(), recursive=False)
+            os.replace(temp_name, snapshot_path)
+        except BaseException:
+            pathlib.Path(temp_name).unlink(missing_ok=True)
+            raise
+        return snapshot_path
+
+    def restore(self, environment: PipCompileEnvironment) -> bool:
+        """
+        Restore a snapshot into an environment's virtualenv
+
+        Files that already exist in the virtualenv are left alone and
+        shebangs of scripts are pointed at the virtualenv.
+
+        Returns
+        -------
+        bool
+            Whether a snapshot was found and restored
+        """
+        snapshot_path = self.get_path(self.get_environment_key(environment))
+        if not snapshot_path.is_file():
+            return False
+        venv_directory = pathlib.Path(environment.virtual_env.directory)
+        with tarfile.open(snapshot_path, "r:gz") as archive:
+            metadata_member = archive.next()
+            if metadata_member is None or metadata_member.name != self.metadata_name:
+                msg = f"[hatch-pip-compile] Invalid snapshot: {snapshot_path}"
+                raise HatchPipCompileError(msg)
+            metadata = json.load(archive.extractfile(metadata_member))  # type: ignore[arg-type]
+            scripts_directory = pathlib.PurePosixPath(metadata["scripts_directory"])
+            for member in archive:
+                relative_path = pathlib.PurePosixPath(member.name)
+                if not member.isfile():
+                    continue
+                elif relative_path.is_absolute() or os.pardir in relative_path.parts:
+                    msg = f"[hatch-pip-compile] Unsafe path in snapshot: {member.name}"
+                    raise HatchPipCompileError(msg)
+                target = venv_directory.joinpath(*relative_path.parts)
+                if target.exists():
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                source_file = archive.extractfile(member)
+                if source_file is None:
+                    continue
+                with source_file, target.open("wb") as target_file:
+                    if relative_path.parent == scripts_directory:
+                        first_line = source_file.readline()
+                        relocated = relocate_shebang(
+                            first_line, metadata["venv_directory"], str(venv_directory)
+                        )
+                        target_file.write(first_line if relocated is None else relocated)
+                    shutil.copyfileobj(source_file, target_file)
+                target.chmod(member.mode & 0o777)
+        return True
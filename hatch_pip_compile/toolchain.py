@@ -0,0 +1,233 @@
+"""
+hatch-pip-compile shared toolchain environments
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import importlib.metadata as importlib_metadata
+import json
+import logging
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, ClassVar, Generator
+
+from hatch.utils.fs import Path
+from hatch.venv.core import VirtualEnv
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+
+if TYPE_CHECKING:
+    from hatch.utils.platform import Platform
+
+    from hatch_pip_compile.plugin import PipCompileEnvironment
+
+logger = logging.getLogger(__name__)
+
+
+class ToolchainEnvironment:
+    """
+    A virtual environment holding the resolver and installer tools
+
+    Toolchains live under the plugin's hatch data directory and are shared by
+    every environment with the same Python implementation, Python version and
+    set of tools. The tools are pinned to the versions installed alongside the
+    plugin, see `pin_dependencies`, so a toolchain is rebuilt under a new
+    directory when those change. Virtualenvs aren't relocatable, so toolchains
+    are built in place under a build lock and only used once their marker
+    file, written last, records the installed tools.
+    """
+
+    marker_name: ClassVar[str] = "hatch-pip-compile-toolchain.json"
+    lock_timeout: ClassVar[float] = 600.0
+    lock_poll_interval: ClassVar[float] = 0.1
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        python: str,
+        dependencies: list[str],
+        platform: Platform,
+        verbosity: int = 0,
+    ) -> None:
+        """
+        Initialize the toolchain in a given directory
+        """
+        self.directory = directory
+        self.python = python
+        self.dependencies = dependencies
+        self.platform = platform
+        self.verbosity = verbosity
+
+    @classmethod
+    def from_environment(
+        cls, environment: PipCompileEnvironment, dependencies: list[str]
+    ) -> ToolchainEnvironment:
+        """
+        Get the toolchain matching an environment's interpreter
+
+        The toolchain is built from the interpreter the environment's
+        virtualenv was created from, never from the virtualenv itself,
+        which may be removed while the toolchain lives on.
+        """
+        with environment.safe_activation():
+            markers = environment.virtual_env.environment
+        dependencies = cls.pin_dependencies(
+            dependencies=dependencies, python_version=markers["python_full_version"]
+        )
+        dependencies_hash = hashlib.sha256(json.dumps(sorted(dependencies)).encode()).hexdigest()
+        directory_name = (
+            f"{markers['implementation_name']}-{markers['python_version']}-{dependencies_hash[:12]}"
+        )
+        return cls(
+            directory=environment.isolated_data_directory
+            / ".pip-compile"
+            / "toolchains"
+            / directory_name,
+            python=environment.parent_python or sys.executable,
+            dependencies=dependencies,
+            platform=environment.platform,
+            verbosity=environment.verbosity,
+        )
+
+    @staticmethod
+    def pin_dependencies(dependencies: list[str], python_version: str) -> list[str]:
+        """
+        Pin the tools to the versions installed alongside the plugin
+
+        Tools that aren't installed alongside the plugin, that already have a
+        version specifier or whose installed version doesn't support the
+        toolchain's Python version are left as they are.
+        """
+        pinned_dependencies = []
+        for dependency in dependencies:
+            requirement = Requirement(dependency)
+            if requirement.specifier or requirement.url:
+                pinned_dependencies.append(dependency)
+                continue
+            try:
+                distribution = importlib_metadata.distribution(requirement.name)
+            except importlib_metadata.PackageNotFoundError:
+                pinned_dependencies.append(dependency)
+                continue
+            metadata = distribution.metadata
+            if "Requires-Python" in metadata and python_version not in SpecifierSet(
+                metadata["Requires-Python"]
+            ):
+                pinned_dependencies.append(dependency)
+                continue
+            requirement.specifier = SpecifierSet(f"=={distribution.version}")
+            pinned_dependencies.append(str(requirement))
+        return pinned_dependencies
+
+    @staticmethod
+    def get_python_executable(directory: pathlib.Path, windows: bool) -> str:
+        """
+        Get the path of the Python executable in a virtual environment directory
+        """
+        if windows:
+            return str(directory / "Scripts" / "python.exe")
+        return str(directory / "bin" / "python")
+
+    @property
+    def python_executable(self) -> str:
+        """
+        The toolchain's Python executable
+        """
+        return self.get_python_executable(self.directory, windows=self.platform.windows)
+
+    @property
+    def marker_path(self) -> pathlib.Path:
+        """
+        The marker file recording the toolchain's tools, written once it's complete
+        """
+        return self.directory / self.marker_name
+
+    def exists(self) -> bool:
+        """
+        Check if the toolchain has been completely created with its tools
+        """
+        try:
+            marker = json.loads(self.marker_path.read_text())
+        except (OSError, ValueError):
+            return False
+        return isinstance(marker, dict) and marker.get("dependencies") == self.dependencies
+
+    @contextlib.contextmanager
+    def build_lock(self) -> Generator[None, None, None]:
+        """
+        Hold the lock for building the toolchain
+
+        The lock is a file created exclusively next to the toolchain. A lock
+        older than `lock_timeout` was left behind by a build that died, and
+        is taken over.
+        """
+        lock_path = self.directory.with_name(f".{self.directory.name}.lock")
+        self.directory.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            try:
+                file_descriptor = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    lock_age = time.time() - lock_path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if lock_age > self.lock_timeout:
+                    logger.warning(
+                        "[hatch-pip-compile] Removing stale toolchain lock: %s", lock_path
+                    )
+                    lock_path.unlink(missing_ok=True)
+                else:
+                    time.sleep(self.lock_poll_interval)
+                continue
+            os.close(file_descriptor)
+            break
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    def ensure(self, install_args: list[str] | None = None) -> None:
+        """
+        Create the toolchain and install its tools, unless it already exists
+
+        `install_args` are passed to `pip install`, e.g. to install offline.
+        A toolchain left incomplete by an interrupted build is rebuilt.
+        """
+        if self.exists():
+            return
+        with self.build_lock():
+            if self.exists():
+                return
+            logger.info(
+                "[hatch-pip-compile] Creating toolchain environment: %s", self.directory.name
+            )
+            shutil.rmtree(self.directory, ignore_errors=True)
+            VirtualEnv(
+                directory=Path(self.directory),
+                platform=self.platform,
+                verbosity=self.verbosity,
+            ).create(self.python)
+            self.platform.check_command(
+                [
+                    self.python_executable,
+                    "-m",
+                    "pip",
+                    "install",
+                    "--disable-pip-version-check",
+                    "--quiet",
+                    *(install_args or []),
+                    *self.dependencies,
+                ]
+            )
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=f".{self.marker_name}.", suffix=".tmp"
+            )
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump({"dependencies": self.dependencies}, temp_file, indent=2)
+            os.replace(temp_path, self.marker_path)
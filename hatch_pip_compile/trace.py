@@ -0,0 +1,133 @@
+"""
+hatch-pip-compile phase tracing
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import pathlib
+import subprocess
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterator, TypeVar
+
+if TYPE_CHECKING:
+    from hatch_pip_compile.plugin import PipCompileEnvironment
+
+logger = logging.getLogger(__name__)
+
+_Function = TypeVar("_Function", bound=Callable[..., Any])
+
+
+class PhaseTracer:
+    """
+    Opt-in timing trace of the plugin's phases
+
+    Every phase is appended to the trace file as a single JSON line with
+    the environment name, the phase, its start time and wall-clock duration
+    and, for commands, the command's arguments and exit code. Lines are
+    appended with a single write so that concurrent hatch processes can
+    share a trace file.
+    """
+
+    environment_variable = "PIP_COMPILE_TRACE"
+
+    def __init__(self, path: pathlib.Path | None, environment_name: str) -> None:
+        """
+        Initialize the tracer, tracing is disabled when `path` is None
+        """
+        self.path = path
+        self.environment_name = environment_name
+
+    @classmethod
+    def from_environment(cls, environment: PipCompileEnvironment) -> PhaseTracer:
+        """
+        Get the tracer of an environment
+
+        The `PIP_COMPILE_TRACE` environment variable takes precedence over the
+        `pip-compile-trace` option, which is relative to the project root.
+        """
+        trace_path = os.getenv(cls.environment_variable)
+        path = None
+        if trace_path:
+            path = pathlib.Path(trace_path).absolute()
+        elif environment.config.get("pip-compile-trace"):
+            path = pathlib.Path(environment.root) / environment.config["pip-compile-trace"]
+        return cls(path=path, environment_name=environment.name)
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether tracing is enabled
+        """
+        return self.path is not None
+
+    @contextlib.contextmanager
+    def phase(self, phase: str, argv: str | list[str] | None = None) -> Iterator[dict[str, Any]]:
+        """
+        Trace a phase
+
+        The yielded record can be updated while the phase runs, e.g. with the
+        `exit_code` of a command. Exit codes of failed commands are recorded
+        automatically.
+        """
+        if not self.enabled:
+            yield {}
+            return
+        record: dict[str, Any] = {
+            "environment": self.environment_name,
+            "phase": phase,
+            "start": time.time(),
+            "duration": None,
+            "argv": argv if isinstance(argv, str) or argv is None else [str(a) for a in argv],
+            "exit_code": None,
+        }
+        start = time.perf_counter()
+        try:
+            yield record
+        except SystemExit as e:
+            record["exit_code"] = e.code
+            raise
+        except subprocess.CalledProcessError as e:
+            record["exit_code"] = e.returncode
+            raise
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            record["duration"] = time.perf_counter() - start
+            self.write(record)
+
+    def write(self, record: dict[str, Any]) -> None:
+        """
+        Append a record to the trace file
+        """
+        if self.path is None:
+            return
+        line = json.dumps(record, default=str) + "\n"
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as trace_file:
+                trace_file.write(line)
+        except OSError as e:
+            logger.debug("[hatch-pip-compile] Unable to write to trace file %s: %s", self.path, e)
+
+
+def traced(phase: str) -> Callable[[_Function], _Function]:
+    """
+    Trace a method of the plugin environment or one of its tools
+    """
+
+    def decorator(func: _Function) -> _Function:
+        @functools.wraps(func)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            environment = self if hasattr(self, "tracer") else self.environment
+            with environment.tracer.phase(phase):
+                return func(self, *args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,261 @@
+"""
+hatch-pip-compile watch mode
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import pathlib
+from typing import Callable, Dict, Iterable, List, Optional
+
+from hatch.cli.application import Application
+
+from hatch_pip_compile.aio import AsyncEnvironmentRunner, EnvironmentResult
+from hatch_pip_compile.api import get_environment, load_application
+from hatch_pip_compile.manifest import LockManifest
+from hatch_pip_compile.plugin import PipCompileEnvironment
+
+StatSnapshot = Dict[pathlib.Path, Optional[List[int]]]
+
+
+class LockWatcher:
+    """
+    Relock environments whenever their inputs change
+
+    The project's hatch configuration files and the lock files of the
+    constraint environments are polled for changes. Once they settle
+    (`debounce` seconds without another change) the environments'
+    lock inputs - their dependencies, resolver options and the content
+    hash of their constraint lock file - are compared with the last run
+    and only the environments whose inputs changed are locked, along
+    with the environments constrained by them.
+
+    The project is only reloaded when a configuration file changed.
+    When the inputs of an environment change while it's being locked,
+    its resolution is cancelled and started over.
+    """
+
+    config_file_names: tuple[str, ...] = ("pyproject.toml", "hatch.toml")
+
+    def __init__(
+        self,
+        environments: Iterable[str],
+        root: os.PathLike | str | None = None,
+        concurrency: int = 4,
+        debounce: float = 0.5,
+        poll_interval: float = 0.5,
+        report: Callable[[dict[str, EnvironmentResult]], None] | None = None,
+    ) -> None:
+        """
+        Initialize the watcher
+
+        Parameters
+        ----------
+        environments : Iterable[str]
+            The names of the environments to keep locked
+        root : Optional[os.PathLike]
+            The project directory, defaults to the current working directory
+        concurrency : int
+            The maximum number of resolvers running at once, defaults to 4
+        debounce : float
+            Seconds without changes before the environments are relocked
+        poll_interval : float
+            Seconds between checks for changes
+        report : Optional[Callable[[Dict[str, EnvironmentResult]], None]]
+            Called with the results of every run
+        """
+        self.environment_names = sorted(set(environments))
+        self.root = root
+        self.concurrency = concurrency
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.report = report
+        self.application: Application | None = None
+        self.environments: dict[str, PipCompileEnvironment] = {}
+        self.fingerprints: dict[str, str | None] = {}
+        self.runner: AsyncEnvironmentRunner | None = None
+        self.running: asyncio.Task[dict[str, EnvironmentResult]] | None = None
+
+    def load(self, reload_project: bool = False) -> None:
+        """
+        Get fresh environment instances, reloading the project when asked to
+        """
+        if self.application is None or reload_project:
+            self.application = load_application(root=self.root)
+        self.environments = {
+            name: get_environment(application=self.application, environment_name=name)
+            for name in self.environment_names
+        }
+
+    @property
+    def config_files(self) -> list[pathlib.Path]:
+        """
+        The hatch configuration files of the project
+        """
+        if self.application is None:
+            return []
+        location = pathlib.Path(self.application.project.location)
+        return [location / name for name in self.config_file_names]
+
+    @property
+    def constraint_files(self) -> list[pathlib.Path]:
+        """
+        The lock files the watched environments are constrained by
+        """
+        constraint_files = {
+            environment.piptools_constraints_file
+            for environment in self.environments.values()
+            if environment.piptools_constraints_file is not None
+        }
+        return sorted(constraint_files)
+
+    def get_snapshot(self) -> StatSnapshot:
+        """
+        Get the stat signatures of the watched files
+        """
+        return {
+            path: LockManifest.stat_signature(path)
+            for path in [*self.config_files, *self.constraint_files]
+        }
+
+    def get_fingerprint(self, environment: PipCompileEnvironment) -> str | None:
+        """
+        Get the lock inputs of an environment, None when they can't be evaluated
+        """
+        try:
+            return environment.lock_inputs_hash
+        except Exception:
+            return None
+
+    def get_dependents(self, names: Iterable[str]) -> set[str]:
+        """
+        Add the environments constrained by any of the given environments
+        """
+        dependents = set(names)
+        while True:
+            added = {
+                name
+                for name, environment in self.environments.items()
+                if name not in dependents
+                and environment.config.get("pip-compile-constraint") in dependents
+            }
+            if not added:
+                return dependents
+            dependents |= added
+
+    def get_changed(self) -> set[str]:
+        """
+        Update the fingerprints, returning the environments whose lock inputs changed
+        """
+        changed = set()
+        for name, environment in self.environments.items():
+            fingerprint = self.get_fingerprint(environment)
+            if fingerprint is None or fingerprint != self.fingerprints.get(name):
+                changed.add(name)
+            self.fingerprints[name] = fingerprint
+        return changed
+
+    async def wait_for_change(self, snapshot: StatSnapshot) -> StatSnapshot:
+        """
+        Wait until the watched files change and then settle
+        """
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self.get_snapshot()
+            if current != snapshot:
+                break
+        while True:
+            await asyncio.sleep(self.debounce)
+            settled = self.get_snapshot()
+            if settled == current:
+                return settled
+            current = settled
+
+    def start(self, names: Iterable[str]) -> None:
+        """
+        Start locking environments in the background
+        """
+        self.runner = AsyncEnvironmentRunner(
+            environments=[self.environments[name] for name in sorted(names)],
+            concurrency=self.concurrency,
+        )
+        self.running = asyncio.ensure_future(self.runner.run(self.runner.lock_only))
+
+    async def finish(self) -> set[str]:
+        """
+        Wait for the running environments, returning the ones that were cancelled
+
+        The lock inputs of the environments that were locked are recorded
+        again, since locking a constraint environment changes the inputs
+        of its dependents.
+        """
+        if self.running is None:
+            return set()
+        results = await self.running
+        self.running = None
+        self.runner = None
+        if self.report is not None:
+            self.report(results)
+        for name, result in results.items():
+            if result.succeeded:
+                self.fingerprints[name] = self.get_fingerprint(self.environments[name])
+            else:
+                # retried on the next change, even when its inputs didn't change
+                self.fingerprints[name] = None
+        return {
+            name
+            for name, result in results.items()
+            if result.status == AsyncEnvironmentRunner.CANCELLED
+        }
+
+    async def watch(self) -> None:
+        """
+        Lock the environments and keep relocking them until cancelled
+
+        The environments are locked from the project directory, and the
+        working directory is restored once the watcher is cancelled.
+        """
+        self.load()
+        if self.application is None:
+            msg = "[hatch-pip-compile] The project wasn't loaded"
+            raise RuntimeError(msg)
+        with self.application.project.ensure_cwd():
+            self.get_changed()
+            self.start(self.environment_names)
+            snapshot = self.get_snapshot()
+            change = asyncio.ensure_future(self.wait_for_change(snapshot))
+            try:
+                while True:
+                    waiting = {change} if self.running is None else {change, self.running}
+                    await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                    if not change.done():
+                        await self.finish()
+                        continue
+                    new_snapshot = change.result()
+                    config_changed = any(
+                        new_snapshot.get(path) != snapshot.get(path) for path in self.config_files
+                    )
+                    self.load(reload_project=config_changed)
+                    changed = self.get_changed()
+                    if self.runner is not None:
+                        running = set(self.runner.environments)
+                        for name in sorted(changed & running):
+                            constraint = self.environments[name].config.get(
+                                "pip-compile-constraint"
+                            )
+                            if config_changed or constraint not in running:
+                                # restart the environments whose inputs changed mid-resolution
+                                self.runner.cancel(name)
+                            else:
+                                # the running constraint environment was locked, not changed
+                                changed.discard(name)
+                        changed |= await self.finish()
+                    if changed:
+                        self.start(self.get_dependents(changed))
+                    snapshot = self.get_snapshot()
+                    change = asyncio.ensure_future(self.wait_for_change(snapshot))
+            finally:
+                change.cancel()
+                if self.running is not None:
+                    self.running.cancel()
@@ -0,0 +1,344 @@
+"""
+hatch-pip-compile wheelhouse
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import ClassVar, Iterable, Mapping
+
+from packaging.tags import INTERPRETER_SHORT_NAMES, platform_tags
+from packaging.utils import canonicalize_name
+from piptools._compat.pip_compat import PipSession, parse_requirements
+
+from hatch_pip_compile.exceptions import HatchPipCompileError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class LockedArtifact:
+    """
+    A pinned distribution from one or more lock files
+    """
+
+    name: str
+    version: str
+    hashes: frozenset[str] = frozenset()
+
+    @property
+    def key(self) -> str:
+        """
+        The `name==version` pin of the artifact
+        """
+        return f"{self.name}=={self.version}"
+
+
+@dataclasses.dataclass(frozen=True)
+class WheelhouseTarget:
+    """
+    The interpreter and platform that wheelhouse artifacts are fetched for
+    """
+
+    python_version: str
+    implementation: str
+    platforms: tuple[str, ...]
+
+    @classmethod
+    def from_markers(cls, markers: Mapping[str, str]) -> WheelhouseTarget:
+        """
+        Get the target of an interpreter from its environment markers
+
+        Environments always run on the plugin's own platform,
+        so its platform tags are used.
+        """
+        implementation_name = markers["implementation_name"]
+        return cls(
+            python_version=markers["python_version"],
+            implementation=INTERPRETER_SHORT_NAMES.get(implementation_name, implementation_name),
+            platforms=tuple(platform_tags()),
+        )
+
+    @property
+    def abi(self) -> str | None:
+        """
+        The ABI tag of the interpreter, only known for CPython
+        """
+        if self.implementation != "cp":
+            return None
+        return f"cp{self.python_version.replace('.', '')}"
+
+    @property
+    def tag(self) -> str:
+        """
+        The most specific wheel tag of the target, e.g. `cp311-cp311-linux_x86_64`
+        """
+        return "-".join(
+            [
+                f"{self.implementation}{self.python_version.replace('.', '')}",
+                self.abi or "none",
+                self.platforms[0] if self.platforms else "any",
+            ]
+        )
+
+    @property
+    def download_args(self) -> list[str]:
+        """
+        The `pip download` arguments that select artifacts for the target
+        """
+        args = ["--python-version", self.python_version, "--implementation", self.implementation]
+        if self.abi is not None:
+            args.extend(["--abi", self.abi])
+        for platform in self.platforms:
+            args.extend(["--platform", platform])
+        return args
+
+
+def read_locked_artifacts(lock_files: Iterable[pathlib.Path]) -> list[LockedArtifact]:
+    """
+    Read the de-duplicated pins of a set of lock files
+
+    Only requirements pinned with `==` are collected, editable installs
+    and direct URLs are skipped. The SHA256 hashes of a pin are merged
+    across all the lock files it appears in.
+    """
+    artifacts: dict[tuple[str, str], set[str]] = {}
+    for lock_file in lock_files:
+        for install_requirement in parse_requirements(str(lock_file), session=PipSession()):
+            requirement = install_requirement.req
+            if (
+                requirement is None
+                or install_requirement.editable
+                or install_requirement.link is not None
+            ):
+                continue
+            specifiers = list(requirement.specifier)
+            if len(specifiers) != 1 or specifiers[0].operator != "==":
+                continue
+            key = (canonicalize_name(requirement.name), specifiers[0].version)
+            hashes = artifacts.setdefault(key, set())
+            hashes.update(install_requirement.hash_options.get("sha256", []))
+    return [
+        LockedArtifact(name=name, version=version, hashes=frozenset(hashes))
+        for (name, version), hashes in sorted(artifacts.items())
+    ]
+
+
+def get_file_sha256(path: pathlib.Path) -> str:
+    """
+    Get the SHA256 of a file, reading it in chunks
+    """
+    digest = hashlib.sha256()
+    with path.open("rb") as artifact_file:
+        while chunk := artifact_file.read(2**16):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Wheelhouse:
+    """
+    Local directory of prefetched distributions
+
+    The wheelhouse holds one verified artifact per pinned `name==version`
+    and per `WheelhouseTarget`. A manifest maps each target's pins to
+    their file and SHA256, which lets the installers tell whether every
+    pin of a lock file can be installed without an index.
+    """
+
+    manifest_name: ClassVar[str] = "manifest.json"
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        """
+        Initialize the wheelhouse in a given directory
+        """
+        self.directory = directory
+
+    @classmethod
+    def from_data_directory(cls, data_directory: pathlib.Path) -> Wheelhouse:
+        """
+        Get the wheelhouse stored under the plugin's hatch data directory
+        """
+        return cls(directory=data_directory / ".pip-compile" / "wheelhouse")
+
+    @property
+    def manifest_path(self) -> pathlib.Path:
+        """
+        The path of the wheelhouse manifest
+        """
+        return self.directory / self.manifest_name
+
+    @staticmethod
+    def get_manifest_key(artifact: LockedArtifact, target: WheelhouseTarget) -> str:
+        """
+        The `tag/name==version` key of an artifact in the wheelhouse manifest
+        """
+        return f"{target.tag}/{artifact.key}"
+
+    def read_manifest(self) -> dict[str, dict[str, str]]:
+        """
+        Read the manifest, empty if it's missing or unreadable
+        """
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def write_manifest(self, manifest: dict[str, dict[str, str]]) -> None:
+        """
+        Atomically replace the manifest
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=f".{self.manifest_name}.", suffix=".tmp"
+        )
+        with os.fdopen(file_descriptor, "w") as temp_file:
+            json.dump(manifest, temp_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def is_fetched(
+        self,
+        artifact: LockedArtifact,
+        target: WheelhouseTarget,
+        manifest: dict[str, dict[str, str]],
+    ) -> bool:
+        """
+        Whether an artifact is already in the wheelhouse for a target with a matching hash
+        """
+        entry = manifest.get(self.get_manifest_key(artifact=artifact, target=target))
+        if entry is None or not (self.directory / entry["filename"]).is_file():
+            return False
+        return not artifact.hashes or entry["sha256"] in artifact.hashes
+
+    def missing(
+        self, artifacts: Iterable[LockedArtifact], target: WheelhouseTarget
+    ) -> list[LockedArtifact]:
+        """
+        Get the artifacts that aren't in the wheelhouse for a target, without any network access
+        """
+        manifest = self.read_manifest()
+        return [
+            artifact
+            for artifact in artifacts
+            if not self.is_fetched(artifact=artifact, target=target, manifest=manifest)
+        ]
+
+    def covers(self, pins: dict[str, str | None], target: WheelhouseTarget) -> bool:
+        """
+        Whether every pin is available in the wheelhouse for a target
+
+        Parameters
+        ----------
+        pins : Dict[str, Optional[str]]
+            Pinned versions keyed by canonical distribution name, as
+            returned by `PluginInstaller.get_locked_pins`
+        target : WheelhouseTarget
+            The interpreter and platform the pins are installed for
+        """
+        if any(version is None for version in pins.values()):
+            return False
+        return not self.missing(
+            (
+                LockedArtifact(name=name, version=version)
+                for name, version in pins.items()
+                if version is not None
+            ),
+            target=target,
+        )
+
+    def fetch(self, artifact: LockedArtifact, target: WheelhouseTarget) -> dict[str, str]:
+        """
+        Download a single artifact for a target into the wheelhouse
+
+        The artifact is downloaded into a temporary directory with
+        `pip download` for the target's interpreter and platform,
+        verified against the locked hashes (if any) and then moved
+        into the wheelhouse.
+
+        Returns
+        -------
+        Dict[str, str]
+            The manifest entry of the artifact
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.directory, prefix=".download-") as tmpdir:
+            command = [
+                sys.executable,
+                "-m",
+                "pip",
+                "download",
+                "--quiet",
+                "--no-deps",
+                "--disable-pip-version-check",
+                *target.download_args,
+                "--dest",
+                tmpdir,
+                artifact.key,
+            ]
+            subprocess.run(command, capture_output=True, check=True)  # noqa: S603
+            downloaded = sorted(pathlib.Path(tmpdir).iterdir())
+            if len(downloaded) != 1:
+                msg = f"[hatch-pip-compile] Expected one artifact for {artifact.key}: {downloaded}"
+                raise HatchPipCompileError(msg)
+            sha256 = get_file_sha256(downloaded[0])
+            if artifact.hashes and sha256 not in artifact.hashes:
+                msg = (
+                    f"[hatch-pip-compile] Hash mismatch for {downloaded[0].name}: "
+                    f"sha256:{sha256} isn't locked for {artifact.key}"
+                )
+                raise HatchPipCompileError(msg)
+            shutil.move(str(downloaded[0]), str(self.directory / downloaded[0].name))
+        return {"filename": downloaded[0].name, "sha256": sha256}
+
+    def prefetch(
+        self, artifacts: Iterable[LockedArtifact], target: WheelhouseTarget, jobs: int = 1
+    ) -> tuple[list[LockedArtifact], dict[str, str]]:
+        """
+        Download the artifacts missing from the wheelhouse for a target concurrently
+
+        Artifacts already in the wheelhouse with a matching hash are skipped.
+        The manifest is updated with every artifact that was downloaded,
+        even when others fail.
+
+        Returns
+        -------
+        Tuple[List[LockedArtifact], Dict[str, str]]
+            The downloaded artifacts and the errors of the failed
+            downloads, keyed by `tag/name==version`
+        """
+        manifest = self.read_manifest()
+        missing = [
+            artifact
+            for artifact in artifacts
+            if not self.is_fetched(artifact=artifact, target=target, manifest=manifest)
+        ]
+        fetched: list[LockedArtifact] = []
+        failures: dict[str, str] = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(self.fetch, artifact, target): artifact for artifact in missing
+            }
+            for future in concurrent.futures.as_completed(futures):
+                artifact = futures[future]
+                manifest_key = self.get_manifest_key(artifact=artifact, target=target)
+                try:
+                    entry = future.result()
+                except subprocess.CalledProcessError as e:
+                    failures[manifest_key] = e.stderr.decode("utf-8").strip()
+                except HatchPipCompileError as e:
+                    failures[manifest_key] = str(e)
+                else:
+                    manifest[manifest_key] = entry
+                    fetched.append(artifact)
+        if fetched:
+            self.write_manifest(manifest)
+        return fetched, failures
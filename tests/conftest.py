@@ -132,11 +132,17 @@ class PipCompileFixture:
     def reload_environment(self, environment: str | PipCompileEnvironment) -> PipCompileEnvironment:
         """
         Reload a new environment given the current state of the isolated project
+
+        hatch caches the project configuration, so the project is
+        reloaded to pick up changes made with `update_pyproject`.
         """
         if isinstance(environment, PipCompileEnvironment):
             environment_name = environment.name
         else:
             environment_name = environment
+        self.project = Project(path=self.isolation)
+        self.project.app = self.application
+        self.application.project = self.project
         env = self.application.get_environment(env_name=environment_name)
         return env
 
@@ -0,0 +1,191 @@
+"""
+Testing the `aio` module
+"""
+
+import asyncio
+import pathlib
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from hatch_pip_compile.aio import AsyncEnvironmentRunner, _LockOutcome, lock_many
+from hatch_pip_compile.exceptions import HatchPipCompileError
+from hatch_pip_compile.toolchain import ToolchainEnvironment
+from tests.conftest import PipCompileFixture
+
+
+def _fake_environment(name: str, lock_file: pathlib.Path, constraint: Optional[str] = None) -> Any:
+    """
+    A stand-in for an environment with a constraint and a lock file
+    """
+    config: Dict[str, Any] = {}
+    if constraint is not None:
+        config["pip-compile-constraint"] = constraint
+    return SimpleNamespace(name=name, config=config, piptools_lock_file=lock_file)
+
+
+def test_dependency_graph(tmp_path: pathlib.Path) -> None:
+    """
+    Environments wait for their constraint and the owner of a shared lock file
+    """
+    runner = AsyncEnvironmentRunner(
+        environments=[
+            _fake_environment("default", tmp_path / "default.txt"),
+            _fake_environment("lint", tmp_path / "lint.txt", constraint="default"),
+            _fake_environment("test", tmp_path / "default.txt"),
+            _fake_environment("docs", tmp_path / "docs.txt", constraint="missing"),
+        ]
+    )
+    assert runner.get_dependency_graph() == {
+        "default": set(),
+        "docs": set(),
+        "lint": {"default"},
+        "test": {"default"},
+    }
+
+
+def test_dependency_graph_cycle(tmp_path: pathlib.Path) -> None:
+    """
+    Constraint cycles don't deadlock the run
+    """
+    runner = AsyncEnvironmentRunner(
+        environments=[
+            _fake_environment("a", tmp_path / "a.txt", constraint="b"),
+            _fake_environment("b", tmp_path / "b.txt", constraint="a"),
+        ]
+    )
+    assert runner.get_dependency_graph() == {"a": {"b"}, "b": set()}
+
+
+def test_run_results(tmp_path: pathlib.Path) -> None:
+    """
+    Failures skip dependents, timeouts and cancellations are reported per environment
+    """
+    runner = AsyncEnvironmentRunner(
+        environments=[
+            _fake_environment("default", tmp_path / "default.txt"),
+            _fake_environment("lint", tmp_path / "lint.txt", constraint="default"),
+            _fake_environment("slow", tmp_path / "slow.txt"),
+            _fake_environment("cancelled", tmp_path / "cancelled.txt"),
+            _fake_environment("fine", tmp_path / "fine.txt"),
+        ],
+        concurrency=5,
+        timeout=0.5,
+    )
+
+    async def operation(environment: Any) -> _LockOutcome:
+        if environment.name == "default":
+            msg = "resolution failed"
+            raise HatchPipCompileError(msg)
+        elif environment.name in ["slow", "cancelled"]:
+            await asyncio.sleep(10)
+        return _LockOutcome(cache_hit=True, lock_changed=True)
+
+    async def run() -> Dict[str, Any]:
+        results = asyncio.ensure_future(runner.run(operation))
+        await asyncio.sleep(0.1)
+        assert runner.cancel("cancelled") is True
+        return await results
+
+    results = asyncio.run(run())
+    assert {name: result.status for name, result in results.items()} == {
+        "cancelled": "cancelled",
+        "default": "failed",
+        "fine": "succeeded",
+        "lint": "skipped",
+        "slow": "timed out",
+    }
+    assert results["default"].error == "resolution failed"
+    assert results["lint"].error == "default failed"
+    assert results["fine"].cache_hit is True
+    assert results["fine"].lock_changed is True
+    assert runner.cancel("fine") is False
+
+
+def test_run_shutdown_nonblocking(tmp_path: pathlib.Path) -> None:
+    """
+    The event loop keeps running while the worker thread finishes a timed out step
+    """
+    runner = AsyncEnvironmentRunner(
+        environments=[_fake_environment("slow", tmp_path / "slow.txt")], timeout=0.1
+    )
+
+    async def operation(environment: Any) -> _LockOutcome:
+        await runner.run_blocking(time.sleep, 0.5)
+        return _LockOutcome(cache_hit=False, lock_changed=False)
+
+    async def run() -> int:
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        results = await runner.run(operation)
+        ticker.cancel()
+        assert results["slow"].status == "timed out"
+        return ticks
+
+    assert asyncio.run(run()) >= 20
+
+
+def test_run_command_failure(pip_compile: PipCompileFixture) -> None:
+    """
+    A failing command raises with its stderr
+    """
+    runner = AsyncEnvironmentRunner(environments=[])
+    command = [sys.executable, "-c", "import sys; sys.stderr.write('boom'); sys.exit(3)"]
+    with pytest.raises(HatchPipCompileError, match="exit code 3.*\n.*boom"):
+        asyncio.run(runner.run_command(pip_compile.default_environment, command, env={}))
+
+
+def test_lock_many_working_directory(pip_compile: PipCompileFixture) -> None:
+    """
+    Environments run from the project directory and the working directory is restored
+    """
+    working_directories = []
+
+    async def run(self: AsyncEnvironmentRunner, operation: Any) -> Dict[str, Any]:
+        working_directories.append(pathlib.Path.cwd())
+        return {}
+
+    working_directory = pathlib.Path.cwd()
+    with patch.object(AsyncEnvironmentRunner, "run", new=run):
+        assert asyncio.run(lock_many(["default"], root=pip_compile.isolation)) == {}
+    assert working_directories == [pip_compile.isolation.resolve()]
+    assert pathlib.Path.cwd() == working_directory
+
+
+def test_lock_only(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    The resolver command is the same as the serial path's and the lock is post-processed
+    """
+    environment = pip_compile.default_environment
+    environment.piptools_lock_file.write_text(
+        environment.piptools_lock_file.read_text().replace("# - hatch", "#")
+    )
+    runner = AsyncEnvironmentRunner(environments=[environment])
+    with patch.object(
+        AsyncEnvironmentRunner, "run_command", new_callable=AsyncMock
+    ) as mock_run, patch.object(ToolchainEnvironment, "ensure"):
+        results = asyncio.run(runner.run(runner.lock_only))
+    assert results["default"].status == "succeeded"
+    assert results["default"].lock_changed is True
+    assert environment.lock_only is True
+    assert environment.lockfile_up_to_date is True
+    assert environment.virtualenv_exists() is False
+    command = mock_run.call_args[0][1]
+    assert command[:4] == [
+        environment.resolver.toolchain.python_executable,
+        "-m",
+        "piptools",
+        "compile",
+    ]
+    assert "# - hatch" in environment.piptools_lock_file.read_text()
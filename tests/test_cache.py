@@ -0,0 +1,76 @@
+"""
+Testing the `cache` module
+"""
+
+from unittest.mock import Mock
+
+from click.testing import CliRunner
+
+from hatch_pip_compile.api import get_environment, load_application
+from hatch_pip_compile.cache import ResolutionCache
+from hatch_pip_compile.cli import cli
+from tests.conftest import PipCompileFixture
+
+
+def test_cache_get_set(pip_compile: PipCompileFixture) -> None:
+    """
+    Test storing and retrieving a resolution
+    """
+    cache = ResolutionCache(directory=pip_compile.isolation / "cache")
+    key = ResolutionCache.get_key({"dependencies": ["hatch"]})
+    assert cache.get(key) is None
+    cache.set(key, "hatch==1.7.0\n")
+    assert cache.get(key) == "hatch==1.7.0\n"
+    assert [entry.key for entry in cache.entries()] == [key]
+
+
+def test_cache_evict_lru(pip_compile: PipCompileFixture) -> None:
+    """
+    Least-recently-used entries are evicted first
+    """
+    cache = ResolutionCache(directory=pip_compile.isolation / "cache", max_size=20)
+    cache.set("old", "a" * 10)
+    cache.set("new", "b" * 10)
+    entries = {entry.key: entry for entry in cache.entries()}
+    entries["old"].path.touch()
+    (pip_compile.isolation / "cache" / "new.txt").touch()
+    cache.set("newest", "c" * 10)
+    assert len(cache.entries()) == 2
+    assert cache.get("newest") is not None
+    assert cache.clear() == 2
+    assert cache.entries() == []
+
+
+def test_pip_compile_cli_cache_hit(
+    mock_check_command: Mock, pip_compile: PipCompileFixture
+) -> None:
+    """
+    A cached resolution is used instead of running the resolver
+    """
+    environment = pip_compile.default_environment
+    environment.config["pip-compile-cache"] = True
+    environment.create()
+    environment.pip_compile_cli()
+    assert mock_check_command.call_count == 1
+    assert len(environment.resolution_cache.entries()) == 1
+    environment.pip_compile_cli()
+    assert mock_check_command.call_count == 1
+
+
+def test_cli_cache_clear(pip_compile: PipCompileFixture) -> None:
+    """
+    Test the `cache` command
+    """
+    application = load_application(root=pip_compile.isolation)
+    cache = get_environment(application=application, environment_name="default").resolution_cache
+    cache.set("abc", "hatch==1.7.0\n")
+    runner = CliRunner()
+    with pip_compile.chdir():
+        result = runner.invoke(cli=cli, args=["cache"])
+        assert result.exit_code == 0
+        assert "Entries: 1" in result.output
+        assert str(cache.directory) in result.output
+        result = runner.invoke(cli=cli, args=["cache", "--clear"])
+    assert result.exit_code == 0
+    assert "Removed 1 cached resolutions" in result.output
+    assert cache.entries() == []
@@ -2,7 +2,11 @@
 Testing the hatch-pip-compile CLI
 """
 
-from unittest.mock import Mock
+import os
+import sys
+from subprocess import CompletedProcess
+from typing import Any
+from unittest.mock import Mock, patch
 
 import click
 import pytest
@@ -41,9 +45,16 @@ def test_cli_no_args_mocked(pip_compile: PipCompileFixture, subprocess_run: Mock
         _ = runner.invoke(cli=cli)
         assert subprocess_run.call_count == 1
         subprocess_run.assert_called_once()
-        subprocess_run.assert_called_with(
-            args=["hatch", "env", "show", "--json"], capture_output=True, check=True
-        )
+        assert subprocess_run.call_args.kwargs["args"] == [
+            "hatch",
+            "env",
+            "run",
+            "--env",
+            "default",
+            "--",
+            "python",
+            "--version",
+        ]
 
 
 def test_cli_no_args(pip_compile: PipCompileFixture) -> None:
@@ -177,3 +188,136 @@ def test_command_runner_non_supported_environments(
                 upgrade=True,
                 upgrade_packages=[],
             )
+
+
+def test_command_runner_constraint_order(subprocess_run: Mock) -> None:
+    """
+    Constraint environments are locked before their dependents
+    """
+    environment_configs = {
+        "default": {"type": "pip-compile", "pip-compile-constraint": "default"},
+        "docs": {"type": "pip-compile", "pip-compile-constraint": "test"},
+        "lint": {"type": "pip-compile"},
+        "test": {"type": "pip-compile", "pip-compile-constraint": "default"},
+    }
+    with patch.object(
+        HatchCommandRunner, "_get_environment_configs", return_value=environment_configs
+    ):
+        command_runner = HatchCommandRunner(upgrade_all=True, jobs=4)
+    assert command_runner.get_constraint_graph() == {"docs": "test", "test": "default"}
+    with command_runner:
+        command_runner.hatch_cli()
+    locked_environments = [call.kwargs["args"][4] for call in subprocess_run.call_args_list]
+    assert sorted(locked_environments) == ["default", "docs", "lint", "test"]
+    assert locked_environments.index("default") < locked_environments.index("test")
+    assert locked_environments.index("test") < locked_environments.index("docs")
+    for call in subprocess_run.call_args_list:
+        assert call.kwargs["env"]["__PIP_COMPILE_FORCE__"] == "1"
+    assert "__PIP_COMPILE_FORCE__" not in os.environ
+
+
+def test_command_runner_failed_constraint(subprocess_run: Mock) -> None:
+    """
+    Dependents of an environment that failed to lock are skipped
+    """
+    environment_configs = {
+        "default": {"type": "pip-compile"},
+        "lint": {"type": "pip-compile"},
+        "test": {"type": "pip-compile", "pip-compile-constraint": "default"},
+    }
+
+    def run_environment(args: list[str], **kwargs: Any) -> CompletedProcess:
+        returncode = 1 if args[4] == "default" else 0
+        return CompletedProcess(args=args, returncode=returncode, stdout=b"", stderr=b"")
+
+    subprocess_run.side_effect = run_environment
+    with patch.object(
+        HatchCommandRunner, "_get_environment_configs", return_value=environment_configs
+    ):
+        command_runner = HatchCommandRunner(upgrade_all=True, jobs=2)
+    with pytest.raises(click.exceptions.Exit):
+        command_runner.hatch_cli()
+    locked_environments = {call.kwargs["args"][4] for call in subprocess_run.call_args_list}
+    assert locked_environments == {"default", "lint"}
+
+
+def test_command_runner_lock_only(subprocess_run: Mock) -> None:
+    """
+    Lock-only mode runs the `lock-environment` command instead of `hatch env run`
+    """
+    with patch.object(
+        HatchCommandRunner,
+        "_get_environment_configs",
+        return_value={"default": {"type": "pip-compile"}},
+    ):
+        command_runner = HatchCommandRunner(lock_only=True)
+    with command_runner:
+        command_runner.hatch_cli()
+    subprocess_run.assert_called_once()
+    assert subprocess_run.call_args.kwargs["args"] == [
+        sys.executable,
+        "-m",
+        "hatch_pip_compile",
+        "lock-environment",
+        "default",
+    ]
+
+
+def test_command_runner_shared_universal_lock(subprocess_run: Mock) -> None:
+    """
+    Environments sharing a universal lockfile are locked once
+    """
+    environment_configs = {
+        "default": {"type": "pip-compile"},
+        "test.py3.10": {"type": "pip-compile", "pip-compile-universal": True},
+        "test.py3.11": {"type": "pip-compile", "pip-compile-universal": True},
+        "docs": {"type": "pip-compile", "pip-compile-constraint": "test.py3.11"},
+    }
+    with patch.object(
+        HatchCommandRunner, "_get_environment_configs", return_value=environment_configs
+    ), patch.object(
+        HatchCommandRunner,
+        "get_shared_lock_environments",
+        return_value={"test.py3.11": "test.py3.10"},
+    ):
+        command_runner = HatchCommandRunner(upgrade_all=True, jobs=4)
+        with command_runner:
+            command_runner.hatch_cli()
+    assert command_runner.get_constraint_graph() == {"docs": "test.py3.10"}
+    locked_environments = [call.kwargs["args"][4] for call in subprocess_run.call_args_list]
+    assert sorted(locked_environments) == ["default", "docs", "test.py3.10"]
+    assert locked_environments.index("test.py3.10") < locked_environments.index("docs")
+
+
+def test_cli_check() -> None:
+    """
+    `--check` reports out-of-date lock files and exits non-zero
+    """
+    problems = {"default": [], "test": ["the dependencies don't match the lock file"]}
+    runner = CliRunner()
+    with patch("hatch_pip_compile.cli.check_lock_files", return_value=problems) as mock_check:
+        result = runner.invoke(cli=cli, args=["--check", "--all"])
+    mock_check.assert_called_once_with(environment_names=None)
+    assert result.exit_code == 1
+    assert "hatch-pip-compile: default is up-to-date" in result.output
+    assert "hatch-pip-compile: test is out of date" in result.output
+    assert "the dependencies don't match the lock file" in result.output
+    with patch("hatch_pip_compile.cli.check_lock_files", return_value={"test": []}) as mock_check:
+        result = runner.invoke(cli=cli, args=["--check", "test"])
+    mock_check.assert_called_once_with(environment_names=["test"])
+    assert result.exit_code == 0
+
+
+def test_cli_environment_named_like_command(subprocess_run: Mock) -> None:
+    """
+    An environment named like a command is locked instead of running the command
+    """
+    environment_configs = {"cache": {"type": "pip-compile"}}
+    with patch.object(
+        HatchCommandRunner, "_get_environment_configs", return_value=environment_configs
+    ), patch("hatch_pip_compile.cli.ResolutionCache.clear") as mock_clear:
+        result = CliRunner().invoke(cli=cli, args=["cache"])
+    assert result.exit_code == 0
+    assert "`cache` is a pip-compile environment" in result.output
+    mock_clear.assert_not_called()
+    assert subprocess_run.call_args.kwargs["args"][:5] == ["hatch", "env", "run", "--env", "cache"]
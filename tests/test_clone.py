@@ -0,0 +1,90 @@
+"""
+Testing the `clone` module
+"""
+
+import os
+import pathlib
+
+from hatch_pip_compile.clone import (
+    VenvIndex,
+    clone_distributions,
+    find_site_packages,
+    get_distribution_names,
+)
+from tests.conftest import PipCompileFixture
+
+
+def _install_distribution(root: pathlib.Path, name: str, version: str) -> None:
+    """
+    Write a minimal installed distribution with a console script
+    """
+    site_packages = root / "lib" / "python3.11" / "site-packages"
+    package = site_packages / name
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "__pycache__").mkdir()
+    (package / "__pycache__" / "__init__.cpython-311.pyc").write_bytes(b"")
+    script = root / "bin" / name
+    script.parent.mkdir(exist_ok=True)
+    script.write_text(f"#!{root}/bin/python\nimport {name}\n")
+    script.chmod(0o755)
+    dist_info = site_packages / f"{name}-{version}.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    )
+    record = [
+        f"{name}/__init__.py,,",
+        f"{name}/__pycache__/__init__.cpython-311.pyc,,",
+        f"../../../bin/{name},,",
+        f"{dist_info.name}/METADATA,,",
+        f"{dist_info.name}/RECORD,,",
+    ]
+    (dist_info / "RECORD").write_text("\n".join(record) + "\n")
+
+
+def test_venv_index(pip_compile: PipCompileFixture) -> None:
+    """
+    Registered virtualenvs are found by key while they exist
+    """
+    index = VenvIndex(directory=pip_compile.isolation / "index")
+    key = VenvIndex.get_key(interpreter={"python_version": "3.11"}, lock_hash="abc")
+    assert key != VenvIndex.get_key(interpreter={"python_version": "3.12"}, lock_hash="abc")
+    assert index.get(key) is None
+    venv_directory = pip_compile.isolation / "venv"
+    venv_directory.mkdir()
+    index.register(key, venv_directory)
+    assert index.get(key) == venv_directory
+    venv_directory.rmdir()
+    assert index.get(key) is None
+
+
+def test_clone_distributions(pip_compile: PipCompileFixture) -> None:
+    """
+    Distributions are hardlinked, scripts repointed and skipped names left out
+    """
+    source = pip_compile.isolation / "source"
+    target = pip_compile.isolation / "target"
+    _install_distribution(source, "httpx", "0.22.0")
+    _install_distribution(source, "pip", "23.3.1")
+    source_site_packages = source / "lib" / "python3.11" / "site-packages"
+    target_site_packages = target / "lib" / "python3.11" / "site-packages"
+    target_site_packages.mkdir(parents=True)
+    assert find_site_packages(source, ["/usr/lib/python3.11", str(source_site_packages)]) == (
+        source_site_packages
+    )
+    cloned = clone_distributions(
+        source_root=source,
+        source_site_packages=source_site_packages,
+        target_root=target,
+        scripts_directory="bin",
+        skip={"pip"},
+    )
+    assert cloned == 4
+    assert get_distribution_names(target_site_packages) == {"httpx"}
+    linked_file = target_site_packages / "httpx" / "__init__.py"
+    assert os.path.samefile(linked_file, source_site_packages / "httpx" / "__init__.py")
+    assert not (target_site_packages / "httpx" / "__pycache__").exists()
+    script = target / "bin" / "httpx"
+    assert script.read_text() == f"#!{target}/bin/python\nimport httpx\n"
+    assert os.access(script, os.X_OK)
@@ -0,0 +1,98 @@
+"""
+Testing the resolver daemon
+"""
+
+import os
+import pathlib
+import sys
+import time
+from unittest.mock import Mock, PropertyMock, patch
+
+import pytest
+
+from hatch_pip_compile.daemon import ResolverDaemon
+from tests.conftest import PipCompileFixture
+
+
+def test_socket_path_too_long(tmp_path: pathlib.Path) -> None:
+    """
+    The daemon isn't used when its socket path is too long for a Unix socket
+    """
+    daemon = ResolverDaemon(directory=tmp_path / ("x" * 100), python_executable=sys.executable)
+    assert daemon.supported is False
+    assert daemon.resolve(args=[], cwd=str(tmp_path), env={}) is None
+
+
+def test_socket_path_piptools(tmp_path: pathlib.Path) -> None:
+    """
+    Workers for different versions of `pip-tools` get different sockets
+    """
+    daemon = ResolverDaemon(directory=tmp_path, python_executable=sys.executable)
+    assert daemon.piptools_version is not None
+    socket_path = daemon.socket_path
+    with patch.object(
+        ResolverDaemon, "piptools_version", new_callable=PropertyMock, return_value="0.0.1"
+    ):
+        assert daemon.socket_path != socket_path
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Unix sockets only")
+def test_warm_worker(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    The worker is spawned on first use, serves every later request and exits once idle
+    """
+    monkeypatch.setattr(ResolverDaemon, "idle_timeout", 2)
+    daemon = ResolverDaemon(directory=tmp_path / "daemons", python_executable=sys.executable)
+    if not daemon.supported:
+        pytest.skip("temporary directory is too deep for a Unix socket")
+    input_file = tmp_path / "requirements.in"
+    input_file.write_text("")
+    for output_name in ["first.txt", "second.txt"]:
+        result = daemon.resolve(
+            args=["--quiet", "--no-header", "--no-index", "--output-file", output_name],
+            cwd=str(tmp_path),
+            env={**os.environ, "PIP_CONFIG_FILE": os.devnull},
+        )
+        assert result is not None
+        assert result["returncode"] == 0
+        assert (tmp_path / output_name).exists()
+    result = daemon.resolve(args=["--not-an-option"], cwd=str(tmp_path), env=dict(os.environ))
+    assert result is not None
+    assert result["returncode"] == 2
+    assert "--not-an-option" in result["stderr"]
+    deadline = time.monotonic() + 30
+    while daemon.socket_path.exists() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert daemon.connect() is None
+
+
+def test_resolver_daemon_fallback(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    `pip-compile` runs as a subprocess when the daemon isn't available
+    """
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["default"]["pip-compile-daemon"] = True
+    pip_compile.update_pyproject()
+    environment = pip_compile.reload_environment("default")
+    environment.create()
+    with patch.object(ResolverDaemon, "resolve", return_value=None) as mock_resolve:
+        environment.pip_compile_cli()
+    assert mock_resolve.call_count == 1
+    assert mock_check_command.call_count == 1
+    args = mock_resolve.call_args.kwargs["args"]
+    assert args[:2] == ["--quiet", "--no-header"]
+    assert mock_check_command.call_args[0][0][-len(args) :] == args
+
+
+def test_resolver_daemon(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    `pip-compile` runs in the daemon when it's available
+    """
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["default"]["pip-compile-daemon"] = True
+    pip_compile.update_pyproject()
+    environment = pip_compile.reload_environment("default")
+    environment.create()
+    result = {"returncode": 0, "stdout": "", "stderr": ""}
+    with patch.object(ResolverDaemon, "resolve", return_value=result):
+        environment.pip_compile_cli()
+    mock_check_command.assert_not_called()
+    assert environment.lockfile_up_to_date is True
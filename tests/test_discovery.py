@@ -0,0 +1,70 @@
+"""
+Testing the environment discovery cache
+"""
+
+import pathlib
+from unittest.mock import patch
+
+import pytest
+
+from hatch_pip_compile.api import discover_environment_configs
+from hatch_pip_compile.discovery import EnvironmentDiscovery
+from tests.conftest import PipCompileFixture
+
+
+def test_discover_environment_configs(pip_compile: PipCompileFixture) -> None:
+    """
+    Environments are discovered in-process and served from the cache until the config changes
+    """
+    environment_configs = discover_environment_configs(root=pip_compile.isolation)
+    assert sorted(environment_configs) == ["default", "docs", "lint", "misc", "test"]
+    assert environment_configs["docs"] == {
+        "type": "pip-compile",
+        "pip-compile-constraint": "misc",
+    }
+    with patch("hatch_pip_compile.api.get_environment_configs") as mock_get:
+        assert discover_environment_configs(root=pip_compile.isolation) == environment_configs
+    mock_get.assert_not_called()
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["lint"]["type"] = "virtual"
+    pip_compile.update_pyproject()
+    environment_configs = discover_environment_configs(root=pip_compile.isolation)
+    assert "lint" not in environment_configs
+
+
+def test_environment_collectors(pip_compile: PipCompileFixture) -> None:
+    """
+    Projects with environment collector plugins bypass the cache
+    """
+    assert EnvironmentDiscovery.is_cacheable({"default": {}}) is True
+    assert EnvironmentDiscovery.is_cacheable({"default": {}, "mkdocs": {}}) is False
+    pip_compile.toml_doc["tool"]["hatch"]["env"] = {"collectors": {"mkdocs": {}}}
+    pip_compile.update_pyproject()
+    environment_configs = {"default": {"type": "pip-compile", "dependencies": ["six"]}}
+    with patch(
+        "hatch_pip_compile.api.get_environment_configs", return_value=environment_configs
+    ) as mock_get:
+        for _ in range(2):
+            assert discover_environment_configs(root=pip_compile.isolation) == {
+                "default": {"type": "pip-compile"}
+            }
+    assert mock_get.call_count == 2
+    assert not any(pip_compile.isolated_data_dir.rglob("discovery/*.json"))
+
+
+def test_override_variables(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Cached environments are stale once a variable used by `overrides.env` changes
+    """
+    environments = {
+        "default": {"overrides": {"env": {"CI": {"key": "type", "value": "virtual"}}}},
+        "test": {"dependencies": ["pytest"]},
+    }
+    assert EnvironmentDiscovery.get_override_variables(environments) == ["CI"]
+    discovery = EnvironmentDiscovery(directory=tmp_path)
+    monkeypatch.delenv("CI", raising=False)
+    cached = {"default": {"type": "pip-compile"}}
+    discovery.set(root=tmp_path, key="key", environments=cached, variables=["CI"])
+    assert discovery.get(root=tmp_path, key="key") == cached
+    assert discovery.get(root=tmp_path, key="other") is None
+    monkeypatch.setenv("CI", "true")
+    assert discovery.get(root=tmp_path, key="key") is None
@@ -2,8 +2,16 @@
 Installation Tests
 """
 
-from unittest.mock import Mock
+import pathlib
+import sys
+from unittest.mock import Mock, patch
 
+import pytest
+
+from hatch_pip_compile.base import find_uv_binary
+from hatch_pip_compile.exceptions import MissingArtifactsError
+from hatch_pip_compile.installer import UvInstaller
+from hatch_pip_compile.wheelhouse import Wheelhouse
 from tests.conftest import PipCompileFixture
 
 
@@ -27,3 +35,155 @@ def test_pip_install_dependencies(mock_check_command: Mock, pip_compile: PipComp
     if "--no-python-version-warning" in call_args:
         call_args.remove("--no-python-version-warning")  # pragma: no cover
     assert call_args == expected_call
+
+
+def test_uv_install_binary(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    The configured `uv` binary is called directly instead of `python -m uv`
+    """
+    environment = pip_compile.default_environment
+    environment.config["pip-compile-uv-path"] = sys.executable
+    environment.create()
+    installer = UvInstaller(environment=environment)
+    installer.install_dependencies()
+    call_args = mock_check_command.call_args[0][0]
+    assert call_args[:3] == [sys.executable, "pip", "install"]
+    assert call_args[3:5] == ["--python", environment.python_executable]
+
+
+def test_uv_install_fallback(pip_compile: PipCompileFixture) -> None:
+    """
+    `python -m uv` is used when no `uv` binary can be found
+    """
+    environment = pip_compile.default_environment
+    installer = UvInstaller(environment=environment)
+    with patch("hatch_pip_compile.base.shutil.which", return_value=None):
+        assert installer.uv_binary is None
+        assert installer.uv_command == [installer.tool_python_executable, "-m", "uv"]
+
+
+def test_find_uv_binary_cached(tmp_path: pathlib.Path) -> None:
+    """
+    Found binaries are cached, misses are looked up again
+    """
+    search_path = str(tmp_path)
+    with patch("hatch_pip_compile.base.shutil.which", return_value=None) as mock_which:
+        assert find_uv_binary(search_path=search_path) is None
+        assert find_uv_binary(search_path=search_path) is None
+        assert mock_which.call_count == 2
+    with patch("hatch_pip_compile.base.shutil.which", return_value="/bin/uv") as mock_which:
+        assert find_uv_binary(search_path=search_path) == "/bin/uv"
+        assert find_uv_binary(search_path=search_path) == "/bin/uv"
+        assert mock_which.call_count == 1
+
+
+def test_pip_install_incremental(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    Only changed pins are installed and unlocked distributions are uninstalled
+    """
+    environment = pip_compile.reload_environment("lint")
+    environment.config["pip-compile-incremental-install"] = True
+    environment.create()
+    installed = {
+        "mypy": "1.7.1",
+        "mypy-extensions": "1.0.0",
+        "ruff": "0.1.5",
+        "requests": "2.31.0",
+        "pip": "23.3.1",
+    }
+    with patch.object(environment.installer, "get_distributions", return_value=[]), patch.object(
+        environment.installer, "get_installed_versions", return_value=installed
+    ), patch.object(environment.installer, "get_protected_distributions", return_value={"pip"}):
+        environment.installer.install_dependencies()
+    uninstall_args, install_args = (call[0][0] for call in mock_check_command.call_args_list)
+    assert uninstall_args[4] == "uninstall"
+    assert uninstall_args[-1] == "requests"
+    assert install_args[4] == "install"
+    requirements_file = install_args[install_args.index("--requirement") + 1]
+    assert "requirements.txt" in requirements_file
+
+
+def test_pip_install_incremental_in_sync(
+    mock_check_command: Mock, pip_compile: PipCompileFixture
+) -> None:
+    """
+    Nothing is run when the environment matches the lock file
+    """
+    environment = pip_compile.reload_environment("lint")
+    environment.config["pip-compile-incremental-install"] = True
+    environment.create()
+    installed = {
+        "mypy": "1.7.1",
+        "mypy-extensions": "1.0.0",
+        "ruff": "0.1.6",
+        "typing-extensions": "4.8.0",
+    }
+    with patch.object(
+        environment.installer, "get_installed_versions", return_value=installed
+    ), patch.object(environment.installer, "get_distributions", return_value=[]):
+        environment.installer.install_dependencies()
+    mock_check_command.assert_not_called()
+
+
+def test_pip_install_wheelhouse(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    The lock file is installed without an index when the wheelhouse holds every pin
+    """
+    environment = pip_compile.reload_environment("lint")
+    environment.config["pip-compile-wheelhouse"] = True
+    environment.wheelhouse = Wheelhouse(directory=pip_compile.isolation / "wheelhouse")
+    environment.create()
+    pins = {
+        "mypy": "1.7.1",
+        "mypy-extensions": "1.0.0",
+        "ruff": "0.1.6",
+        "typing-extensions": "4.8.0",
+    }
+    tag = environment.wheelhouse_target.tag
+    manifest = {}
+    environment.wheelhouse.directory.mkdir()
+    for name, version in pins.items():
+        filename = f"{name.replace('-', '_')}-{version}-py3-none-any.whl"
+        (environment.wheelhouse.directory / filename).write_bytes(b"")
+        manifest[f"{tag}/{name}=={version}"] = {"filename": filename, "sha256": ""}
+        manifest[f"pp39-none-any/{name}=={version}"] = {"filename": filename, "sha256": ""}
+    del manifest[f"{tag}/typing-extensions==4.8.0"]
+    environment.wheelhouse.write_manifest(manifest)
+    environment.installer.install_dependencies()
+    call_args = mock_check_command.call_args[0][0]
+    assert "--no-index" not in call_args
+    assert call_args[call_args.index("--find-links") + 1] == str(environment.wheelhouse.directory)
+    manifest[f"{tag}/typing-extensions==4.8.0"] = manifest["pp39-none-any/typing-extensions==4.8.0"]
+    environment.wheelhouse.write_manifest(manifest)
+    environment.installer.install_dependencies()
+    assert "--no-index" in mock_check_command.call_args[0][0]
+
+
+def test_pip_install_offline_missing(
+    mock_check_command: Mock, pip_compile: PipCompileFixture
+) -> None:
+    """
+    Offline installs fail fast, listing the pins missing from the wheelhouse
+    """
+    environment = pip_compile.reload_environment("lint")
+    environment.config["pip-compile-offline"] = True
+    environment.wheelhouse = Wheelhouse(directory=pip_compile.isolation / "wheelhouse")
+    environment.create()
+    with pytest.raises(MissingArtifactsError, match="mypy==1.7.1, mypy-extensions==1.0.0"):
+        environment.installer.install_dependencies()
+    mock_check_command.assert_not_called()
+
+
+def test_uv_install_offline(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    `uv` installs offline from its own cache without the wheelhouse check
+    """
+    environment = pip_compile.update_environment_installer("lint", "uv")
+    environment.config["pip-compile-offline"] = True
+    environment.config["pip-compile-uv-path"] = sys.executable
+    environment.wheelhouse = Wheelhouse(directory=pip_compile.isolation / "wheelhouse")
+    environment.create()
+    environment.installer.install_dependencies()
+    call_args = mock_check_command.call_args[0][0]
+    assert "--offline" in call_args
+    assert "--no-index" not in call_args
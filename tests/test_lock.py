@@ -1,11 +1,16 @@
 """
 Testing the `lock` module
 """
+
+import hashlib
+import io
 from textwrap import dedent
+from unittest.mock import PropertyMock, patch
 
 from packaging.requirements import Requirement
 from packaging.version import Version
 
+from hatch_pip_compile.lock import LockFileContents, PipCompileLock, iter_normalized_chunks
 from tests.conftest import PipCompileFixture
 
 
@@ -106,3 +111,194 @@ def test_replace_temporary_lockfile_unix(pip_compile: PipCompileFixture) -> None
         # via hatch.envs.default
     """
     assert cleaned_text == dedent(expected_raw).strip()
+
+
+def test_read_lock_file_cached(pip_compile: PipCompileFixture) -> None:
+    """
+    The lock file is parsed once and re-parsed only when it changes
+    """
+    lock = pip_compile.default_environment.piptools_lock
+    with patch.object(
+        LockFileContents, "from_path", wraps=LockFileContents.from_path
+    ) as mock_from_path:
+        assert lock.lock_file_version == Version("3.11")
+        assert lock.read_header_requirements() == [Requirement("hatch")]
+        assert lock.compare_constraint_sha("abc") is False
+        content_hash = lock.get_file_content_hash()
+        assert mock_from_path.call_count == 1
+        lock_file = pip_compile.default_environment.piptools_lock_file
+        lock_file.write_text(lock_file.read_text().replace("# - hatch", "# - hatch\n# - requests"))
+        assert set(lock.read_header_requirements()) == {
+            Requirement("hatch"),
+            Requirement("requests"),
+        }
+        assert lock.get_file_content_hash() != content_hash
+        assert mock_from_path.call_count == 2
+
+
+def test_lock_file_contents_constraint_sha(pip_compile: PipCompileFixture) -> None:
+    """
+    Test the constraint SHA is parsed from the lock file header
+    """
+    lock_raw = """
+    #
+    # This file is autogenerated by hatch-pip-compile with Python 3.11
+    #
+    # [constraints] requirements.txt (SHA256: abc123)
+    #
+    # - pytest
+    #
+
+    pytest==7.4.3
+    """
+    lock_file = pip_compile.isolation / "constraint.txt"
+    lock_file.write_text(dedent(lock_raw).strip())
+    contents = LockFileContents.from_path(lock_file)
+    assert contents.constraint_sha == "abc123"
+    assert contents.python_version == Version("3.11")
+    assert contents.requirements == (Requirement("pytest"),)
+
+
+def test_select_lock_entries(pip_compile: PipCompileFixture) -> None:
+    """
+    Only the selected entries and option lines are kept, hashes included
+    """
+    lock_raw = """
+    #
+    # This file is autogenerated by hatch-pip-compile with Python 3.11
+    #
+    # - pytest
+    #
+
+    --index-url https://pypi.org/simple
+
+    iniconfig==2.0.0 \\
+        --hash=sha256:abc
+        # via pytest
+    Pytest==7.4.3 \\
+        --hash=sha256:def \\
+        --hash=sha256:ghi
+        # via hatch.envs.default
+    """
+    environment = pip_compile.default_environment
+    environment.piptools_lock_file.write_text(dedent(lock_raw).strip())
+    selected = environment.piptools_lock.select_lock_entries(names={"pytest"})
+    assert selected.splitlines() == [
+        "--index-url https://pypi.org/simple",
+        "Pytest==7.4.3 --hash=sha256:def --hash=sha256:ghi",
+    ]
+
+
+def test_lock_file_contents_universal(pip_compile: PipCompileFixture) -> None:
+    """
+    Universal lock files are read from the header and match every Python version
+    """
+    lock_raw = """
+    #
+    # This file is autogenerated by hatch-pip-compile with Python 3.8
+    #
+    # [universal]
+    #
+    # - hatch
+    #
+
+    hatch==1.7.0
+    tomli==2.0.1 ; python_version < "3.11"
+    """
+    environment = pip_compile.default_environment
+    environment.piptools_lock_file.write_text(dedent(lock_raw).strip())
+    contents = environment.piptools_lock.read_lock_file()
+    assert contents.universal is True
+    assert contents.python_version == Version("3.8")
+    assert contents.requirements == (Requirement("hatch"),)
+    assert environment.piptools_lock.compare_python_versions() is True
+
+
+def test_iter_normalized_chunks() -> None:
+    """
+    CRLF line endings are normalized even when split across chunks
+    """
+    contents = b"hatch==1.7.0\r\n    # via hatch.envs.default\r\ntomli==2.0.1\r"
+    chunks = list(iter_normalized_chunks(io.BytesIO(contents), chunk_size=13))
+    assert b"".join(chunks) == contents.replace(b"\r\n", b"\n")
+
+
+def test_lock_file_contents_streamed_hash(pip_compile: PipCompileFixture) -> None:
+    """
+    The content hash doesn't depend on line endings or the size of the lock file
+    """
+    lock_raw = """
+    #
+    # This file is autogenerated by hatch-pip-compile with Python 3.11
+    #
+    # - hatch
+    #
+
+    """
+    body = "".join(f"package-{i}==1.0.0 \\\n    --hash=sha256:{i:064x}\n" for i in range(5000))
+    lock_text = dedent(lock_raw).lstrip() + body
+    lf_file = pip_compile.isolation / "lf.txt"
+    crlf_file = pip_compile.isolation / "crlf.txt"
+    lf_file.write_bytes(lock_text.encode())
+    crlf_file.write_bytes(lock_text.replace("\n", "\r\n").encode())
+    lf_contents = LockFileContents.from_path(lf_file)
+    crlf_contents = LockFileContents.from_path(crlf_file)
+    assert lf_contents.content_hash == hashlib.sha256(lock_text.encode()).hexdigest()
+    assert crlf_contents.content_hash == lf_contents.content_hash
+    assert crlf_contents.requirements == (Requirement("hatch"),)
+    assert crlf_contents.python_version == Version("3.11")
+
+
+def test_lock_file_contents_multibyte_chunk_boundary(pip_compile: PipCompileFixture) -> None:
+    """
+    A multibyte character split across chunks doesn't break parsing the header
+    """
+    lock_raw = """
+    #
+    # This file is autogenerated by hatch-pip-compile with Python 3.11
+    #
+    # - hatch
+    #
+
+    hatch==1.7.0
+    """
+    lock_text = dedent(lock_raw).lstrip()
+    padding = 2**16 - 1 - len(lock_text.encode()) - len("#")
+    lock_text += "#" + "a" * padding + "é\n"
+    assert lock_text.encode()[2**16 - 1 : 2**16 + 1] == "é".encode()
+    lock_file = pip_compile.isolation / "multibyte.txt"
+    lock_file.write_bytes(lock_text.encode())
+    contents = LockFileContents.from_path(lock_file)
+    assert contents.requirements == (Requirement("hatch"),)
+    assert contents.content_hash == hashlib.sha256(lock_text.encode()).hexdigest()
+
+
+def test_process_lock(pip_compile: PipCompileFixture) -> None:
+    """
+    The lock file is rewritten in place with the header prepended
+    """
+    lock_raw = """
+    httpx==0.22.0
+        # via -r /tmp/tmp_kn984om/lint.in
+    """
+    lock_file = pip_compile.isolation / "lock.txt"
+    lock_file.write_text(dedent(lock_raw).lstrip())
+    environment = pip_compile.reload_environment("lint")
+    with patch.object(
+        PipCompileLock, "current_python_version", new_callable=PropertyMock
+    ) as mock_version:
+        mock_version.return_value = Version("3.11")
+        environment.piptools_lock.process_lock(lockfile=lock_file)
+    expected_raw = """
+    #
+    # This file is autogenerated by hatch-pip-compile with Python 3.11
+    #
+    # - mypy>=1.6.1
+    # - ruff~=0.1.4
+    #
+
+    httpx==0.22.0
+        # via hatch.envs.lint
+    """
+    assert lock_file.read_text() == dedent(expected_raw).lstrip()
+    assert [path.name for path in lock_file.parent.glob(".lock.txt.*")] == []
@@ -0,0 +1,57 @@
+"""
+Testing the `manifest` module
+"""
+
+from unittest.mock import patch
+
+from hatch_pip_compile.lock import PipCompileLock
+from hatch_pip_compile.manifest import LockManifest
+from tests.conftest import PipCompileFixture
+
+
+def test_manifest_missing(pip_compile: PipCompileFixture) -> None:
+    """
+    A missing manifest is treated as empty
+    """
+    manifest = LockManifest(path=pip_compile.isolation / "missing.json")
+    assert manifest.read() == {}
+    assert manifest.get("default") is None
+
+
+def test_manifest_corrupt(pip_compile: PipCompileFixture) -> None:
+    """
+    A corrupt manifest is treated as empty and is overwritten on update
+    """
+    manifest_path = pip_compile.isolation / "manifest.json"
+    manifest_path.write_text("{not json")
+    manifest = LockManifest(path=manifest_path)
+    assert manifest.read() == {}
+    manifest.update("default", {"lock_hash": "abc"})
+    assert LockManifest(path=manifest_path).get("default") == {"lock_hash": "abc"}
+
+
+def test_lock_state_recorded(pip_compile: PipCompileFixture) -> None:
+    """
+    A full lockfile check records the lock state, later checks use the manifest
+    """
+    environment = pip_compile.default_environment
+    assert environment.lock_state_matches_manifest() is False
+    assert environment.lockfile_up_to_date is True
+    assert environment.lock_state_matches_manifest() is True
+    new_environment = pip_compile.reload_environment("default")
+    with patch.object(PipCompileLock, "compare_requirements") as mock_compare:
+        assert new_environment.lockfile_up_to_date is True
+    mock_compare.assert_not_called()
+
+
+def test_lock_state_invalidated(pip_compile: PipCompileFixture) -> None:
+    """
+    Changing the lock file invalidates the manifest entry
+    """
+    environment = pip_compile.default_environment
+    assert environment.lockfile_up_to_date is True
+    lock_text = environment.piptools_lock_file.read_text()
+    environment.piptools_lock_file.write_text(lock_text.replace("# - hatch", "#"))
+    new_environment = pip_compile.reload_environment("default")
+    assert new_environment.lock_state_matches_manifest() is False
+    assert new_environment.lockfile_up_to_date is False
@@ -2,12 +2,17 @@
 Plugin tests.
 """
 
-from unittest.mock import Mock
+import os
+from unittest.mock import Mock, PropertyMock, patch
 
 import pytest
+from packaging.version import Version
 
+from hatch_pip_compile.api import check_lock_files
 from hatch_pip_compile.exceptions import HatchPipCompileError
+from hatch_pip_compile.plugin import PipCompileEnvironment
 from hatch_pip_compile.resolver import PipCompileResolver
+from hatch_pip_compile.toolchain import ToolchainEnvironment
 from tests.conftest import PipCompileFixture
 
 
@@ -153,3 +158,323 @@ def test_resolver_instance_pip_compile(pip_compile: PipCompileFixture) -> None:
     pip_compile.update_pyproject()
     environment = pip_compile.reload_environment("default")
     assert isinstance(environment.resolver, PipCompileResolver)
+
+
+def test_dependency_hash_fast_path(pip_compile: PipCompileFixture) -> None:
+    """
+    Test that `dependency_hash` skips `run_pip_compile` when nothing changed
+    """
+    environment = pip_compile.default_environment
+    with patch.object(PipCompileEnvironment, "run_pip_compile") as mock_run_pip_compile:
+        stats = PipCompileEnvironment.dependency_hash_stats.copy()
+        first_hash = environment.dependency_hash()
+        second_hash = pip_compile.reload_environment("default").dependency_hash()
+        assert first_hash == second_hash
+        assert mock_run_pip_compile.call_count == 1
+        assert PipCompileEnvironment.dependency_hash_stats["fast"] == stats["fast"] + 1
+        lock_text = environment.piptools_lock_file.read_text()
+        environment.piptools_lock_file.write_text(lock_text + "\n")
+        third_hash = pip_compile.reload_environment("default").dependency_hash()
+        assert third_hash != first_hash
+        assert mock_run_pip_compile.call_count == 2
+
+
+def test_dependency_hash_constraint_dependencies(pip_compile: PipCompileFixture) -> None:
+    """
+    Changing the constraint environment's dependencies invalidates the fast path
+
+    The `test` environment doesn't inherit the `default` environment's
+    dependencies here, only its lock file constrains them.
+    """
+    test_config = pip_compile.toml_doc["tool"]["hatch"]["envs"]["test"]
+    test_config["template"] = "test"
+    test_config["type"] = "pip-compile"
+    test_config["pip-compile-constraint"] = "default"
+    pip_compile.update_pyproject()
+    with patch.object(PipCompileEnvironment, "run_pip_compile") as mock_run_pip_compile:
+        first_hash = pip_compile.reload_environment("test").dependency_hash()
+        second_hash = pip_compile.reload_environment("test").dependency_hash()
+        assert first_hash == second_hash
+        assert mock_run_pip_compile.call_count == 1
+        pip_compile.toml_doc["tool"]["hatch"]["envs"]["default"]["dependencies"] = ["requests"]
+        pip_compile.update_pyproject()
+        _ = pip_compile.reload_environment("test").dependency_hash()
+        assert mock_run_pip_compile.call_count == 2
+
+
+def test_run_pip_compile_lock_only(
+    mock_check_command: Mock, pip_compile: PipCompileFixture
+) -> None:
+    """
+    Lock-only mode locks the environment without preparing it
+
+    The resolver runs from a toolchain and the virtualenvs created
+    for the resolver are removed afterwards.
+    """
+    environment = pip_compile.test_environment
+    for lock_file in [environment.piptools_lock_file, environment.piptools_constraints_file]:
+        lock_file.write_text(lock_file.read_text().replace("# - hatch", "#"))
+    with patch.object(PipCompileEnvironment, "prepare_environment") as mock_prepare, patch.object(
+        PipCompileEnvironment, "sync_dependencies"
+    ) as mock_sync, patch.object(ToolchainEnvironment, "ensure") as mock_ensure:
+        environment.run_pip_compile(lock_only=True)
+    mock_prepare.assert_not_called()
+    mock_sync.assert_not_called()
+    assert mock_ensure.call_count == 2
+    resolver_command = mock_check_command.call_args[0][0]
+    assert resolver_command[0] == environment.resolver.toolchain.python_executable
+    assert environment.constraint_env.lock_only is True
+    assert environment.lockfile_up_to_date is True
+    assert environment.virtualenv_exists() is False
+    assert environment.constraint_env.virtualenv_exists() is False
+
+
+def test_dependencies_in_sync_marker(
+    mock_check_command: Mock, pip_compile: PipCompileFixture
+) -> None:
+    """
+    The sync marker short-circuits `dependencies_in_sync` unless in paranoid mode
+    """
+    environment = pip_compile.default_environment
+    environment.create()
+    environment.installer.sync_dependencies()
+    assert environment.installer.read_sync_marker() == environment.installer.sync_state
+    with patch("hatch_pip_compile.plugin.dependencies_in_sync") as mock_in_sync:
+        assert environment.dependencies_in_sync() is True
+        mock_in_sync.assert_not_called()
+        environment.config["pip-compile-paranoid-sync"] = True
+        mock_in_sync.return_value = False
+        assert environment.dependencies_in_sync() is False
+        mock_in_sync.assert_called_once()
+    environment.installer.clear_sync_marker()
+    assert environment.installer.read_sync_marker() is None
+
+
+def test_uv_resolver_venv_free(pip_compile: PipCompileFixture) -> None:
+    """
+    The venv-free uv resolver targets the `python` option with `--python-version`
+    """
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["default"]["pip-compile-venv-free"] = True
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["default"]["python"] = "3.9"
+    environment = pip_compile.update_environment_resolver("default", "uv")
+    with patch("hatch_pip_compile.base.find_uv_binary", return_value="/bin/uv"):
+        command = environment.resolver.resolver_executable
+    assert command[:3] == ["/bin/uv", "pip", "compile"]
+    assert command[command.index("--python-version") + 1] == "3.9"
+    assert environment.piptools_lock.current_python_version == Version("3.9")
+    markers = environment.resolver.marker_environment
+    assert markers["python_version"] == "3.9"
+    assert markers["python_full_version"] == "3.9.0"
+    assert environment.resolver.toolchain is None
+    with patch.object(PipCompileEnvironment, "create") as mock_create, patch.object(
+        PipCompileEnvironment, "virtualenv_exists", return_value=False
+    ), patch.object(PipCompileEnvironment, "pip_compile_cli"):
+        environment.run_pip_compile(lock_only=True)
+    mock_create.assert_not_called()
+
+
+def test_venv_free_requires_uv(pip_compile: PipCompileFixture) -> None:
+    """
+    `pip-compile-venv-free` is rejected for the pip-compile resolver
+    """
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["default"]["pip-compile-venv-free"] = True
+    with pytest.raises(HatchPipCompileError):
+        pip_compile.update_environment_resolver("default", "pip-compile")
+
+
+def test_universal_matrix_lock_file(pip_compile: PipCompileFixture) -> None:
+    """
+    Universal matrix environments share a lock file resolved for the oldest Python
+    """
+    test_config = pip_compile.toml_doc["tool"]["hatch"]["envs"]["test"]
+    test_config["pip-compile-resolver"] = "uv"
+    test_config["pip-compile-universal"] = True
+    test_config["matrix"] = [{"python": ["3.11", "3.9", "3.10"]}]
+    pip_compile.update_pyproject()
+    environment = pip_compile.reload_environment("test.py3.11")
+    assert environment.matrix_template == "test"
+    assert environment.piptools_lock_file == (
+        pip_compile.isolation / "requirements" / "requirements-test.txt"
+    )
+    with patch("hatch_pip_compile.base.find_uv_binary", return_value="/bin/uv"), patch.object(
+        PipCompileEnvironment,
+        "python_executable",
+        new_callable=PropertyMock,
+        return_value="/bin/python3.11",
+    ):
+        command = environment.resolver.resolver_executable
+    assert command[command.index("--python") + 1] == "/bin/python3.11"
+    assert command[command.index("--python-version") + 1] == "3.9"
+    assert command[-1] == "--universal"
+
+
+def test_universal_matrix_dependencies(pip_compile: PipCompileFixture) -> None:
+    """
+    Universal matrices whose entries have different dependencies are rejected
+    """
+    test_config = pip_compile.toml_doc["tool"]["hatch"]["envs"]["test"]
+    test_config["pip-compile-resolver"] = "uv"
+    test_config["pip-compile-universal"] = True
+    test_config["matrix"] = [{"python": ["3.10", "3.11"]}]
+    pip_compile.update_pyproject()
+    environment = pip_compile.reload_environment("test.py3.11")
+    assert environment.matrix_environment_names == ["test.py3.10", "test.py3.11"]
+    environment.check_universal_dependencies()
+    test_config["overrides"] = {
+        "matrix": {"python": {"dependencies": [{"value": "requests", "if": ["3.10"]}]}}
+    }
+    pip_compile.update_pyproject()
+    environment = pip_compile.reload_environment("test.py3.11")
+    with pytest.raises(HatchPipCompileError, match="test.py3.11 and test.py3.10"):
+        _ = environment.lockfile_up_to_date
+    with pytest.raises(HatchPipCompileError, match="different dependencies"):
+        environment.check_lock_file()
+
+
+def test_get_matrix_template() -> None:
+    """
+    Matrix environments are mapped back to the environment they were generated from
+    """
+    environment_dict = {"default": {}, "test": {"matrix": [{"python": ["3.11"]}]}}
+    assert PipCompileEnvironment.get_matrix_template("test", environment_dict) == "test"
+    assert PipCompileEnvironment.get_matrix_template("test.py3.11", environment_dict) == "test"
+    assert PipCompileEnvironment.get_matrix_template("py3.11", environment_dict) == "default"
+
+
+def test_environment_registry(pip_compile: PipCompileFixture) -> None:
+    """
+    Constraint environments are built once and shared by their dependents
+    """
+    environment = pip_compile.test_environment
+    other_environment = pip_compile.reload_environment("test")
+    assert environment.constraint_env is other_environment.constraint_env
+    assert environment.constraint_chain == [environment.constraint_env]
+    with patch.object(
+        environment.constraint_env.piptools_lock, "compare_requirements", return_value=True
+    ) as mock_compare, patch.object(
+        PipCompileEnvironment, "lock_state_matches_manifest", return_value=False
+    ):
+        assert environment.constraint_env.lock_file_current is True
+        assert other_environment.constraint_env.lock_file_current is True
+        mock_compare.assert_called_once()
+
+
+def test_environment_registry_stale(pip_compile: PipCompileFixture) -> None:
+    """
+    Shared constraint environments are rebuilt once the project changes
+    """
+    environment = pip_compile.test_environment
+    constraint_env = environment.constraint_env
+    assert constraint_env.lockfile_up_to_date is True
+    other_environment = pip_compile.reload_environment("test")
+    assert other_environment.constraint_env is constraint_env
+    with patch.object(
+        PipCompileEnvironment, "check_lockfile_up_to_date", return_value=False
+    ) as mock_check:
+        assert constraint_env.lockfile_up_to_date is True
+        lock_stat = constraint_env.piptools_lock_file.stat()
+        os.utime(constraint_env.piptools_lock_file, ns=(lock_stat.st_atime_ns, 0))
+        assert constraint_env.lockfile_up_to_date is False
+    mock_check.assert_called_once()
+    pip_compile.toml_doc["project"]["dependencies"] = ["requests"]
+    pip_compile.update_pyproject()
+    new_environment = pip_compile.reload_environment("test")
+    assert new_environment.constraint_env is not constraint_env
+    assert new_environment.constraint_env.dependencies == ["requests"]
+
+
+def test_environment_registry_no_application(pip_compile: PipCompileFixture) -> None:
+    """
+    Environments built outside of a hatch `Application` are shared through the project metadata
+    """
+    environment = pip_compile.test_environment
+    with patch.object(PipCompileEnvironment, "app", new_callable=PropertyMock, return_value=Mock()):
+        constraint_env = environment.get_piptools_environment("default")
+        assert isinstance(constraint_env, PipCompileEnvironment)
+        assert environment.get_piptools_environment("default") is constraint_env
+        assert constraint_env.get_piptools_environment("default") is constraint_env
+
+
+def test_constraint_cycle(pip_compile: PipCompileFixture) -> None:
+    """
+    Constraint cycles are reported instead of recursing forever
+    """
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["lint"]["pip-compile-constraint"] = "test"
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["test"]["pip-compile-constraint"] = "lint"
+    pip_compile.update_pyproject()
+    environment = pip_compile.reload_environment("test")
+    with pytest.raises(HatchPipCompileError, match="test -> lint -> test"):
+        _ = environment.constraint_env
+
+
+def test_offline_resolver_args(
+    pip_compile: PipCompileFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Both resolvers are kept off the network in offline mode
+    """
+    monkeypatch.setenv("PIP_COMPILE_OFFLINE", "1")
+    environment = pip_compile.reload_environment("lint")
+    environment.wheelhouse.directory.mkdir(parents=True)
+    args = environment.resolver.get_pip_compile_args(input_file="in.txt", output_file="out.txt")
+    assert "--no-index" in args
+    assert "--no-emit-find-links" in args
+    assert args[args.index("--find-links") + 1] == str(environment.wheelhouse.directory)
+    environment = pip_compile.update_environment_resolver("lint", "uv")
+    with patch("hatch_pip_compile.base.find_uv_binary", return_value="/bin/uv"), patch.object(
+        PipCompileEnvironment,
+        "python_executable",
+        new_callable=PropertyMock,
+        return_value="/bin/python3.11",
+    ):
+        args = environment.resolver.get_pip_compile_args(input_file="in.txt", output_file="out.txt")
+    assert "--offline" in args
+    assert "--no-index" not in args
+
+
+def test_check_lock_file(pip_compile: PipCompileFixture) -> None:
+    """
+    Lock files are checked without creating a virtualenv or locking anything
+    """
+    environment = pip_compile.default_environment
+    assert environment.check_lock_file() == []
+    pip_compile.toml_doc["project"]["dependencies"] = ["requests"]
+    pip_compile.update_pyproject()
+    environment = pip_compile.reload_environment("default")
+    assert environment.dependencies == ["requests"]
+    assert environment.check_lock_file() == ["the dependencies don't match the lock file"]
+    environment.piptools_lock_file.unlink()
+    assert environment.check_lock_file() == [
+        f"the lock file is missing: {environment.piptools_lock_file}"
+    ]
+    assert environment.virtualenv_exists() is False
+
+
+def test_check_lock_files(pip_compile: PipCompileFixture) -> None:
+    """
+    The lock files of a freshly loaded project are checked in one pass
+    """
+    assert check_lock_files(environment_names=["default", "lint"], root=pip_compile.isolation) == {
+        "default": [],
+        "lint": [],
+    }
+    pip_compile.toml_doc["project"]["dependencies"] = ["requests"]
+    pip_compile.update_pyproject()
+    lint_lock_file = pip_compile.isolation / "requirements" / "requirements-lint.txt"
+    lint_lock_file.unlink()
+    assert check_lock_files(environment_names=["default", "lint"], root=pip_compile.isolation) == {
+        "default": ["the dependencies don't match the lock file"],
+        "lint": [f"the lock file is missing: {lint_lock_file}"],
+    }
+
+
+def test_check_lock_file_constraint(pip_compile: PipCompileFixture) -> None:
+    """
+    Lock files whose constraint lock file changed are out of date
+    """
+    environment = pip_compile.test_environment
+    constraints_file = environment.piptools_constraints_file
+    constraints_file.write_text(constraints_file.read_text() + "\n# changed\n")
+    assert environment.check_lock_file() == [
+        "the constraint SHA doesn't match the default lock file"
+    ]
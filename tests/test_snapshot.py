@@ -0,0 +1,74 @@
+"""
+Testing the `snapshot` module
+"""
+
+import contextlib
+import os
+import pathlib
+from unittest.mock import Mock
+
+from hatch_pip_compile.clone import get_distribution_names
+from hatch_pip_compile.snapshot import SnapshotStore
+from tests.conftest import PipCompileFixture
+from tests.test_clone import _install_distribution
+
+markers = {
+    "implementation_name": "cpython",
+    "platform_release": "6.1.0",
+    "python_full_version": "3.11.6",
+    "sys_platform": "linux",
+}
+
+
+def _mock_environment(
+    venv_directory: pathlib.Path, project_name: str = "hatch-pip-compile-test"
+) -> Mock:
+    """
+    Get an environment mock backed by a virtualenv directory
+    """
+    environment = Mock()
+    environment.name = "default"
+    environment.metadata.name = project_name
+    environment.virtual_env.directory = venv_directory
+    environment.virtual_env.environment = markers
+    environment.safe_activation = contextlib.nullcontext
+    environment.current_lock_hash.return_value = "abc123"
+    environment.site_packages_directory = venv_directory / "lib" / "python3.11" / "site-packages"
+    environment.scripts_directory = pathlib.Path("bin")
+    return environment
+
+
+def test_snapshot_key() -> None:
+    """
+    Snapshot keys only depend on the interpreter markers and the lock file
+    """
+    key = SnapshotStore.get_key(markers=markers, lock_hash="abc123")
+    assert key == SnapshotStore.get_key(
+        markers={**markers, "platform_release": "6.5.0"}, lock_hash="abc123"
+    )
+    assert key != SnapshotStore.get_key(
+        markers={**markers, "python_full_version": "3.11.7"}, lock_hash="abc123"
+    )
+    assert key != SnapshotStore.get_key(markers=markers, lock_hash="def456")
+
+
+def test_snapshot_save_restore(pip_compile: PipCompileFixture) -> None:
+    """
+    Snapshots are restored into another virtualenv with relocated scripts
+    """
+    source = pip_compile.isolation / "source"
+    target = pip_compile.isolation / "target"
+    _install_distribution(source, "httpx", "0.22.0")
+    _install_distribution(source, "hatch-pip-compile-test", "0.1.0")
+    store = SnapshotStore(directory=pip_compile.isolation / "snapshots")
+    target_environment = _mock_environment(target)
+    assert store.restore(target_environment) is False
+    snapshot_path = store.save(_mock_environment(source))
+    assert snapshot_path.name.endswith(".tar.gz")
+    assert store.restore(target_environment) is True
+    target_site_packages = target_environment.site_packages_directory
+    assert get_distribution_names(target_site_packages) == {"httpx"}
+    assert not (target_site_packages / "httpx" / "__pycache__").exists()
+    script = target / "bin" / "httpx"
+    assert script.read_text() == f"#!{target}/bin/python\nimport httpx\n"
+    assert os.access(script, os.X_OK)
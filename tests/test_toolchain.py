@@ -0,0 +1,123 @@
+"""
+Testing the `toolchain` module
+"""
+
+import importlib.metadata as importlib_metadata
+import pathlib
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+from hatch_pip_compile.installer import PipSyncInstaller
+from hatch_pip_compile.resolver import PipCompileResolver
+from hatch_pip_compile.toolchain import ToolchainEnvironment
+from tests.conftest import PipCompileFixture
+
+
+def test_toolchain_disabled(pip_compile: PipCompileFixture) -> None:
+    """
+    Tools run from the environment itself by default
+    """
+    environment = pip_compile.default_environment
+    assert environment.resolver.toolchain is None
+    assert environment.resolver.resolver_executable[0] == "python"
+
+
+@pytest.fixture(autouse=True)
+def virtualenv_app_data(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Keep virtualenv's interpreter cache away from the other tests
+
+    The virtualenvs these tests build are deleted with the isolated project,
+    they must not be discovered as interpreters later on.
+    """
+    monkeypatch.setenv("VIRTUALENV_OVERRIDE_APP_DATA", str(tmp_path / "virtualenv"))
+
+
+def test_toolchain_commands(mock_check_command: Mock, pip_compile: PipCompileFixture) -> None:
+    """
+    Resolvers and `pip-sync` run from the shared toolchain, pointed at the environment
+    """
+    environment = pip_compile.default_environment
+    environment.config["pip-compile-shared-toolchain"] = True
+    environment.create()
+    resolver = PipCompileResolver(environment=environment)
+    installer = PipSyncInstaller(environment=environment)
+    toolchain = resolver.toolchain
+    assert isinstance(toolchain, ToolchainEnvironment)
+    assert toolchain.python == environment.parent_python
+    assert toolchain.python != environment.python_executable
+    assert toolchain.directory.parent == (
+        environment.isolated_data_directory / ".pip-compile" / "toolchains"
+    )
+    assert installer.toolchain.directory == toolchain.directory
+    assert resolver.resolver_executable[0] == toolchain.python_executable
+    with patch.object(ToolchainEnvironment, "ensure") as mock_ensure:
+        installer.install_dependencies()
+    mock_ensure.assert_called_once()
+    sync_command = mock_check_command.call_args[0][0]
+    assert sync_command[0] == toolchain.python_executable
+    python_executable_index = sync_command.index("--python-executable") + 1
+    assert sync_command[python_executable_index] == environment.python_executable
+
+
+def test_toolchain_lock(pip_compile: PipCompileFixture) -> None:
+    """
+    Locking with a shared toolchain doesn't install `pip-tools` into the environment
+    """
+    environment = pip_compile.default_environment
+    environment.config["pip-compile-shared-toolchain"] = True
+    environment.piptools_lock_file.unlink()
+    environment.create()
+    environment.run_pip_compile(lock_only=True)
+    assert environment.piptools_lock_file.exists()
+    toolchain = environment.resolver.toolchain
+    assert toolchain.exists()
+    assert toolchain.dependencies == [f"pip-tools=={importlib_metadata.version('pip-tools')}"]
+    pip_compile_script = pathlib.Path(toolchain.python_executable).parent / "pip-compile"
+    assert str(toolchain.directory) in pip_compile_script.read_text().splitlines()[0]
+    assert not pip_compile.is_installed(environment, "piptools")
+
+
+def test_toolchain_pin_dependencies() -> None:
+    """
+    Tools are pinned to the versions installed alongside the plugin when they support the Python
+    """
+    pip_tools_version = importlib_metadata.version("pip-tools")
+    assert ToolchainEnvironment.pin_dependencies(
+        dependencies=["pip-tools", "uv>=0.1", "not-a-real-tool"], python_version="3.11.0"
+    ) == [f"pip-tools=={pip_tools_version}", "uv>=0.1", "not-a-real-tool"]
+    assert ToolchainEnvironment.pin_dependencies(
+        dependencies=["pip-tools"], python_version="2.7.18"
+    ) == ["pip-tools"]
+
+
+def test_toolchain_incomplete(tmp_path: pathlib.Path) -> None:
+    """
+    A toolchain without its marker is rebuilt in place, under the build lock
+    """
+    toolchain = ToolchainEnvironment(
+        directory=tmp_path / "toolchain",
+        python=sys.executable,
+        dependencies=["pip-tools==7.0.0"],
+        platform=Mock(windows=False),
+    )
+    toolchain.directory.mkdir()
+    (toolchain.directory / "leftover").touch()
+    assert toolchain.exists() is False
+    lock_path = tmp_path / ".toolchain.lock"
+
+    def create_virtualenv(_python: str) -> None:
+        assert lock_path.exists()
+        toolchain.directory.mkdir()
+
+    with patch("hatch_pip_compile.toolchain.VirtualEnv") as mock_virtualenv:
+        mock_virtualenv.return_value.create.side_effect = create_virtualenv
+        toolchain.ensure()
+    assert mock_virtualenv.call_args.kwargs["directory"] == toolchain.directory
+    assert not (toolchain.directory / "leftover").exists()
+    assert toolchain.exists() is True
+    assert not lock_path.exists()
+    toolchain.dependencies = ["pip-tools==7.1.0"]
+    assert toolchain.exists() is False
@@ -0,0 +1,53 @@
+"""
+Testing the `trace` module
+"""
+
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from hatch_pip_compile.trace import PhaseTracer
+from tests.conftest import PipCompileFixture
+
+
+def test_tracer_disabled(pip_compile: PipCompileFixture) -> None:
+    """
+    Tracing is disabled unless configured
+    """
+    environment = pip_compile.default_environment
+    assert environment.tracer.enabled is False
+    with environment.tracer.phase("disabled") as record:
+        assert record == {}
+
+
+def test_tracer_check_command(
+    mock_check_command: Mock, pip_compile: PipCompileFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Traced phases are written as JSON lines
+    """
+    trace_file = pip_compile.isolation / "trace.jsonl"
+    monkeypatch.setenv(PhaseTracer.environment_variable, str(trace_file))
+    environment = pip_compile.reload_environment("default")
+    environment.create()
+    environment.installer.install_dependencies()
+    records = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    phases = [record["phase"] for record in records]
+    assert phases[-1] == "install_dependencies"
+    assert {record["environment"] for record in records} == {"default"}
+    assert all(record["duration"] >= 0 for record in records)
+
+
+def test_tracer_exit_code(pip_compile: PipCompileFixture) -> None:
+    """
+    The exit code of a failed command is recorded
+    """
+    trace_file = pip_compile.isolation / "trace.jsonl"
+    tracer = PhaseTracer(path=trace_file, environment_name="default")
+    with pytest.raises(SystemExit):
+        with tracer.phase("check_command", argv=["python", "-c", "exit(3)"]):
+            raise SystemExit(3)
+    record = json.loads(trace_file.read_text())
+    assert record["argv"] == ["python", "-c", "exit(3)"]
+    assert record["exit_code"] == 3
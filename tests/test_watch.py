@@ -0,0 +1,123 @@
+"""
+Testing the `watch` module
+"""
+
+import asyncio
+import pathlib
+from typing import Dict, List
+from unittest.mock import patch
+
+from hatch_pip_compile.aio import AsyncEnvironmentRunner, EnvironmentResult, _LockOutcome
+from hatch_pip_compile.plugin import PipCompileEnvironment
+from hatch_pip_compile.watch import LockWatcher
+from tests.conftest import PipCompileFixture
+
+
+def test_changed_environments(pip_compile: PipCompileFixture) -> None:
+    """
+    Only environments whose lock inputs changed are relocked, with their dependents
+    """
+    test_config = pip_compile.toml_doc["tool"]["hatch"]["envs"]["test"]
+    test_config["pip-compile-constraint"] = "default"
+    pip_compile.update_pyproject()
+    watcher = LockWatcher(environments=["default", "test", "docs"], root=pip_compile.isolation)
+    watcher.load()
+    assert watcher.get_changed() == {"default", "test", "docs"}
+    watcher.load()
+    assert watcher.get_changed() == set()
+    assert watcher.get_dependents(["default"]) == {"default", "test"}
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["docs"]["dependencies"].append("mkdocs-material")
+    pip_compile.update_pyproject()
+    watcher.load(reload_project=True)
+    assert watcher.get_changed() == {"docs"}
+
+
+def test_wait_for_change(pip_compile: PipCompileFixture) -> None:
+    """
+    Changes to the watched files are picked up once they settle
+    """
+    pip_compile.toml_doc["tool"]["hatch"]["envs"]["test"]["pip-compile-constraint"] = "default"
+    pip_compile.update_pyproject()
+    watcher = LockWatcher(
+        environments=["test"], root=pip_compile.isolation, debounce=0.05, poll_interval=0.01
+    )
+    watcher.load()
+    snapshot = watcher.get_snapshot()
+    pyproject = pip_compile.pyproject.resolve()
+    assert pyproject in snapshot
+    assert watcher.environments["test"].piptools_constraints_file in snapshot
+
+    async def edit_and_wait() -> None:
+        change = asyncio.ensure_future(watcher.wait_for_change(snapshot))
+        await asyncio.sleep(0.05)
+        assert not change.done()
+        pip_compile.pyproject.write_text(pip_compile.pyproject.read_text() + "\n")
+        new_snapshot = await asyncio.wait_for(change, timeout=5)
+        assert new_snapshot[pyproject] != snapshot[pyproject]
+
+    asyncio.run(edit_and_wait())
+
+
+def test_wait_for_change_debounce(pip_compile: PipCompileFixture) -> None:
+    """
+    Changes that keep coming in are only reported once they stop for `debounce` seconds
+    """
+    watcher = LockWatcher(
+        environments=["default"], root=pip_compile.isolation, debounce=0.2, poll_interval=0.01
+    )
+    watcher.load()
+    snapshot = watcher.get_snapshot()
+
+    async def edit_repeatedly() -> None:
+        change = asyncio.ensure_future(watcher.wait_for_change(snapshot))
+        for _ in range(5):
+            pip_compile.pyproject.write_text(pip_compile.pyproject.read_text() + "\n")
+            await asyncio.sleep(0.05)
+            assert not change.done()
+        new_snapshot = await asyncio.wait_for(change, timeout=5)
+        assert new_snapshot == watcher.get_snapshot()
+
+    asyncio.run(edit_repeatedly())
+
+
+def test_watch_restarts_relock(pip_compile: PipCompileFixture) -> None:
+    """
+    A relock whose inputs change mid-resolution is cancelled and started over
+    """
+    reports: List[Dict[str, EnvironmentResult]] = []
+    locked: List[List[str]] = []
+    watcher = LockWatcher(
+        environments=["default"],
+        root=pip_compile.isolation,
+        debounce=0.05,
+        poll_interval=0.01,
+        report=reports.append,
+    )
+
+    async def lock_only(
+        self: AsyncEnvironmentRunner, environment: PipCompileEnvironment
+    ) -> _LockOutcome:
+        locked.append(environment.dependencies)
+        if len(locked) == 1:
+            await asyncio.sleep(60)
+        return _LockOutcome()
+
+    async def edit_while_locking() -> None:
+        watch = asyncio.ensure_future(watcher.watch())
+        while not locked:
+            await asyncio.sleep(0.01)
+        pip_compile.toml_doc["project"]["dependencies"] = ["requests"]
+        pip_compile.update_pyproject()
+        while len(reports) < 2:
+            await asyncio.sleep(0.01)
+        watch.cancel()
+        await asyncio.gather(watch, return_exceptions=True)
+
+    working_directory = pathlib.Path.cwd()
+    with patch.object(AsyncEnvironmentRunner, "lock_only", new=lock_only):
+        asyncio.run(asyncio.wait_for(edit_while_locking(), timeout=30))
+    assert pathlib.Path.cwd() == working_directory
+    assert reports[0]["default"].status == AsyncEnvironmentRunner.CANCELLED
+    assert reports[1]["default"].succeeded
+    assert "requests" not in locked[0]
+    assert "requests" in locked[1]
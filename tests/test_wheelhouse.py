@@ -0,0 +1,138 @@
+"""
+Testing the `wheelhouse` module
+"""
+
+import hashlib
+import pathlib
+import subprocess
+from textwrap import dedent
+from typing import Any, List
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from hatch_pip_compile.api import get_environment, load_application
+from hatch_pip_compile.cli import cli
+from hatch_pip_compile.wheelhouse import (
+    LockedArtifact,
+    Wheelhouse,
+    WheelhouseTarget,
+    read_locked_artifacts,
+)
+from tests.conftest import PipCompileFixture
+
+
+def _fake_download(args: List[str], **kwargs: Any) -> subprocess.CompletedProcess:
+    """
+    Write a fake artifact into the `pip download` destination
+    """
+    assert args[args.index("--python-version") + 1] == "3.9"
+    destination = pathlib.Path(args[args.index("--dest") + 1])
+    name, version = args[-1].split("==")
+    (destination / f"{name}-{version}-py3-none-any.whl").write_bytes(args[-1].encode())
+    return subprocess.CompletedProcess(args=args, returncode=0)
+
+
+def test_read_locked_artifacts(pip_compile: PipCompileFixture) -> None:
+    """
+    Pins are de-duplicated across lock files and their hashes merged
+    """
+    first_lock = pip_compile.isolation / "first.txt"
+    first_lock.write_text(
+        dedent(
+            """
+            httpx==0.22.0 \\
+                --hash=sha256:aaa
+            requests==2.31.0
+            """
+        )
+    )
+    second_lock = pip_compile.isolation / "second.txt"
+    second_lock.write_text(
+        dedent(
+            """
+            HTTPX==0.22.0 \\
+                --hash=sha256:bbb
+            -e .
+            """
+        )
+    )
+    assert read_locked_artifacts([first_lock, second_lock]) == [
+        LockedArtifact(name="httpx", version="0.22.0", hashes=frozenset({"aaa", "bbb"})),
+        LockedArtifact(name="requests", version="2.31.0"),
+    ]
+
+
+def test_wheelhouse_target() -> None:
+    """
+    Targets select artifacts for another interpreter with `pip download`
+    """
+    markers = {"implementation_name": "cpython", "python_version": "3.9"}
+    with patch("hatch_pip_compile.wheelhouse.platform_tags", return_value=iter(["linux_x86_64"])):
+        target = WheelhouseTarget.from_markers(markers)
+    assert target.tag == "cp39-cp39-linux_x86_64"
+    assert target.download_args == [
+        "--python-version",
+        "3.9",
+        "--implementation",
+        "cp",
+        "--abi",
+        "cp39",
+        "--platform",
+        "linux_x86_64",
+    ]
+    pypy_target = WheelhouseTarget(python_version="3.9", implementation="pp", platforms=())
+    assert pypy_target.tag == "pp39-none-any"
+    assert "--abi" not in pypy_target.download_args
+
+
+def test_wheelhouse_prefetch(pip_compile: PipCompileFixture) -> None:
+    """
+    Missing artifacts are downloaded, verified and recorded in the manifest per target
+    """
+    wheelhouse = Wheelhouse(directory=pip_compile.isolation / "wheelhouse")
+    target = WheelhouseTarget(python_version="3.9", implementation="cp", platforms=("any",))
+    other_target = WheelhouseTarget(python_version="3.12", implementation="cp", platforms=("any",))
+    httpx_hash = hashlib.sha256(b"httpx==0.22.0").hexdigest()
+    artifacts = [
+        LockedArtifact(name="httpx", version="0.22.0", hashes=frozenset({httpx_hash})),
+        LockedArtifact(name="requests", version="2.31.0", hashes=frozenset({"bad"})),
+    ]
+    with patch("hatch_pip_compile.wheelhouse.subprocess.run", side_effect=_fake_download):
+        fetched, failures = wheelhouse.prefetch(artifacts=artifacts, target=target, jobs=2)
+    assert fetched == artifacts[:1]
+    assert "Hash mismatch" in failures["cp39-cp39-any/requests==2.31.0"]
+    assert wheelhouse.read_manifest() == {
+        "cp39-cp39-any/httpx==0.22.0": {
+            "filename": "httpx-0.22.0-py3-none-any.whl",
+            "sha256": httpx_hash,
+        }
+    }
+    assert sorted(path.name for path in wheelhouse.directory.iterdir()) == [
+        "httpx-0.22.0-py3-none-any.whl",
+        "manifest.json",
+    ]
+    assert wheelhouse.covers({"httpx": "0.22.0"}, target=target) is True
+    assert wheelhouse.covers({"httpx": "0.22.0"}, target=other_target) is False
+    assert wheelhouse.covers({"httpx": "0.22.0", "requests": "2.31.0"}, target=target) is False
+    with patch("hatch_pip_compile.wheelhouse.subprocess.run") as mock_run:
+        fetched, failures = wheelhouse.prefetch(artifacts=artifacts[:1], target=target)
+    mock_run.assert_not_called()
+    assert fetched == []
+    assert failures == {}
+
+
+def test_cli_prefetch_check(pip_compile: PipCompileFixture) -> None:
+    """
+    `prefetch --check` checks the wheelhouse the environments install from
+    """
+    application = load_application(root=pip_compile.isolation)
+    environment = get_environment(application=application, environment_name="default")
+    with pip_compile.chdir(), patch.object(
+        Wheelhouse, "missing", autospec=True, return_value=[]
+    ) as mock_missing:
+        result = CliRunner().invoke(cli=cli, args=["prefetch", "--check"])
+    assert result.exit_code == 0
+    assert {call.args[0].directory for call in mock_missing.call_args_list} == {
+        environment.wheelhouse.directory
+    }